@@ -0,0 +1,3 @@
+from .ds_contest_tools import main
+
+main()
@@ -1,11 +1,22 @@
 import os
-import shutil
-import subprocess
+import struct
+import sys
+import time
+import zipfile
+import zlib
 
-from .fileutils import recursive_overwrite, rename_io
-from .jsonutils import parse_json
-from .logger import error_log, info_log
-from .utils import check_problem_metadata, check_subprocess_output, verify_path
+from .config import BOCA_COMPRESSION_LEVEL, JAVA_TIME_FACTOR, ZIP_DATE_TIME
+from .fileutils import get_padded_io_files
+from .logger import debug_log, info_log
+from .utils import (get_python_interpreter, get_python_time_factor,
+                    load_problem_config, verify_path)
+
+# Languages judged by the BOCA checker
+BOCA_COMPARE_LANGUAGES = ['c', 'cpp', 'java', 'py2', 'py3']
+ZIP_CHUNK_SIZE = 1 << 20
+# Copying compressed entries relies on internals of ZipFile that were only
+# checked on these versions. Other versions compress every entry again
+ZIP_RAW_COPY = (3, 8) <= sys.version_info[:2] <= (3, 13)
 
 
 class default_boca_limits:
@@ -14,29 +25,138 @@ class default_boca_limits:
     maximum_output_size = 4096  # Maximum output size (KB)
 
 
-def boca_zip(boca_folder: str) -> None:
-    """ Zip a problem of BOCA format.
-    
+def get_zip_date_time() -> tuple:
+    """Get the timestamp of the entries of BOCA packages, which is
+    SOURCE_DATE_EPOCH, if defined, for reproducible builds.
+
+    Returns:
+        A tuple (year, month, day, hour, minute, second).
+    """
+    epoch = os.environ.get('SOURCE_DATE_EPOCH')
+    if not epoch:
+        return ZIP_DATE_TIME
+    return max(tuple(time.gmtime(int(epoch)))[:6], ZIP_DATE_TIME)
+
+
+def zip_entry_info(name: str, mode: int, compression_level: int) -> zipfile.ZipInfo:
+    """Create the header of an entry of a BOCA package.
+
     Args:
-        boca_folder: Path to the BOCA folder.
+        name: The name of the entry.
+        mode: The permission bits of the entry.
+        compression_level: The deflate level from 0 (stored) to 9.
+    """
+    info = zipfile.ZipInfo(name, get_zip_date_time())
+    info.compress_type = zipfile.ZIP_DEFLATED if compression_level else zipfile.ZIP_STORED
+    info.external_attr = (0o100000 | mode) << 16
+    return info
+
+
+def copy_zip_entry(archive: zipfile.ZipFile, info: zipfile.ZipInfo,
+                   source, source_info: zipfile.ZipInfo) -> None:
+    """Copy the compressed data of an entry without decompressing it. Only
+    used when ZIP_RAW_COPY is set.
+
+    Args:
+        archive: The archive being written.
+        info: The header of the new entry.
+        source: The file of the archive that contains the entry, which may
+            be the file of the archive being written.
+        source_info: The entry to be copied.
+    """
+    info.compress_type = source_info.compress_type
+    info.CRC = source_info.CRC
+    info.compress_size = source_info.compress_size
+    info.file_size = source_info.file_size
+    source.seek(source_info.header_offset)
+    header = struct.unpack(zipfile.structFileHeader, source.read(zipfile.sizeFileHeader))
+    data_offset = source_info.header_offset + zipfile.sizeFileHeader + header[-2] + header[-1]
+
+    info.header_offset = archive.start_dir
+    archive.fp.seek(archive.start_dir)
+    archive.fp.write(info.FileHeader())
+    end = archive.fp.tell()
+    copied = 0
+    while copied < info.compress_size:
+        source.seek(data_offset + copied)
+        chunk = source.read(min(info.compress_size - copied, ZIP_CHUNK_SIZE))
+        if not chunk:
+            raise zipfile.BadZipFile(f'Truncated entry {source_info.filename}')
+        archive.fp.seek(end)
+        archive.fp.write(chunk)
+        end += len(chunk)
+        copied += len(chunk)
+    archive.start_dir = end
+    archive.filelist.append(info)
+    archive.NameToInfo[info.filename] = info
+
+
+def boca_zip(entries: list, zip_path: str, compression_level: int = BOCA_COMPRESSION_LEVEL) -> None:
+    """Zip a problem of BOCA format.
+
+    Entries are written with a fixed timestamp, so the same problem always
+    gives the same package. If the package already exists and was zipped
+    with the same compression level, unchanged entries are copied from it
+    without being compressed again, and a file added under several names is
+    compressed only once, where ZIP_RAW_COPY allows it.
+
+    Args:
+        entries: A list of tuples (name, source, mode), where source is the
+            path to a file or the contents of the entry.
+        zip_path: Path to the BOCA package.
+        compression_level: The deflate level from 0 (stored) to 9.
     """
     info_log("Zipping BOCA package")
-    old_cwd = os.getcwd()
-    os.chdir(boca_folder)
-    zip_filename = os.path.basename(boca_folder)+'.zip'
-    p = subprocess.run('zip'+' -r ' + zip_filename + ' . ', shell=True,
-                       stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    check_subprocess_output(p, "Error zipping BOCA file.")
-    os.rename(zip_filename, os.path.join('..', zip_filename))
-    os.chdir(old_cwd)
+    comment = f'ds-contest-tools compression={compression_level}'.encode()
+    old_archive = None
+    old_entries = {}
+    if ZIP_RAW_COPY and zipfile.is_zipfile(zip_path):
+        old_archive = zipfile.ZipFile(zip_path, 'r')
+        if old_archive.comment == comment:
+            old_entries = {info.filename: info for info in old_archive.infolist()}
+
+    tmp_zip_path = f'{zip_path}.{os.getpid()}'
+    reused = 0
+    written_files = {}
+    try:
+        with zipfile.ZipFile(tmp_zip_path, 'w') as archive:
+            for name, source, mode in entries:
+                info = zip_entry_info(name, mode, compression_level)
+                is_file = isinstance(source, str)
+                if ZIP_RAW_COPY and is_file and source in written_files:
+                    copy_zip_entry(archive, info, archive.fp, archive.getinfo(written_files[source]))
+                    continue
+                if is_file:
+                    written_files[source] = name
+                    with open(source, 'rb') as f:
+                        data = f.read()
+                else:
+                    data = source
+                old = old_entries.get(name)
+                if old is not None and old.file_size == len(data) \
+                        and old.compress_type == info.compress_type and old.CRC == zlib.crc32(data):
+                    copy_zip_entry(archive, info, old_archive.fp, old)
+                    reused += 1
+                else:
+                    archive.writestr(info, data, compresslevel=compression_level)
+            archive.comment = comment
+    except BaseException:
+        os.remove(tmp_zip_path)
+        raise
+    finally:
+        if old_archive is not None:
+            old_archive.close()
+    os.replace(tmp_zip_path, zip_path)
+    debug_log(f'Reused {reused} of {len(entries)} entries of {zip_path}')
 
 
-def boca_pack(problem_folder: str, output_folder: str) -> None:
+def boca_pack(problem_folder: str, output_folder: str, compression_level: int = BOCA_COMPRESSION_LEVEL) -> None:
     """Convert a DS problem to a BOCA problem.
     
     Args:
         problem_folder: Path to the problem folder.
         output_folder: Path to the output folder.
+        compression_level: The deflate level of the package from 0 (stored) to 9.
     """
     # Verify if it is a conversion from a contest
     info_log(f"Starting BOCA conversion for problem {os.path.basename(problem_folder)}.")
@@ -44,77 +164,63 @@ def boca_pack(problem_folder: str, output_folder: str) -> None:
 
     boca_template_folder = os.path.join(
         *[os.path.dirname(os.path.abspath(__file__)), 'files', 'boca'])
-    boca_folder = os.path.join(*[output_folder, 'boca'])
-    
-    # Copy template files
-    recursive_overwrite(boca_template_folder, boca_folder)
-    
+    entries = []
+
+    # Template files, except the ones written below
+    for folder in sorted(os.listdir(boca_template_folder)):
+        if folder in ['compare', 'description', 'limits']:
+            continue
+        for f in sorted(os.listdir(os.path.join(boca_template_folder, folder))):
+            path = os.path.join(boca_template_folder, folder, f)
+            entries.append((f'{folder}/{f}', path, os.stat(path).st_mode & 0o777))
+
     # Get problem metadata
-    problem_metadata = parse_json(os.path.join(problem_folder, 'problem.json'))
-    check_problem_metadata(problem_metadata)
+    problem_config = load_problem_config(problem_folder)
     basename = os.path.basename(os.path.abspath(problem_folder))
     filename = os.path.join(problem_folder, basename)
-    boca_description_folder = os.path.join(boca_folder, 'description')
-    with open(os.path.join(boca_description_folder, 'problem.info'), 'w+') as f:
-        f.write('basename='+basename+'\n')
-        f.write('fullname='+basename+'\n')
-        f.write('descfile='+basename+'.pdf\n')
+    problem_info = ('basename='+basename+'\n' +
+                    'fullname='+basename+'\n' +
+                    'descfile='+basename+'.pdf\n')
+    entries.append(('description/problem.info', problem_info.encode(), 0o644))
 
     pdf_file = filename+'.pdf'
     verify_path(pdf_file)
-    shutil.copy2(pdf_file, boca_description_folder)
+    entries.append((f'description/{basename}.pdf', pdf_file, 0o644))
 
     # Compare
     checker_boca = os.path.join(problem_folder, 'bin', 'checker-boca')
     verify_path(checker_boca)
-    compare_folder = os.path.join(boca_folder, 'compare')
-    checker_compare = os.path.join(compare_folder, 'checker-boca')
-    shutil.copy2(checker_boca, checker_compare)
-    shutil.copy2(checker_compare, os.path.join(compare_folder, 'c'))
-    shutil.copy2(checker_compare, os.path.join(compare_folder, 'cpp'))
-    shutil.copy2(checker_compare, os.path.join(compare_folder, 'java'))
-    shutil.copy2(checker_compare, os.path.join(compare_folder, 'py2'))
-    shutil.copy2(checker_compare, os.path.join(compare_folder, 'py3'))
+    for language in ['checker-boca'] + BOCA_COMPARE_LANGUAGES:
+        entries.append((f'compare/{language}', checker_boca, 0o755))
 
     # Limits
-    java_python_time_factor = 3
-    for filename in os.listdir(os.path.join(boca_template_folder, 'limits')):
-        with open(os.path.join(*[boca_folder, 'limits', filename]), 'w+') as f:
-            time_limit = problem_metadata['problem']['time_limit']
-            if filename in ['java', 'py2', 'py3']:
-                time_limit *= java_python_time_factor
-            
-            # Get limits from problem.json or use default values, if not specified
-            repetitions = problem_metadata['boca_config']['number_of_repetitions']
-            repetitions = repetitions if repetitions is not None else default_boca_limits.number_of_repetitions
-            max_memory = problem_metadata['boca_config']['maximum_memory_mb']
-            max_memory = max_memory if max_memory is not None else default_boca_limits.maximum_memory
-            max_output = problem_metadata['boca_config']['maximum_output_size_kb']
-            max_output = max_output if max_output is not None else default_boca_limits.maximum_output_size
-            
-            f.write('echo ' + str(time_limit) + '\n')
-            f.write('echo ' + str(repetitions)+'\n')
-            f.write('echo ' + str(max_memory)+'\n')
-            f.write('echo ' + str(max_output)+'\n')
-            f.write('exit 0\n')
-
-    # Input
-    boca_input_folder = os.path.join(boca_folder, 'input')
-    problem_input_folder = os.path.join(problem_folder, 'input')
-    os.makedirs(boca_input_folder, exist_ok=True)
-    input_files = [os.path.join(problem_input_folder, f) for
-                   f in os.listdir(problem_input_folder) if os.path.isfile(os.path.join(problem_input_folder, f))]
-    for filename in input_files:
-        shutil.copy2(filename, boca_input_folder)
-    rename_io(boca_input_folder)
-
-    # Output
-    boca_output_folder = os.path.join(boca_folder, 'output')
-    problem_output_folder = os.path.join(problem_folder, 'output')
-    os.makedirs(boca_output_folder, exist_ok=True)
-    output_files = [os.path.join(problem_output_folder, f) for
-                    f in os.listdir(problem_output_folder) if os.path.isfile(os.path.join(problem_output_folder, f))]
-    for filename in output_files:
-        shutil.copy2(filename, boca_output_folder)
-    rename_io(boca_output_folder)
-    boca_zip(boca_folder)
+    python_time_factor = get_python_time_factor(
+        get_python_interpreter(problem_config))
+    for filename in sorted(os.listdir(os.path.join(boca_template_folder, 'limits'))):
+        limits_mode = os.stat(os.path.join(boca_template_folder, 'limits', filename)).st_mode & 0o777
+        time_limit = problem_config.time_limit
+        if filename == 'java':
+            time_limit *= JAVA_TIME_FACTOR
+        elif filename in ['py2', 'py3']:
+            time_limit *= python_time_factor
+
+        # Get limits from problem.json or use default values, if not specified
+        repetitions = problem_config.boca_config.get('number_of_repetitions')
+        repetitions = repetitions if repetitions is not None else default_boca_limits.number_of_repetitions
+        max_memory = problem_config.boca_config.get('maximum_memory_mb')
+        max_memory = max_memory if max_memory is not None else default_boca_limits.maximum_memory
+        max_output = problem_config.boca_config.get('maximum_output_size_kb')
+        max_output = max_output if max_output is not None else default_boca_limits.maximum_output_size
+
+        limits = ('echo ' + str(time_limit) + '\n' +
+                  'echo ' + str(repetitions)+'\n' +
+                  'echo ' + str(max_memory)+'\n' +
+                  'echo ' + str(max_output)+'\n' +
+                  'exit 0\n')
+        entries.append((f'limits/{filename}', limits.encode(), limits_mode))
+
+    # Input and output, with names padded for numerical sorting
+    for folder in ['input', 'output']:
+        for path, padded_name in get_padded_io_files(os.path.join(problem_folder, folder)):
+            entries.append((f'{folder}/{padded_name}', path, 0o644))
+    boca_zip(entries, os.path.join(output_folder, 'boca.zip'), compression_level)
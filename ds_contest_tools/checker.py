@@ -2,24 +2,390 @@ import os
 import queue
 import subprocess
 import time
-from multiprocessing import Event, Manager, Pipe, Process, Queue
+from multiprocessing import Condition, Event, Manager, Pipe, Process, Queue, Value
 from multiprocessing.connection import Connection
 from multiprocessing.managers import DictProxy
 from signal import SIGKILL
 
 import psutil
 
-from .config import custom_key
+from .config import (CHECKER_NICENESS, CHECKER_TIMEOUT, CONTENTION_PROBE_INTERVAL,
+                     CONTENTION_MARGIN, MEMORY_BUDGET_SHARE,
+                     OUTPUT_RETENTION_MB, custom_key)
 from .logger import debug_log, error_log, info_log, warning_log
 from .metadata import (Paths, Problem, ProblemAnswer, Solution, Statistic,
                        Status, Test)
 
+EXPECTED_STATUS = {
+    "main-ac": [Status.AC],
+    "alternative-ac": [Status.AC],
+    'wrong-answer': [Status.WA],
+    'time-limit': [Status.HARD_TLE, Status.SOFT_TLE],
+    'time-limit-or-ac': [Status.AC, Status.SOFT_TLE, Status.HARD_TLE],
+    "time-limit-or-memory-limit": [Status.SOFT_TLE, Status.HARD_TLE, Status.MLE],
+    'runtime-error': [Status.RE],
+    'memory-limit': [Status.MLE],
+    'presentation-error': [Status.PE]
+}
+
+# Verdicts of the testlib interactor exit codes
+INTERACTOR_STATUS = {
+    0: Status.AC,
+    1: Status.WA,
+    2: Status.PE,
+    3: Status.FAIL,
+    4: Status.PE,
+    8: Status.PE
+}
+
+
+class MemoryBudget:
+    """
+    Admission control for the memory committed by solutions running in parallel.
+
+    Each running job commits its memory limit. A job is admitted only while the
+    committed total fits in the budget, except when nothing else is running, so
+    a single job larger than the budget still makes progress.
+
+    Attributes:
+        budget: The amount of memory in bytes that can be committed at once.
+        average_running: The number of jobs running, averaged over the time
+            between the first admission and the last release.
+    """
+
+    def __init__(self, budget: float) -> None:
+        """
+        Initializes a new memory budget shared between processes.
+
+        Args:
+            budget: The amount of memory in bytes that can be committed at once.
+        """
+        self.budget = budget
+        self.__committed = Value('d', 0.0, lock=False)
+        self.__running = Value('i', 0, lock=False)
+        self.__started_at = Value('d', 0.0, lock=False)
+        self.__changed_at = Value('d', 0.0, lock=False)
+        self.__running_time = Value('d', 0.0, lock=False)
+        self.__condition = Condition()
+
+    @property
+    def average_running(self) -> float:
+        """
+        Gets the number of jobs running, averaged over the time between the
+        first admission and the last release, each count weighted by how long
+        it lasted.
+
+        Returns:
+            float: The time-weighted average number of running jobs.
+        """
+        with self.__condition:
+            elapsed = self.__changed_at.value - self.__started_at.value
+            return self.__running_time.value / elapsed if elapsed > 0 else 0.0
+
+    def __count_running(self, change: int) -> None:
+        """
+        Changes the number of running jobs, accumulating the time the previous
+        count lasted. Must be called with the condition held.
+
+        Args:
+            change: The number of jobs started, or finished if negative.
+        """
+        now = time.monotonic()
+        if not self.__started_at.value:
+            self.__started_at.value = now
+        else:
+            self.__running_time.value += self.__running.value * (now - self.__changed_at.value)
+        self.__changed_at.value = now
+        self.__running.value += change
+
+    def acquire(self, amount: float) -> None:
+        """
+        Blocks until the given amount of memory can be committed.
+
+        Args:
+            amount: The amount of memory in bytes to commit.
+        """
+        with self.__condition:
+            while self.__running.value > 0 and self.__committed.value + amount > self.budget:
+                self.__condition.wait()
+            self.__committed.value += amount
+            self.__count_running(1)
+
+    def release(self, amount: float) -> None:
+        """
+        Releases memory previously committed with acquire.
+
+        Args:
+            amount: The amount of memory in bytes to release.
+        """
+        with self.__condition:
+            self.__committed.value -= amount
+            self.__count_running(-1)
+            self.__condition.notify_all()
+
+
+class WorkerLimit:
+    """
+    Limits how many solution processes may run tests at the same time.
+
+    The limit can be changed while the solution is being judged, so the number
+    of concurrent timed runs follows the contention of the host.
+
+    Attributes:
+        limit: The maximum number of tests running at the same time.
+    """
+
+    def __init__(self, limit: int) -> None:
+        """
+        Initializes a new worker limit shared between processes.
+
+        Args:
+            limit: The initial maximum number of tests running at the same time.
+        """
+        self.__limit = Value('i', limit, lock=False)
+        self.__running = Value('i', 0, lock=False)
+        self.__condition = Condition()
+
+    @property
+    def limit(self) -> int:
+        """
+        Gets the maximum number of tests running at the same time.
+
+        Returns:
+            int: The current limit.
+        """
+        return self.__limit.value
+
+    def set_limit(self, limit: int) -> None:
+        """
+        Changes the maximum number of tests running at the same time.
+
+        Args:
+            limit: The new limit.
+        """
+        with self.__condition:
+            self.__limit.value = limit
+            self.__condition.notify_all()
+
+    def acquire(self) -> None:
+        """Blocks until a test can start running."""
+        with self.__condition:
+            while self.__running.value >= self.__limit.value:
+                self.__condition.wait()
+            self.__running.value += 1
+
+    def release(self) -> None:
+        """Signals that a running test has finished."""
+        with self.__condition:
+            self.__running.value -= 1
+            self.__condition.notify_all()
+
+
+def cpu_usage_sample(judge_pid: int, external_pids: list = []) -> tuple:
+    """
+    Samples the CPU time used by the whole host and by the judge, which is
+    the given process with its descendants, except the external processes
+    and their descendants.
+
+    Args:
+        judge_pid: The PID of the process that judges the solution.
+        external_pids: The PIDs of descendants that do not judge the solution,
+            such as the PDF build running in the background.
+
+    Returns:
+        A tuple containing the sample time, the busy CPU time of the host and
+        the CPU time of the judge, in seconds.
+    """
+    host = psutil.cpu_times()
+    # Guest time is already counted as user time
+    host_busy = sum(host) - host.idle - getattr(host, 'iowait', 0) - \
+        getattr(host, 'guest', 0) - getattr(host, 'guest_nice', 0)
+    judge_busy = 0.0
+    try:
+        processes = [psutil.Process(judge_pid)]
+    except psutil.NoSuchProcess:
+        processes = []
+    while processes:
+        process = processes.pop()
+        try:
+            # Finished tests and checkers are counted in the time of the
+            # processes that waited for them
+            judge_busy += sum(process.cpu_times()[:4])
+            processes.extend(child for child in process.children()
+                             if child.pid not in external_pids)
+        except psutil.NoSuchProcess:
+            pass
+    return time.monotonic(), host_busy, judge_busy
+
+
+def external_cpu_load(previous: tuple, current: tuple) -> float:
+    """
+    Computes how many cores other processes of the host kept busy between
+    two samples of 'cpu_usage_sample'. The load of the judge itself is not
+    counted, so its own timed runs and checkers are never taken as contention.
+
+    Args:
+        previous: The earlier sample.
+        current: The later sample.
+
+    Returns:
+        The average number of cores used by other processes.
+    """
+    elapsed = max(current[0] - previous[0], 1e-6)
+    host_busy = current[1] - previous[1]
+    judge_busy = current[2] - previous[2]
+    return max(0.0, host_busy - judge_busy) / elapsed
+
+
+def adapt_worker_count(worker_limit: WorkerLimit, max_workers: int, stop_monitor: Event,
+                       judge_pid: int, external_pids: list, baseline: tuple) -> None:
+    """
+    Periodically measures the CPU load of the other processes of the host
+    and lowers the number of concurrent timed runs while they need the cores,
+    raising it again when the cores are free. Nothing is run to measure the
+    load, so the timed runs are not disturbed.
+
+    Args:
+        worker_limit: The limit of concurrent runs to adjust.
+        max_workers: The number of concurrent runs requested by the user.
+        stop_monitor: An event object to signal the controller to stop.
+        judge_pid: The PID of the process that judges the solution.
+        external_pids: The PIDs of descendants of the judge whose load is
+            counted as contention.
+        baseline: The sample taken before judging started.
+    """
+    cpu_count = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    # Workers requested beyond the cores are not taken as contention
+    capacity = max(cpu_count, max_workers)
+    previous = baseline
+    while not stop_monitor.wait(CONTENTION_PROBE_INTERVAL):
+        current = cpu_usage_sample(judge_pid, external_pids)
+        load = external_cpu_load(previous, current)
+        previous = current
+        limit = worker_limit.limit
+        if limit + load > capacity + CONTENTION_MARGIN and limit > 1:
+            worker_limit.set_limit(limit - 1)
+            debug_log(f'Host contention detected ({load:.1f} cores used by other processes). '
+                      f'Running tests on {limit - 1} workers.')
+        elif limit + 1 + load <= capacity and limit < max_workers:
+            worker_limit.set_limit(limit + 1)
+            debug_log(f'Host is quiet ({load:.1f} cores used by other processes). '
+                      f'Running tests on {limit + 1} workers.')
+
+
+def available_memory_budget(memory_share: float) -> float:
+    """
+    Computes the amount of memory that running solutions may commit at once.
+
+    Args:
+        memory_share: The share of the available RAM to be used, between 0 and 1.
+
+    Returns:
+        The memory budget in bytes.
+    """
+    budget = psutil.virtual_memory().available * min(memory_share, 1)
+    if budget <= 0:
+        error_log(f'Invalid memory share {memory_share}: no memory is left for running solutions.')
+    return budget
+
+
+def get_input_files(input_folder: str) -> list:
+    """
+    Lists the test inputs sorted by test number. The placeholders used by the
+    statement of interactive problems are not tests.
+
+    Args:
+        input_folder: The path to the input folder.
+
+    Returns:
+        The list of input file names.
+    """
+    input_files = [f for f in os.listdir(input_folder)
+                   if os.path.isfile(os.path.join(input_folder, f)) and not f.endswith('.interactive')]
+    input_files.sort(key=custom_key)
+    return input_files
+
+
+def start_interactive(exec_args: list, interactor_file: str, fname_in: str, fname_out: str) -> tuple:
+    """
+    Starts a solution connected to the interactor through a pair of pipes.
+
+    The interactor reads the test input and writes its output file, which is
+    checked as the output of the solution.
+
+    Args:
+        exec_args: The command that runs the solution.
+        interactor_file: The path to the interactor binary.
+        fname_in: The path to the input file.
+        fname_out: The path to the output file written by the interactor.
+
+    Returns:
+        A tuple containing the solution and the interactor processes.
+    """
+    to_interactor_read, to_interactor_write = os.pipe()
+    to_solution_read, to_solution_write = os.pipe()
+    try:
+        # The verdict of the interactor is its exit code, and its messages are
+        # discarded so it never blocks on a full pipe
+        interactor = subprocess.Popen([interactor_file, fname_in, fname_out],
+                                      stdin=to_interactor_read, stdout=to_solution_write,
+                                      stderr=subprocess.DEVNULL)
+        try:
+            p = subprocess.Popen(exec_args, stdin=to_solution_read, stdout=to_interactor_write,
+                                 stderr=subprocess.PIPE, text=True)
+        except BaseException:
+            interactor.kill()
+            interactor.wait()
+            raise
+    finally:
+        # Only the children keep the pipes open, so each one sees EOF
+        # when the other exits
+        for fd in [to_interactor_read, to_interactor_write, to_solution_read, to_solution_write]:
+            os.close(fd)
+    return p, interactor
+
+
+def finish_interactor(interactor: subprocess.Popen, status: Status, fname: str) -> Status:
+    """
+    Waits for the interactor and combines its verdict with the status of the
+    solution. The interactor verdict prevails, since a solution usually fails
+    after the interactor stops reading, except on time limit exceeded.
+
+    Args:
+        interactor: The interactor process.
+        status: The status of the solution run.
+        fname: The name of the input file.
+
+    Returns:
+        The status of the test.
+    """
+    try:
+        interactor.communicate(timeout=CHECKER_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        interactor.kill()
+        interactor.communicate()
+        warning_log('Input ' + fname +
+                    f': FAIL: interactor did not finish in {CHECKER_TIMEOUT} seconds')
+        return Status.FAIL
+    verdict = INTERACTOR_STATUS.get(interactor.returncode, Status.FAIL)
+    if verdict == Status.FAIL:
+        warning_log('Input ' + fname +
+                    ': FAIL: maybe the jury solution or the interactor are not correct')
+    if status == Status.HARD_TLE or verdict == Status.AC:
+        return status
+    return verdict
+
 
 def run_binary(problem_obj: Problem, solution: Solution, input_files: list, output_dict, pids: Queue,
-               pace: int, begin: int) -> None:
+               pace: int, begin: int, memory_budget: MemoryBudget, checker_queue: Queue,
+               worker_limit: WorkerLimit) -> None:
     """
     Runs the compiled binary for a given solution and populates the output dictionary.
 
+    Tests that finished without errors are sent to the checker queue and the
+    next test starts right away. On interactive problems, only the solution
+    process is measured and limited.
+
     Args:
         problem_obj: The problem object.
         solution: The solution object containing the executable.
@@ -28,10 +394,15 @@ def run_binary(problem_obj: Problem, solution: Solution, input_files: list, outp
         pids: The queue to add PIDs to.
         pace: The number of input files to process at a time.
         begin: The index of the first file to process.
+        memory_budget: The admission control shared by the running processes.
+        checker_queue: The queue consumed by the checker processes.
+        worker_limit: The limit of tests running at the same time.
 
     """
     ans_folder = os.path.join(problem_obj.problem_dir, 'output')
+    interactor_file = os.path.join(problem_obj.problem_dir, 'bin', 'interactor')
 
+    job_memory: float = problem_obj.memory_limit + solution.vm_memory_usage
     conn_sender, con_recv = Pipe()
     for i in range(begin, len(input_files), pace):
         ans_file: str = os.path.join(ans_folder, input_files[i])
@@ -41,44 +412,78 @@ def run_binary(problem_obj: Problem, solution: Solution, input_files: list, outp
         status: Status = Status.AC
         checker_output: str = None
         memory_info: tuple = (0, 0)
-        with open(fname_in, 'r') as inf, open(fname_out, 'w') as ouf:
-            local_time_start = time.perf_counter()
-            local_time_end = 0
-            total_time_elapsed = 0
-            p = subprocess.Popen(solution.exec_args,
-                                 stdin=inf, stdout=ouf, stderr=subprocess.PIPE, text=True)
-            pids.put([p.pid, conn_sender])
-            try:
-                _, stderr = p.communicate(
-                    timeout=2 * problem_obj.time_limit)
-                if p.returncode < 0 or stderr:
-                    status = Status.RE
-            except subprocess.TimeoutExpired:
-                status = Status.HARD_TLE
-                p.kill()
-                _, stderr = p.communicate()
-            finally:
-                local_time_end = time.perf_counter()
-                total_time_elapsed = local_time_end - local_time_start
-                memory_info = con_recv.recv()
-            if memory_info[1] != Status.AC:
-                status = Status.MLE
-                if total_time_elapsed > problem_obj.time_limit:
-                    status = Status.TLE_MLE
-            elif status == Status.AC:
-                status, checker_output = run_checker(
-                    ans_file, fname_in, fname_out)
-                if total_time_elapsed > problem_obj.time_limit and status == Status.AC:
-                    status = Status.SOFT_TLE
-
-            test_info: Test = Test(i, total_time_elapsed,
-                                   memory_info[0], status, checker_output)
-            output_dict[i] = test_info
+        interactor: subprocess.Popen = None
+        worker_limit.acquire()
+        memory_budget.acquire(job_memory)
+        local_time_start = time.perf_counter()
+        local_time_end = 0
+        total_time_elapsed = 0
+        if problem_obj.interactive:
+            p, interactor = start_interactive(
+                solution.exec_args, interactor_file, fname_in, fname_out)
+        else:
+            with open(fname_in, 'r') as inf, open(fname_out, 'w') as ouf:
+                p = subprocess.Popen(solution.exec_args,
+                                     stdin=inf, stdout=ouf, stderr=subprocess.PIPE, text=True)
+        pids.put([p.pid, conn_sender])
+        try:
+            _, stderr = p.communicate(
+                timeout=2 * problem_obj.time_limit)
+            if p.returncode < 0 or stderr:
+                status = Status.RE
+        except subprocess.TimeoutExpired:
+            status = Status.HARD_TLE
+            p.kill()
+            _, stderr = p.communicate()
+        finally:
+            local_time_end = time.perf_counter()
+            total_time_elapsed = local_time_end - local_time_start
+            memory_info = con_recv.recv()
+            memory_budget.release(job_memory)
+            worker_limit.release()
+        if interactor is not None:
+            status = finish_interactor(interactor, status, input_files[i])
+        if memory_info[1] != Status.AC:
+            status = Status.MLE
+            if total_time_elapsed > problem_obj.time_limit:
+                status = Status.TLE_MLE
+        elif status == Status.AC:
+            checker_queue.put((i, ans_file, fname_in, fname_out,
+                               total_time_elapsed, memory_info[0]))
+            continue
+
+        test_info: Test = Test(i, total_time_elapsed,
+                               memory_info[0], status, checker_output)
+        output_dict[i] = test_info
     con_recv.close()
     conn_sender.close()
 
 
-def run(problem_obj: Problem, solution: Solution, cpu_number: int) -> None:
+def check_outputs(problem_obj: Problem, checker_queue: Queue, output_dict) -> None:
+    """
+    Runs the checker on the outputs sent by the solution processes until a
+    None sentinel is received, and populates the output dictionary. The
+    process runs with a lower priority than the timed runs.
+
+    Args:
+        problem_obj: The problem object.
+        checker_queue: The queue of finished tests to be checked.
+        output_dict (Dict[int, Test]): The dictionary to populate with the test results.
+    """
+    os.nice(CHECKER_NICENESS)
+    while True:
+        job = checker_queue.get()
+        if job is None:
+            break
+        i, ans_file, fname_in, fname_out, total_time_elapsed, memory_usage = job
+        status, checker_output = run_checker(ans_file, fname_in, fname_out)
+        if total_time_elapsed > problem_obj.time_limit and status == Status.AC:
+            status = Status.SOFT_TLE
+        output_dict[i] = Test(i, total_time_elapsed,
+                              memory_usage, status, checker_output)
+
+
+def run(problem_obj: Problem, solution: Solution, cpu_number: int, memory_share: float = MEMORY_BUDGET_SHARE) -> None:
     """
     Runs a solution to a given problem using multiple threads.
 
@@ -86,6 +491,7 @@ def run(problem_obj: Problem, solution: Solution, cpu_number: int) -> None:
         problem_obj: The problem to solve.
         solution: The solution to the problem.
         cpu_number: The number of CPU cores to use.
+        memory_share: The share of the available RAM that running tests may commit.
 
     """
     output_folder: str = solution.output_path
@@ -93,12 +499,12 @@ def run(problem_obj: Problem, solution: Solution, cpu_number: int) -> None:
     debug_log(f'Run solution {solution.solution_name}')
 
     start_time: float = time.perf_counter()
-    create_processes(problem_obj, solution, cpu_number)
+    create_processes(problem_obj, solution, cpu_number, memory_share)
     end_time: float = time.perf_counter()
     debug_log(f'Total time elapsed: {end_time - start_time:.2f}\n')
 
 
-def run_checker(ans: str, inf: str, ouf: str) -> tuple:
+def run_checker(ans: str, inf: str, ouf: str, timeout: float = CHECKER_TIMEOUT) -> tuple:
     """
     Runs the checker binary file and returns the status and checker output.
 
@@ -106,6 +512,7 @@ def run_checker(ans: str, inf: str, ouf: str) -> tuple:
         ans: The path to the answer file.
         inf: The path to the input file.
         ouf: The path to the output file.
+        timeout: The maximum time in seconds the checker may run.
 
     Returns:
         A tuple containing the status (one of Status.AC, Status.WA, Status.PE, or Status.FAIL) 
@@ -120,8 +527,13 @@ def run_checker(ans: str, inf: str, ouf: str) -> tuple:
     if (not os.path.isfile(ans)):
         error_log('Answer ' + fname + ' not available.')
     command = [checker_file, inf, ouf, ans]
-    p = subprocess.run(command, stdout=subprocess.PIPE,
-                       stderr=subprocess.PIPE)
+    try:
+        p = subprocess.run(command, stdout=subprocess.PIPE,
+                           stderr=subprocess.PIPE, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        warning_log('Input ' + fname +
+                    f': FAIL: checker did not finish in {timeout} seconds')
+        return Status.FAIL, f'FAIL checker timed out after {timeout} seconds'
     checker_output = p.stderr.decode('utf-8')
     if (checker_output.startswith('ok')):
         status = Status.AC
@@ -136,25 +548,80 @@ def run_checker(ans: str, inf: str, ouf: str) -> tuple:
     return status, checker_output
 
 
-def run_solutions(problem_obj: Problem, cpu_number: int) -> None:
+def run_solutions(problem_obj: Problem, cpu_number: int, memory_share: float = MEMORY_BUDGET_SHARE,
+                  keep_outputs: bool = False) -> None:
     """
     Runs all the solutions in the given problem using the specified number of CPUs.
 
     Args:
         problem_obj: The problem object containing the solutions to run.
         cpu_number: The number of CPUs to use.
+        memory_share: The share of the available RAM that running tests may commit.
+        keep_outputs: Whether to keep the outputs of every test or only the
+            outputs of failing or unexpected tests.
 
     """
+    retention_budget: int = OUTPUT_RETENTION_MB * 2**20
     solutions = problem_obj.get_list_solution()
     for i in solutions:
         solution: Solution = i
         running: str = f'Running {solution.solution_name}'
         info_log(running)
-        run(problem_obj, solution, cpu_number)
+        run(problem_obj, solution, cpu_number, memory_share)
         solution_status(problem_obj, solution)
+        if not keep_outputs:
+            retention_budget -= prune_outputs(problem_obj, solution, retention_budget)
+
+
+def prune_outputs(problem_obj: Problem, solution: Solution, size_cap: int) -> int:
+    """
+    Removes the outputs of a solution, keeping only the outputs of failing
+    tests while they fit in the given size. Outputs of tests with an
+    unexpected status are kept first.
+
+    Args:
+        problem_obj: The problem object.
+        solution: The judged solution.
+        size_cap: The maximum size in bytes of the outputs to keep.
+
+    Returns:
+        The size in bytes of the outputs kept.
+    """
+    input_files = get_input_files(problem_obj.input_folder)
+    expected = EXPECTED_STATUS[solution.expected_result]
+    failing = [(test.status in expected, i) for i, test in solution.tests.items()
+               if test.status != Status.AC]
+    kept: set = set()
+    kept_size = 0
+    for _, i in sorted(failing):
+        output_file = os.path.join(solution.output_path, input_files[i])
+        size = os.path.getsize(output_file) if os.path.isfile(output_file) else 0
+        if kept_size + size <= size_cap:
+            kept.add(input_files[i])
+            kept_size += size
+
+    for f in os.listdir(solution.output_path):
+        if f not in kept:
+            os.remove(os.path.join(solution.output_path, f))
+    return kept_size
+
+
+def checker_process_count(n_threads: int) -> int:
+    """
+    Computes how many checker processes run next to the timed runs, using
+    only the cores the timed runs leave free.
+
+    Args:
+        n_threads: The number of timed runs at the same time.
+
+    Returns:
+        The number of checker processes, at least 1.
+    """
+    available_cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    return max(1, min(n_threads, available_cpus - n_threads))
 
 
-def create_processes(problem_obj: Problem, solution: Solution, cpu_number: int) -> None:
+def create_processes(problem_obj: Problem, solution: Solution, cpu_number: int, memory_share: float = MEMORY_BUDGET_SHARE) -> None:
     """
     Creates and starts multiple processes to run a given solution with multiple input files.
 
@@ -162,28 +629,56 @@ def create_processes(problem_obj: Problem, solution: Solution, cpu_number: int)
         problem_obj: A Problem object representing the problem being solved.
         solution: A Solution object representing the solution being tested.
         cpu_number: An integer representing the maximum number of CPUs to use for running the solution.
+        memory_share: The share of the available RAM that running tests may commit.
 
     """
     n_threads = process_cpu_number(solution.expected_result, cpu_number)
-    input_files = [f for f in os.listdir(
-        problem_obj.input_folder) if os.path.isfile(os.path.join(problem_obj.input_folder, f))]
-    input_files.sort(key=custom_key)
+    memory_limit: int = problem_obj.memory_limit + solution.vm_memory_usage
+    memory_budget = MemoryBudget(available_memory_budget(memory_share))
+    admitted_jobs = max(1, int(memory_budget.budget // memory_limit))
+    if admitted_jobs < n_threads:
+        warning_log(f'Memory budget allows only {admitted_jobs} of {n_threads} '
+                    f'parallel runs of {solution.solution_name}.')
+    input_files = get_input_files(problem_obj.input_folder)
+    # Processes started before judging, such as the PDF build, do not judge
+    # the solution, so their load is contention
+    external_pids = [child.pid for child in psutil.Process().children()]
+    baseline = cpu_usage_sample(os.getpid(), external_pids)
     with Manager() as manager:
         pids: Queue = Queue(maxsize=100)
         stop_monitor: Event = manager.Event()
         output_dict: DictProxy = manager.dict()
-        memory_limit: int = problem_obj.memory_limit + solution.vm_memory_usage
+        checker_queue: Queue = Queue()
         monitor_process = Process(target=memory_monitor, args=(
             pids, memory_limit, stop_monitor))
         monitor_process.start()
 
+        worker_limit = WorkerLimit(n_threads)
+        controller = Process(target=adapt_worker_count, args=(
+            worker_limit, n_threads, stop_monitor, os.getpid(), external_pids, baseline))
+        if n_threads > 1:
+            controller.start()
+
+        checkers = [Process(target=check_outputs, args=(problem_obj, checker_queue, output_dict))
+                    for _ in range(checker_process_count(n_threads))]
+        for checker in checkers:
+            checker.start()
         processes = [Process(target=run_binary, args=(problem_obj, solution, input_files,
-                             output_dict, pids, n_threads, idx)) for idx in range(n_threads)]
+                             output_dict, pids, n_threads, idx, memory_budget, checker_queue, worker_limit))
+                     for idx in range(n_threads)]
         for process in processes:
             process.start()
         for process in processes:
             process.join()
+        for _ in checkers:
+            checker_queue.put(None)
+        for checker in checkers:
+            checker.join()
         stop_monitor.set()
+        if n_threads > 1:
+            controller.join()
+        solution.workers_used = memory_budget.average_running
+        debug_log(f'Workers used: {solution.workers_used:.1f} of {n_threads}')
         processes = Process(target=write_to_log, args=(output_dict,))
         processes.start()
         monitor_process.join()
@@ -245,22 +740,10 @@ def solution_status(problem: Problem, solution: Solution) -> None:
             ac_count = 0
     statistics: Statistic = Statistic(
         ac_count, max_runtime, max_memory_usage)
-    expected_status = {
-        "main-ac": [Status.AC],
-        "alternative-ac": [Status.AC],
-        'wrong-answer': [Status.WA],
-        'time-limit': [Status.HARD_TLE, Status.SOFT_TLE],
-        'time-limit-or-ac': [Status.AC, Status.SOFT_TLE, Status.HARD_TLE],
-        "time-limit-or-memory-limit": [Status.SOFT_TLE, Status.HARD_TLE, Status.MLE],
-        'runtime-error': [Status.RE],
-        'memory-limit': [Status.MLE],
-        'presentation-error': [Status.PE]
-    }
-
     for result_status, _ in test_cases_status.items():
-        if result_status in expected_status[solution.expected_result]:
+        if result_status in EXPECTED_STATUS[solution.expected_result]:
             solution_result = ProblemAnswer.CORRECT
-        elif result_status not in expected_status[solution.expected_result] and result_status != Status.AC:
+        elif result_status not in EXPECTED_STATUS[solution.expected_result] and result_status != Status.AC:
             solution_result = ProblemAnswer.WRONG
             break
     solution.solution_status = solution_result
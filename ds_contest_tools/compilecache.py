@@ -0,0 +1,180 @@
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+
+from .config import C_COMPILER, COMPILE_CACHE_DIR, CPP_COMPILER
+from .logger import debug_log, info_log
+
+INCLUDE_PATTERN = re.compile(rb'^\s*#\s*include\s*"([^"]+)"', re.MULTILINE)
+# Folder of the Makefile where build products are written
+BUILD_DIR = 'bin'
+
+
+def file_digest(path: str, visited: set = None) -> str:
+    """Hash a source file together with the local headers it includes.
+
+    Args:
+        path: Path to the source file.
+        visited: Headers already hashed, to stop on include cycles.
+
+    Returns:
+        The hexadecimal SHA-1 digest.
+    """
+    if visited is None:
+        visited = set()
+    visited.add(os.path.abspath(path))
+    with open(path, 'rb') as f:
+        content = f.read()
+    digest = hashlib.sha1(content)
+    for header in INCLUDE_PATTERN.findall(content):
+        header_path = os.path.join(os.path.dirname(path), header.decode())
+        if os.path.isfile(header_path) and os.path.abspath(header_path) not in visited:
+            digest.update(file_digest(header_path, visited).encode())
+    return digest.hexdigest()
+
+
+def is_build_product(arg: str) -> bool:
+    """Check if a command line argument is a file produced by the build.
+
+    Args:
+        arg: An argument of a compile command.
+    """
+    if arg.startswith('-'):
+        return False
+    return arg.endswith('.o') or os.path.normpath(arg).split(os.sep)[0] == BUILD_DIR
+
+
+def parse_compile_command(line: str, compiler_version: bytes) -> tuple:
+    """Extract the target and the cache key of a compile command.
+
+    The key is computed from the compiler version, the flags and the
+    contents of the input files, so it does not depend on the problem path.
+    Force-included precompiled headers are left out, as they are derived
+    from testlib.h and the flags. Commands that take build products as
+    inputs, such as links of compiled objects, are not cacheable: their
+    inputs may be stale until make rebuilds them, so the key would not
+    match the linked binary.
+
+    Args:
+        line: A command printed by 'make -n'.
+        compiler_version: The version information of the compiler.
+
+    Returns:
+        A tuple (target, key), or None if the line is not a cacheable
+        compile command.
+    """
+    args = line.split()
+    if not args or args[0] not in [CPP_COMPILER, C_COMPILER] or '-o' not in args:
+        return None
+    if '-x' in args:
+        return None
+
+    digest = hashlib.sha1(compiler_version)
+    digest.update(args[0].encode() + b'\0')
+    target = ''
+    i = 1
+    while i < len(args):
+        if args[i] == '-o':
+            target = args[i + 1]
+            i += 2
+            continue
+        if args[i] == '-include':
+            i += 2
+            continue
+        if is_build_product(args[i]):
+            return None
+        if os.path.isfile(args[i]):
+            digest.update(file_digest(args[i]).encode())
+        elif args[i].startswith('-'):
+            digest.update(args[i].encode())
+        else:
+            return None
+        digest.update(b'\0')
+        i += 1
+    return target, digest.hexdigest()
+
+
+def get_compile_targets(make_command: list, compiler_version: bytes) -> dict:
+    """Get the cache key of every binary the Makefile would compile.
+
+    Args:
+        make_command: The make command used to build the problem.
+        compiler_version: The version information of the compiler.
+
+    Returns:
+        A dictionary mapping each target path to its cache key.
+    """
+    p = subprocess.run(make_command + ['-n', '-B'],
+                       stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if p.returncode:
+        debug_log(p.stderr)
+        return {}
+    targets = {}
+    for line in p.stdout.splitlines():
+        parsed = parse_compile_command(line, compiler_version)
+        if parsed is not None:
+            targets[parsed[0]] = parsed[1]
+    return targets
+
+
+def cache_path(key: str) -> str:
+    """Return the path of a cache entry.
+
+    Args:
+        key: The cache key.
+    """
+    return os.path.join(COMPILE_CACHE_DIR, key[:2], key)
+
+
+def link_file(src: str, dest: str) -> None:
+    """Hardlink a file, copying it when both paths are on different file
+    systems. The destination is replaced atomically.
+
+    Args:
+        src: Path to the existing file.
+        dest: Path of the new link.
+    """
+    tmp_dest = f'{dest}.{os.getpid()}'
+    try:
+        os.link(src, tmp_dest)
+    except OSError:
+        shutil.copy2(src, tmp_dest)
+    os.replace(tmp_dest, dest)
+
+
+def restore_from_cache(targets: dict) -> None:
+    """Link cached binaries to the missing targets.
+
+    Args:
+        targets: Dictionary mapping each target path to its cache key.
+    """
+    restored = 0
+    for target, key in targets.items():
+        if os.path.exists(target) or not os.path.isfile(cache_path(key)):
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        link_file(cache_path(key), target)
+        # Make the target newer than its sources, so make skips it
+        os.utime(target)
+        restored += 1
+    if restored:
+        info_log(f"Reused {restored} executables from the compile cache")
+
+
+def store_in_cache(targets: dict) -> None:
+    """Add the compiled targets to the cache.
+
+    Args:
+        targets: Dictionary mapping each target path to its cache key.
+    """
+    for target, key in targets.items():
+        entry = cache_path(key)
+        if not os.path.isfile(target) or os.path.isfile(entry):
+            continue
+        try:
+            os.makedirs(os.path.dirname(entry), exist_ok=True)
+            link_file(target, entry)
+        except OSError as e:
+            debug_log(f'Could not store {target} in the compile cache: {e}')
@@ -10,15 +10,80 @@ IGNORED_DIRS = [
     'boca', 'assets'
 ]
 
+""" Temporary output definitions """
+# Run directories are named after the PID of the tool, followed by a timestamp
+TMP_OUTPUT_PREFIX = 'ds-contest-tools-run-'
+# Prefix of the folders where LaTeX jobs are compiled
+TMP_PDF_PREFIX = 'ds-contest-tools-pdf-'
+TMP_OUTPUT_ROOTS = ['/tmp', '/dev/shm']
+TMPFS_OUTPUT_ROOT = '/dev/shm'
+# Run directories older than this are removed on startup, unless their run is alive
+TMP_OUTPUT_RETENTION_DAYS = 1
+# Maximum size of the solution outputs kept after judging
+OUTPUT_RETENTION_MB = 256
+
+""" Judging definitions """
+# Share of the available RAM that running solutions may commit at once
+MEMORY_BUDGET_SHARE = 0.8
+# Maximum time in seconds the checker may take on a single test
+CHECKER_TIMEOUT = 30
+# Niceness of the checker processes, so they yield the CPU to timed runs
+CHECKER_NICENESS = 10
+# Interval in seconds between host contention probes while judging
+CONTENTION_PROBE_INTERVAL = 2.0
+# Cores other processes may use beyond the free ones before timed runs yield
+CONTENTION_MARGIN = 0.5
+
+""" Build definitions """
+C_COMPILER = 'gcc'
+CPP_COMPILER = 'g++'
+# Directory shared by builds of all problems, such as precompiled headers
+CACHE_DIR = os.environ.get('DS_CONTEST_TOOLS_CACHE', os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'ds-contest-tools'))
+# Compiled executables indexed by their sources, flags and compiler version.
+# It can be a shared directory, so several machines reuse the same binaries.
+COMPILE_CACHE_DIR = os.environ.get(
+    'DS_CONTEST_TOOLS_COMPILE_CACHE', os.path.join(CACHE_DIR, 'build'))
+# Statement PDFs indexed by their LaTeX sources, class and resources
+PDF_CACHE_DIR = os.path.join(CACHE_DIR, 'pdf')
+# Precompiled LaTeX formats indexed by the preamble and the class they load
+LATEX_FORMAT_DIR = os.path.join(CACHE_DIR, 'latex-formats')
+# Maximum time in seconds to dump a LaTeX format
+LATEX_FORMAT_DUMP_TIMEOUT = 30
+# Time in seconds before a preamble whose format failed is tried again
+LATEX_FORMAT_RETRY_TIME = 24 * 60 * 60
+
 """ Java definitions """
 JAVA_INTERPRETER = 'java'
 JAVA_FLAG = '-classpath'
 JAVA_VM_TEST_FILE = 'VmMemoryTest'
 JAVA_VM_MEMORY_TEST_FOLDER = os.path.join(
     os.path.dirname(__file__), 'files/assets')
+# Compiles all Java sources of a build in a single JVM
+JAVA_BATCH_COMPILER_PATH = os.path.join(
+    os.path.dirname(__file__), 'files/assets/BatchJavac.java')
+# Class Data Sharing archives, dumped at build time and used on every run
+JAVA_CDS_DUMP_FLAG = '-XX:ArchiveClassesAtExit'
+JAVA_CDS_FLAG = '-XX:SharedArchiveFile'
+JAVA_CDS_DUMP_TIMEOUT = 10
+# Memory baselines of the interpreters, measured once per interpreter and flags
+VM_MEMORY_CACHE_PATH = os.path.join(CACHE_DIR, 'vm-memory.json')
+# Multiplier of the time limit of Java solutions in BOCA
+JAVA_TIME_FACTOR = 3
+# Deflate level of BOCA packages, from 0 (stored) to 9
+BOCA_COMPRESSION_LEVEL = 6
+# Timestamp of the files of BOCA packages, unless SOURCE_DATE_EPOCH is set
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
 
 """ Python3 definitions """
 PYTHON3_INTERPRETER = 'python3'
+# Solutions run without environment variables and user site-packages, but
+# keep the installed packages. Grader runs keep the script folder in
+# sys.path, as the grader imports the solution from it
+PYTHON_RUN_FLAGS = ['-I']
+PYTHON_GRADER_RUN_FLAGS = ['-E', '-s']
+# Multiplier of the time limit of Python solutions in BOCA, by interpreter
+PYTHON_TIME_FACTORS = {'python3': 3, 'pypy3': 2}
 PYTHON_VM_MEMORY_TEST_FILE_PATH = os.path.join(
     os.path.dirname(__file__), 'files/assets/vm_memory_test.py')
 
@@ -1,18 +1,60 @@
+import io
+import logging
+import multiprocessing
 import os
 import shutil
-import subprocess
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import redirect_stdout
 
 from .boca import boca_pack
-from .latexutils import clean_auxiliary_files
-from .logger import info_log
+from .config import BOCA_COMPRESSION_LEVEL, MEMORY_BUDGET_SHARE
+from .fileutils import export_directory, export_file
+from .latexutils import print_contest_to_latex
+from .logger import debug_log, error_log, info_log, warning_log
 from .metadata import Paths
-from .pdfutils import build_pdf, merge_pdfs
-from .utils import check_subprocess_output, convert_idx_to_string, verify_path
+from .pdfutils import build_pdf, generate_pdfs, merge_pdfs
+from .toolchain import build_executables, run_programs
+from .utils import convert_idx_to_string, use_problem_paths, verify_path
 
 
-def build_contest_pdf(author: bool = False) -> None:
-    """Build contest PDF from PDFs of the list of problems."""
+def run_parallel(function, args_list: list, jobs: int) -> list:
+    """Run a function for each tuple of arguments in a pool of processes
+    forked from the current one, so the tool is not imported again.
+
+    Each problem changes the working directory and the paths of the
+    process, so problems are never handled by threads of the same process.
+
+    Args:
+        function: The function to be run.
+        args_list: The list of argument tuples.
+        jobs: The maximum number of processes running at the same time.
+
+    Returns:
+        The list of results, in the order of the arguments.
+    """
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=max(jobs, 1), mp_context=context) as executor:
+        futures = [executor.submit(function, *args) for args in args_list]
+        try:
+            return [future.result() for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+
+def build_contest_pdf(author: bool = False, single_document: bool = False) -> None:
+    """Build contest PDF from PDFs of the list of problems.
+
+    Args:
+        author: Whether to add the author name to the PDFs.
+        single_document: Whether to compile all problems as a single document
+            instead of merging the PDF of each problem.
+    """
     info_log('Creating contest PDF')
+    if single_document:
+        build_contest_document(author)
+        return
 
     problem_pdf_l = []
     tutorial_pdf_l = []
@@ -22,20 +64,22 @@ def build_contest_pdf(author: bool = False) -> None:
     cls_file = os.path.join(os.path.join(os.path.dirname(
         os.path.abspath(__file__)), 'files'), 'maratona.cls')
     shutil.copy(cls_file, output_folder)
-    # Generate problems PDFs
-    for i, folder in enumerate(problem_folder_l):
-        label = convert_idx_to_string(i)
-        options = {'display_author': author,
-                   'problem_label': label,
-                   'event': True}
-        build_pdf(folder, output_folder, options)
+    # Generate problems PDFs at the same time
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = [executor.submit(build_pdf, folder, output_folder,
+                                   {'display_author': author,
+                                    'problem_label': convert_idx_to_string(i),
+                                    'event': True})
+                   for i, folder in enumerate(problem_folder_l)]
+        for future in futures:
+            future.result()
+    for folder in problem_folder_l:
         basename = os.path.basename(folder)
         problem_pdf_l.append(os.path.join(output_folder, basename+'.pdf'))
         if os.path.exists(os.path.join(folder, basename+'-tutorial.pdf')):
             tutorial_pdf_l.append(os.path.join(
                 output_folder, basename+'-tutorial.pdf'))
     # Merge PDFs
-    clean_auxiliary_files(output_folder)
     merge_pdf = os.path.join(output_folder, 'maratona.pdf')
     merge_tutorial_pdf = os.path.join(output_folder, 'tutoriais.pdf')
     merge_pdfs(problem_pdf_l, merge_pdf)
@@ -55,27 +99,70 @@ def build_contest_pdf(author: bool = False) -> None:
         os.remove(os.path.join(output_folder, 'maratona.cls'))
 
 
-def build_boca_packages(author: bool = False) -> None:
-    """Build BOCA packages from the list of problems."""
+def build_contest_document(author: bool = False) -> None:
+    """Build the contest and tutorial PDFs, each one from a single document
+    with the statements of all problems.
+
+    Args:
+        author: Whether to add the author name to the PDFs.
+    """
+    problem_folder_l = Paths().get_problem_dir()
+    output_folder = Paths().get_output_dir()
+
+    cls_file = os.path.join(os.path.join(os.path.dirname(
+        os.path.abspath(__file__)), 'files'), 'maratona.cls')
+    shutil.copy(cls_file, output_folder)
+    tex_paths = print_contest_to_latex(problem_folder_l, output_folder, author)
+    generate_pdfs(output_folder, output_folder, tex_paths, problem_folder_l)
+    for tex_path in tex_paths:
+        os.remove(tex_path)
+    if output_folder not in problem_folder_l:
+        os.remove(os.path.join(output_folder, 'maratona.cls'))
+
+
+def build_boca_package(folder: str, label: str, output_folder: str, author: bool,
+                       compression_level: int = BOCA_COMPRESSION_LEVEL) -> None:
+    """Build the BOCA package of a contest problem.
+
+    Args:
+        folder: Path to the problem folder.
+        label: Label of the problem in the contest.
+        output_folder: Path to the contest folder.
+        author: Whether to add the author name to the PDF.
+        compression_level: Deflate level of the package.
+    """
+    options = {'display_author': author,
+               'problem_label': label,
+               'event': True}
+    # Update PDF with new label and event
+    build_pdf(folder, folder, options)
+    boca_pack(folder, folder, compression_level)
+    boca_file_path = os.path.join(folder, 'boca.zip')
+    boca_file = os.path.join(
+        output_folder, os.path.basename(folder) + '-boca.zip')
+    export_file(boca_file_path, boca_file)
+
+
+def build_boca_packages(author: bool = False, jobs: int = 1,
+                        compression_level: int = BOCA_COMPRESSION_LEVEL) -> None:
+    """Build BOCA packages from the list of problems.
+
+    Args:
+        author: Whether to add the author name to the PDFs.
+        jobs: The number of problems packed at the same time.
+        compression_level: Deflate level of the packages.
+    """
     info_log('Creating BOCA Files')
     problem_folder_l = Paths().get_problem_dir()
     output_folder = Paths().get_output_dir()
-    for i, folder in enumerate(problem_folder_l):
-        label = convert_idx_to_string(i)
-        options = {'display_author': author,
-                   'problem_label': label,
-                   'event': True}
-        # Update PDF with new label and event
-        build_pdf(folder, folder, options)
-        boca_pack(folder, folder)
-        boca_file_path = os.path.join(folder, 'boca.zip')
-        boca_file = os.path.join(
-            output_folder, os.path.basename(folder) + '-boca.zip')
-        shutil.copy(boca_file_path, boca_file)
+    args_list = [(folder, convert_idx_to_string(i), output_folder, author, compression_level)
+                 for i, folder in enumerate(problem_folder_l)]
+    run_parallel(build_boca_package, args_list, jobs)
 
 
 def build_input_output() -> None:
-    """Copy problem input and output to the output folder."""
+    """Export problem input and output to the output folder. Tests are
+    hardlinked when the folders share a file system."""
     problems_dir: list = Paths().get_problem_dir()
     output_dir: str = Paths().get_output_dir()
     for problem in problems_dir:
@@ -85,27 +172,24 @@ def build_input_output() -> None:
         test_path_input = os.path.join(test_path, 'input')
         test_path_output = os.path.join(test_path, 'output')
         os.makedirs(test_path, exist_ok=True)
-        os.makedirs(test_path_input, exist_ok=True)
-        os.makedirs(test_path_output, exist_ok=True)
-        shutil.copytree(os.path.join(problem, 'input'),
-                        test_path_input, dirs_exist_ok=True)
-        shutil.copytree(os.path.join(problem, 'output'),
-                        test_path_output, dirs_exist_ok=True)
+        export_directory(os.path.join(problem, 'input'), test_path_input)
+        export_directory(os.path.join(problem, 'output'), test_path_output)
 
 
-def verify_problem(problem: str) -> None:
+def verify_problem(problem: str) -> bool:
     """Check if the problem has the necessary files to create a BOCA package.
-    If not, build the problem.
     
     Args:
         problem: Path to the problem folder.
+
+    Returns:
+        True if the problem must be built, False otherwise.
     """
     verify_path(os.path.join(problem, 'statement'))
 
     input_dir = os.path.join(problem, 'input')
     output_dir = os.path.join(problem, 'output')
     checker_path = os.path.join(problem, 'bin', 'checker-boca')
-    tool_directory = os.path.dirname(os.path.abspath(__file__))
 
     problem_name = os.path.basename(problem)
     if not os.path.exists(input_dir):
@@ -115,10 +199,80 @@ def verify_problem(problem: str) -> None:
     elif not os.path.exists(checker_path):
         info_log(f"BOCA checker not found. Building {problem_name} problem.")
     else:
-        return
+        return False
+    return True
+
+
+def build_problem(problem: str, tmp_output_dir: str, cpu_number: int, memory_share: float) -> tuple:
+    """Build a problem with its main solution in the current process.
 
-    command = ['python3', '-m',
-               'ds_contest_tools.ds_contest_tools', 'build', problem]
-    p = subprocess.run(
-        command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=os.path.dirname(tool_directory))
-    check_subprocess_output(p, f"Error building problem {problem_name}.")
+    The messages of the build are captured together with its debug log,
+    which holds the diagnostics of the compilers, validators and checkers,
+    since several problems are built at the same time.
+
+    Args:
+        problem: Path to the problem folder.
+        tmp_output_dir: The temporary output directory of the build.
+        cpu_number: The number of CPUs given to the problem.
+        memory_share: The share of the available RAM given to the problem.
+
+    Returns:
+        A tuple containing whether the build succeeded, its messages and
+        diagnostics, and its warnings.
+    """
+    output = io.StringIO()
+    warnings = io.StringIO()
+    with redirect_stdout(output):
+        try:
+            use_problem_paths(problem, tmp_output_dir)
+            logging.getLogger('debug').addHandler(logging.StreamHandler(output))
+            warning_handler = logging.StreamHandler(warnings)
+            warning_handler.setLevel(logging.WARNING)
+            logging.getLogger('tool').addHandler(warning_handler)
+            info_log(f'Building problem {os.path.basename(problem)}')
+            build_executables()
+            run_programs(cpu_number=cpu_number, memory_share=memory_share, pdf=True)
+            info_log(f'Problem {os.path.basename(problem)} built successfully')
+        except SystemExit:
+            return False, output.getvalue(), warnings.getvalue()
+    return True, output.getvalue(), warnings.getvalue()
+
+
+def build_problems(problems: list, cpu_number: int, jobs: int = 0, memory_share: float = MEMORY_BUDGET_SHARE) -> None:
+    """Build the problems that are not ready to be packed.
+
+    The problems are built at the same time and share the CPUs and the
+    memory budget, so the contest takes about as long as its slowest problem.
+
+    Args:
+        problems: The list of problem folders.
+        cpu_number: The number of CPUs shared by all problems.
+        jobs: The number of problems built at the same time. If 0, as many as
+            the CPUs allow.
+        memory_share: The share of the available RAM shared by all problems.
+    """
+    problems = [problem for problem in problems if verify_problem(problem)]
+    if not problems:
+        return
+    if jobs <= 0:
+        jobs = cpu_number
+    jobs = max(min(jobs, len(problems)), 1)
+    problem_cpus = max(cpu_number // jobs, 1)
+    tmp_output_root = Paths().get_tmp_output_dir()
+    args_list = [(problem, os.path.join(tmp_output_root, f'{i}-{os.path.basename(problem)}'),
+                  problem_cpus, memory_share / jobs)
+                 for i, problem in enumerate(problems)]
+    results = run_parallel(build_problem, args_list, jobs)
+    errors = []
+    for problem, (built, output, warnings) in zip(problems, results):
+        debug_log(output)
+        problem_name = os.path.basename(problem)
+        log_path = os.path.join(problem, 'debug.log')
+        if not built:
+            errors.append(f"Error building problem {problem_name}:\n{output.rstrip()}\n"
+                          f"The full log is in {log_path}.")
+        elif warnings:
+            warning_log(f"Problem {problem_name} built with warnings:\n{warnings.rstrip()}\n"
+                        f"The full log is in {log_path}.")
+    if errors:
+        error_log('\n\n'.join(errors))
@@ -2,34 +2,69 @@
 # PYTHON_ARGCOMPLETE_OK
 
 import argparse
+import os
+from importlib import import_module
 from sys import argv
 
-from .parsers import build, clean, contest, convert, init, set_keys
+# Parser module of each command, in the order they are listed in the help
+COMMAND_MODULES = {
+    'init': 'init',
+    'build': 'build',
+    'contest': 'contest',
+    'convert_to': 'convert',
+    'convert_from': 'convert',
+    'set_keys': 'set_keys',
+    'clean': 'clean',
+}
 
 
 def add_argcomplete(parser: argparse.ArgumentParser):
     """Add autocomplete to the parser.
 
+    Completion is registered once in the shell with
+    'eval "$(register-python-argcomplete dscontest)"', which makes the shell
+    call the tool with _ARGCOMPLETE set.
+
     Args:
         parser: The parser object.
-
-    Returns:
-        The parser object.
     """
+    if '_ARGCOMPLETE' not in os.environ:
+        return
     try:
-        import subprocess
-
         import argcomplete
-        command = ["eval", '"$(register-python-argcomplete)"', __file__]
-        subprocess.run(command, shell=True)
         argcomplete.autocomplete(parser)
-    except:
+    except ImportError:
         pass
 
 
-def create_parser() -> argparse.ArgumentParser:
+def get_parser_modules(args: list = None) -> list:
+    """Import the parser modules needed to parse the arguments.
+
+    Only the module of the chosen command is imported, since parser modules
+    import the modules that implement their commands. All of them are
+    imported to show the help or to complete a command.
+
+    Args:
+        args: The command line arguments, without the program name.
+
+    Returns:
+        The list of parser modules.
+    """
+    command = next((arg for arg in args or [] if not arg.startswith('-')), None)
+    if args is None or '_ARGCOMPLETE' in os.environ or command not in COMMAND_MODULES:
+        module_names = list(dict.fromkeys(COMMAND_MODULES.values()))
+    else:
+        module_names = [COMMAND_MODULES[command]]
+    return [import_module(f'.parsers.{name}', __package__) for name in module_names]
+
+
+def create_parser(args: list = None) -> argparse.ArgumentParser:
     """Create a CLI parser of the tool.
 
+    Args:
+        args: The command line arguments, without the program name. If
+            given, only the parser of the chosen command is added.
+
     Returns:
         The parser object.
     """
@@ -41,18 +76,14 @@ def create_parser() -> argparse.ArgumentParser:
         metavar="COMMAND",
         required=True
     )
-    init.add_parser(subparsers)
-    build.add_parser(subparsers)
-    contest.add_parser(subparsers)
-    convert.add_parser(subparsers)
-    set_keys.add_parser(subparsers)
-    clean.add_parser(subparsers)
+    for module in get_parser_modules(args):
+        module.add_parser(subparsers)
     add_argcomplete(parser)
     return parser
 
 
 def main():
-    parser = create_parser()
+    parser = create_parser(argv[1:])
     options = parser.parse_args(argv[1:])
     options.function(options)
 
@@ -0,0 +1,43 @@
+import java.io.File;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.List;
+
+import javax.tools.JavaCompiler;
+import javax.tools.StandardJavaFileManager;
+import javax.tools.ToolProvider;
+
+// Compiles several Java sources in a single JVM, each one into its own
+// folder, so classes with the same name in different sources do not collide.
+// Usage: java BatchJavac.java <output folder> [javac options] -- <sources>
+class BatchJavac {
+    public static void main(String[] args) throws Exception {
+        int separator = Arrays.asList(args).indexOf("--");
+        if (args.length < 1 || separator < 1) {
+            System.err.println("Usage: BatchJavac <output folder> [javac options] -- <sources>");
+            System.exit(2);
+        }
+        File outputFolder = new File(args[0]);
+        List<String> options = Arrays.asList(args).subList(1, separator);
+
+        JavaCompiler compiler = ToolProvider.getSystemJavaCompiler();
+        int failed = 0;
+        try (StandardJavaFileManager fileManager = compiler.getStandardFileManager(null, null, null)) {
+            for (String source : Arrays.asList(args).subList(separator + 1, args.length)) {
+                String name = new File(source).getName().replaceFirst("\\.java$", "");
+                File classFolder = new File(outputFolder, name);
+                classFolder.mkdirs();
+
+                List<String> sourceOptions = new ArrayList<>(options);
+                sourceOptions.add("-d");
+                sourceOptions.add(classFolder.getPath());
+                boolean compiled = compiler.getTask(null, fileManager, null, sourceOptions, null,
+                        fileManager.getJavaFileObjects(source)).call();
+                if (!compiled) {
+                    failed++;
+                }
+            }
+        }
+        System.exit(failed == 0 ? 0 : 1);
+    }
+}
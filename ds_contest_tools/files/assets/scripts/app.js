@@ -64,9 +64,14 @@ inputLink.textContent = testUrl;
 // Select an anchor element inside an HTML element, update its href 
 // attribute with the value of a variable, and update its content with 
 // the value of a variable
-const outputLink = document.querySelector('#output a');
-outputLink.href = outputUrl;
-outputLink.textContent = testUrl;
+// The outputs of accepted tests are pruned unless --keep-outputs is used
+if (outputUrl) {
+    const outputLink = document.querySelector('#output a');
+    outputLink.href = outputUrl;
+    outputLink.textContent = testUrl;
+} else {
+    document.getElementById('output').textContent = 'Pruned (use --keep-outputs to keep it)';
+}
 
 // Select an anchor element inside an HTML element, update its href 
 // attribute with the value of a variable, and update its content with 
@@ -1,12 +1,17 @@
+import ctypes
+import mmap
 import os
 import shutil
 import zipfile
 from math import floor, log10
 from typing import Optional
 
-from .jsonutils import parse_json
-from .logger import error_log
-from .utils import verify_path
+import psutil
+
+from .logger import error_log, info_log, warning_log
+from .utils import load_problem_config, verify_path
+
+PREWARM_CHUNK_SIZE = 1 << 20
 
 
 def rename_io(io_folder: str) -> None:
@@ -28,6 +33,27 @@ def rename_io(io_folder: str) -> None:
             os.rename(src, dst)
 
 
+def get_padded_io_files(io_folder: str) -> list:
+    """Get the files in the given directory with the names given by
+    'rename_io', without renaming them.
+
+    Args:
+        io_folder: The path of the directory.
+
+    Returns:
+        A list of tuples (path, padded name), sorted by padded name.
+    """
+    if not os.path.isdir(io_folder):
+        return []
+    files = [f for f in os.listdir(io_folder)
+             if os.path.isfile(os.path.join(io_folder, f))]
+    if not files:
+        return []
+    zeros = floor(log10(len(files))) + 1
+    return sorted(((os.path.join(io_folder, f), f.zfill(zeros)) for f in files),
+                  key=lambda io_file: io_file[1])
+
+
 def recursive_overwrite(src: str, dest: str, ignore=None) -> None:
     """Recursively creates folders to 'dest' path and copies files 
     from 'src' to 'dest'.
@@ -80,6 +106,64 @@ def copy_directory(source: str, dest: str) -> None:
                                 os.path.join(dest_path, file))
 
 
+def copy_file_data(src: str, dest: str) -> None:
+    """Copy the contents of a file inside the kernel, with copy_file_range,
+    falling back to a regular copy.
+
+    Args:
+        src: The path to the source file.
+        dest: The path to the new file.
+    """
+    with open(src, 'rb') as f_src, open(dest, 'wb') as f_dest:
+        if hasattr(os, 'copy_file_range'):
+            try:
+                size = os.fstat(f_src.fileno()).st_size
+                while os.copy_file_range(f_src.fileno(), f_dest.fileno(), size):
+                    pass
+                return
+            except OSError:
+                f_src.seek(0)
+                f_dest.seek(0)
+                f_dest.truncate()
+        shutil.copyfileobj(f_src, f_dest)
+
+
+def export_file(src: str, dest: str) -> None:
+    """Export a file by hardlinking it, so no data is copied. Files that
+    cannot be linked, such as those on other file systems, are copied with
+    their permissions and timestamps. The destination is replaced atomically.
+
+    Args:
+        src: The path to the source file.
+        dest: The path to the exported file.
+    """
+    # Renaming a link over the same file does nothing, so it is left as is
+    if os.path.exists(dest) and os.path.samefile(src, dest):
+        return
+    tmp_dest = f'{dest}.{os.getpid()}'
+    try:
+        os.link(src, tmp_dest)
+    except OSError:
+        copy_file_data(src, tmp_dest)
+        shutil.copystat(src, tmp_dest)
+    os.replace(tmp_dest, dest)
+
+
+def export_directory(source: str, dest: str) -> None:
+    """Recursively export the files from the source directory to the
+    destination directory with 'export_file', overwriting existing files.
+
+    Args:
+        source: The path to the source directory.
+        dest: The path to the destination directory.
+    """
+    for root, _, files in os.walk(source):
+        dest_path = os.path.join(dest, os.path.relpath(root, source))
+        os.makedirs(dest_path, exist_ok=True)
+        for file in files:
+            export_file(os.path.join(root, file), os.path.join(dest_path, file))
+
+
 def get_statement_files(statement_folder: str, interactive: Optional[bool] = False) -> list:
     """Return list of statement files of the problem.
 
@@ -113,12 +197,7 @@ def check_interactive_problem(problem_dir: str) -> bool:
     Returns:
         True if the problem is interactive, False otherwise.
     """
-    metadata_path = os.path.join(problem_dir, 'problem.json')
-    verify_path(metadata_path)
-    problem_metadata = parse_json(metadata_path)
-    if 'problem' not in problem_metadata or 'interactive' not in problem_metadata['problem']:
-        error_log("Interactive value in problem.json is not defined.")
-    return problem_metadata['problem']['interactive']
+    return load_problem_config(problem_dir).interactive
 
 
 def unzip_package(path: str) -> None:
@@ -132,3 +211,95 @@ def unzip_package(path: str) -> None:
         error_log("Package is not a zip file: {}.".format(path))
     with zipfile.ZipFile(path, 'r') as zip_ref:
         zip_ref.extractall(path.split('.')[0])
+
+
+def list_files(folder: str) -> list:
+    """Return the paths of all regular files inside a folder, recursively.
+
+    Args:
+        folder: The path to the folder.
+
+    Returns:
+        A list with the paths of the files, empty if the folder does not exist.
+    """
+    files = []
+    for root, _, filenames in os.walk(folder):
+        for f in filenames:
+            path = os.path.join(root, f)
+            if os.path.isfile(path):
+                files.append(path)
+    return files
+
+
+def resident_bytes(path: str) -> Optional[int]:
+    """Return how many bytes of a file are in the page cache.
+
+    Args:
+        path: The path to the file.
+
+    Returns:
+        The number of cached bytes, or None if it cannot be determined
+        on this platform.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return 0
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        mincore = libc.mincore
+    except (OSError, AttributeError):
+        return None
+    pages = (size + mmap.PAGESIZE - 1) // mmap.PAGESIZE
+    vec = (ctypes.c_ubyte * pages)()
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), size, access=mmap.ACCESS_COPY) as m:
+        buffer = (ctypes.c_char * size).from_buffer(m)
+        ret = mincore(ctypes.c_void_p(ctypes.addressof(buffer)),
+                      ctypes.c_size_t(size), vec)
+        del buffer
+    if ret != 0:
+        return None
+    return min(size, sum(page & 1 for page in vec) * mmap.PAGESIZE)
+
+
+def prewarm_file(path: str) -> None:
+    """Load a file into the page cache.
+
+    Args:
+        path: The path to the file.
+    """
+    with open(path, 'rb') as f:
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+        while f.read(PREWARM_CHUNK_SIZE):
+            pass
+
+
+def prewarm_problem_files(problem_folder: str) -> None:
+    """Load tests and binaries of the problem into the page cache, so the
+    first timed runs do not pay for disk reads.
+
+    Args:
+        problem_folder: The path to the problem folder.
+    """
+    files = []
+    for folder in ['input', 'output', 'bin']:
+        files += list_files(os.path.join(problem_folder, folder))
+    total_size = sum(os.path.getsize(f) for f in files)
+    available = psutil.virtual_memory().available
+    if total_size > available:
+        warning_log(f"Tests and binaries ({total_size // 2**20} MB) do not fit in "
+                    f"the available RAM ({available // 2**20} MB). Timings may include disk reads.")
+
+    cached = 0
+    for f in files:
+        resident = resident_bytes(f)
+        if resident is None:
+            cached = None
+        elif cached is not None:
+            cached += resident
+        prewarm_file(f)
+
+    message = f"Prewarmed {len(files)} files ({total_size // 2**20} MB)"
+    if cached is not None and total_size > 0:
+        message += f", {100 * cached / total_size:.0f}% were already cached"
+    info_log(message + '.')
@@ -169,7 +169,10 @@ def write_test_cases_tbody(problem_obj: Problem, f_out: io.TextIOWrapper) -> Non
             expected_result: str = set_expected_result(
                 solution.expected_result)
             url_params = f'id={i + 1}&solution={solution.solution_name}&veredict={test_status}&expected-result={expected_result}&time={test_case.exec_time:.2f}&memory={(test_case.memory_usage / 1000):.2f}&checker-output={test_case.checker_output}'
-            url_link_params = f'title={problem_obj.problem_name}&input={os.path.join(problem_obj.input_folder, str(i + 1))}&output={os.path.join(solution.output_path, str(i + 1))}&answer={os.path.join(problem_obj.problem_dir, "output", str(i + 1))}&report-link={os.path.join(problem_obj.problem_dir, REPORT_NAME)}'
+            # Outputs of accepted tests are pruned unless they are kept
+            output_path = os.path.join(solution.output_path, str(i + 1))
+            output_param = f'&output={output_path}' if os.path.isfile(output_path) else ''
+            url_link_params = f'title={problem_obj.problem_name}&input={os.path.join(problem_obj.input_folder, str(i + 1))}{output_param}&answer={os.path.join(problem_obj.problem_dir, "output", str(i + 1))}&report-link={os.path.join(problem_obj.problem_dir, REPORT_NAME)}'
             table_data_info = f'\t<td class="{test_color_class}"><a href="{href_paths[solution.solution_name]}?{url_params}&{url_link_params}" {tooltip_msg}>{test_status} </a> <br>{execution_time:.2f} s / {(memory_usage):.1f} MB </td>'
             f_out.write(table_data_info)
         f_out.write('</tr>')
@@ -276,6 +279,7 @@ def write_auxiliary_table(problem_obj: Problem, f_out: io.TextIOWrapper) -> None
                         <th>Solutions</th>
                         <th>Expected Result</th>
                         <th>Result</th>
+                        <th>Workers</th>
                     </tr>
                 </thead>
                 <tbody>\
@@ -311,6 +315,7 @@ def write_aux_trow(problem_obj: Problem, f_out: io.TextIOWrapper) -> None:
         f_out.write(
             f'\t<td class="bg-white">{set_expected_result(solution.expected_result)}</td>')
         f_out.write(f'\t<td class="{row_color}">{solution_result_symbol}</td>')
+        f_out.write(f'\t<td class="bg-white">{solution.workers_used:.1f}</td>')
         f_out.write('</tr>')
 
 
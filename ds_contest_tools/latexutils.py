@@ -4,9 +4,14 @@ import re
 
 from . import config
 from .fileutils import get_statement_files
-from .jsonutils import parse_json
 from .logger import info_log
-from .utils import check_problem_metadata, verify_path
+from .metadata import ProblemConfig
+from .utils import convert_idx_to_string, load_problem_config, verify_path
+
+
+# Ends the part of the preamble stored in precompiled formats. It does nothing
+# when the document is compiled without a format
+END_OF_DUMP = '\\csname endofdump\\endcsname'
 
 
 def print_line(line: str, f_out: io.TextIOWrapper) -> None:
@@ -36,19 +41,19 @@ def multiple_replace(patterns: dict, text: str) -> str:
     return regex.sub(lambda mo: patterns[mo.string[mo.start():mo.end()]], text)
 
 
-def get_io(io_folder: str, problem_metadata: dict) -> list:
+def get_io(io_folder: str, problem_config: ProblemConfig) -> list:
     """Return input/output examples for the problem from the given folder.
 
     Args:
         io_folder: The path to the directory containing the input/output files.
-        problem_metadata: A dictionary containing metadata about the problem.
+        problem_config: The problem configuration.
 
     Returns:
         A list of input/output examples to be used in the PDF.
     """
     l = []
-    io_samples = problem_metadata["io_samples"]
-    interactive = problem_metadata['problem']['interactive']
+    io_samples = problem_config.io_samples
+    interactive = problem_config.interactive
 
     if interactive:
         io_files = [os.path.join(io_folder, str(f)+'.interactive')
@@ -77,147 +82,158 @@ def print_to_latex(problem_folder: str, options=config.DEFAULT_PDF_OPTIONS):
             - display_author (bool): Whether to include the author's name in the problem description. Default is True.
             - problem_label (str): The label to identify the problem. Default is an empty string.
     """
-    input_folder = os.path.join(problem_folder, 'input')
-    output_folder = os.path.join(problem_folder, 'output')
-    problem_metadata = parse_json(os.path.join(problem_folder, 'problem.json'))
-    check_problem_metadata(problem_metadata)
-
-    statement_folder = os.path.join(problem_folder, 'statement')
-    verify_path(statement_folder)
-
-    interactive = problem_metadata['problem']['interactive']
+    problem_config = load_problem_config(problem_folder)
     tex_filename = os.path.basename(os.path.abspath(problem_folder))+'.tex'
     tex_filepath = os.path.join(problem_folder, tex_filename)
     info_log(f"Creating {os.path.basename(tex_filepath)}")
     with open(tex_filepath, 'w') as f_out:
         print("\\documentclass{maratona}", file=f_out)
         print("\\begin{document}", file=f_out)
-        if options['event']:
-            print("\\lhead{" + problem_metadata['problem']['event'] + "}\n", file=f_out)
-        if (options['display_author']):
-            print("\\begin{ProblemaAutor}{" + options['problem_label']
-                  + "}{" + problem_metadata["problem"]["title"] + "}{" +
-                  str(problem_metadata["problem"]["time_limit"]) +
-                  "}{" +
-                  str(problem_metadata["problem"]["memory_limit_mb"]) +
-                  "}{" + problem_metadata["author"]["name"] + "}\n", file=f_out)
-        else:
-            print("\\begin{Problema}{" + options['problem_label']
-                  + "}{" + problem_metadata["problem"]["title"] + "}{" +
-                  str(problem_metadata["problem"]["time_limit"]) +
-                  "}{" +
-                  str(problem_metadata["problem"]["memory_limit_mb"]) +
-                  "}\n", file=f_out)
-
-        # Get statement information
-        statement_files = get_statement_files(statement_folder, interactive)
-        with open(statement_files[0], 'r') as f:
-            statement_lines = f.readlines()
-        with open(statement_files[1], 'r') as f:
-            input_lines = f.readlines()
-        with open(statement_files[2], 'r') as f:
-            output_lines = f.readlines()
-        with open(statement_files[3], 'r') as f:
-            note_lines = f.readlines()
-        with open(statement_files[4], 'r') as f:
-            tutorial_lines = f.readlines()
-        interactor_lines = []
-        if interactive:
-            with open(statement_files[5], 'r') as f:
-                interactor_lines = f.readlines()
-
-        # Print statement information
-        if (statement_lines):
-            statement_lines[-1] = statement_lines[-1].rstrip()
-            for line in statement_lines:
-                print_line(line, f_out)
-        if (input_lines):
-            print("\n\n\\Entrada\n", file=f_out)
-            input_lines[-1] = input_lines[-1].rstrip()
-            for line in input_lines:
-                print_line(line, f_out)
-        if (output_lines):
-            print("\n\n\\Saida\n", file=f_out)
-            output_lines[-1] = output_lines[-1].rstrip()
-            for line in output_lines:
-                print_line(line, f_out)
-        if (interactive and interactor_lines):
-            print("\n\n\\Interacao\n", file=f_out)
-            for line in interactor_lines:
-                print_line(line, f_out)
-
-        # Print I/O examples
-        in_list = get_io(input_folder, problem_metadata)
-        out_list = get_io(output_folder, problem_metadata)
-        patterns = {"#": "\\#",
-                    "$": "\\$",
-                    "%": "\\%",
-                    "&": "\\&",
-                    "_": "\\_",
-                    "{": "\\{",
-                    "}": "\\}",
-                    ">": "\\textgreater{}",
-                    "<": "\\textless{}",
-                    "^": "\\textasciicircum{}",
-                    "\\": "\\textbackslash{}",
-                    " ": "~"}
-        print("\n\n\\ExemploEntrada", file=f_out)
-        print("\\begin{Exemplo}", file=f_out)
-        for tc in range(0, len(in_list)):
-            tc_input = in_list[tc]
-            tc_output = out_list[tc]
-            max_lines = max(len(tc_input), len(tc_output))
-            for i in range(0, max_lines):
-                if (tc % 2):
-                    print('\\rowcolor{gray!20}', end='', file=f_out)
-                if (i < len(tc_input)):
-                    print('\\texttt{'+multiple_replace(patterns, tc_input[i])+'}',
-                          end='', file=f_out)
-                print(' & ', end='', file=f_out)
-                if (i < len(tc_output)):
-                    print('\\texttt{'+multiple_replace(patterns, tc_output[i])+'}',
-                          end='', file=f_out)
-                print('\\\\', file=f_out)
-        print("\\end{Exemplo}\n", file=f_out)
-
-        if (note_lines):
-            print("\\Notas\n", file=f_out)
-            for line in note_lines:
-                print_line(line, f_out)
-
-        if (options['display_author']):
-            print("\\end{ProblemaAutor}", file=f_out)
-        else:
-            print("\\end{Problema}", file=f_out)
+        tutorial_lines = print_problem_body(problem_folder, options, f_out)
         print("\\end{document}", file=f_out)
     if (tutorial_lines):
         info_log("Creating problem tutorial")
         print_tutorial_to_latex(
-            problem_folder, problem_metadata, tutorial_lines)
+            problem_folder, problem_config, tutorial_lines)
+
+
+def print_problem_body(problem_folder: str, options: dict, f_out: io.TextIOWrapper) -> list:
+    """Writes the statement of a problem, from the header to the notes, so
+    it can be placed in its own document or in the document of a contest.
+
+    Args:
+        problem_folder: The path of the problem folder.
+        options: The dictionary with optional configuration for PDF file generation.
+        f_out: The file to which the statement will be written.
+
+    Returns:
+        The lines of the tutorial of the problem.
+    """
+    input_folder = os.path.join(problem_folder, 'input')
+    output_folder = os.path.join(problem_folder, 'output')
+    problem_config = load_problem_config(problem_folder)
+
+    statement_folder = os.path.join(problem_folder, 'statement')
+    verify_path(statement_folder)
 
+    interactive = problem_config.interactive
+    if options['event']:
+        print("\\lhead{" + problem_config.event + "}\n", file=f_out)
+    if (options['display_author']):
+        print("\\begin{ProblemaAutor}{" + options['problem_label']
+              + "}{" + problem_config.title + "}{" +
+              str(problem_config.time_limit) +
+              "}{" +
+              str(problem_config.memory_limit_mb) +
+              "}{" + problem_config.author["name"] + "}\n", file=f_out)
+    else:
+        print("\\begin{Problema}{" + options['problem_label']
+              + "}{" + problem_config.title + "}{" +
+              str(problem_config.time_limit) +
+              "}{" +
+              str(problem_config.memory_limit_mb) +
+              "}\n", file=f_out)
+
+    # Get statement information
+    statement_files = get_statement_files(statement_folder, interactive)
+    with open(statement_files[0], 'r') as f:
+        statement_lines = f.readlines()
+    with open(statement_files[1], 'r') as f:
+        input_lines = f.readlines()
+    with open(statement_files[2], 'r') as f:
+        output_lines = f.readlines()
+    with open(statement_files[3], 'r') as f:
+        note_lines = f.readlines()
+    with open(statement_files[4], 'r') as f:
+        tutorial_lines = f.readlines()
+    interactor_lines = []
+    if interactive:
+        with open(statement_files[5], 'r') as f:
+            interactor_lines = f.readlines()
 
-def print_tutorial_to_latex(problem_folder: str, problem_metadata: dict,
+    # Print statement information
+    if (statement_lines):
+        statement_lines[-1] = statement_lines[-1].rstrip()
+        for line in statement_lines:
+            print_line(line, f_out)
+    if (input_lines):
+        print("\n\n\\Entrada\n", file=f_out)
+        input_lines[-1] = input_lines[-1].rstrip()
+        for line in input_lines:
+            print_line(line, f_out)
+    if (output_lines):
+        print("\n\n\\Saida\n", file=f_out)
+        output_lines[-1] = output_lines[-1].rstrip()
+        for line in output_lines:
+            print_line(line, f_out)
+    if (interactive and interactor_lines):
+        print("\n\n\\Interacao\n", file=f_out)
+        for line in interactor_lines:
+            print_line(line, f_out)
+
+    # Print I/O examples
+    in_list = get_io(input_folder, problem_config)
+    out_list = get_io(output_folder, problem_config)
+    patterns = {"#": "\\#",
+                "$": "\\$",
+                "%": "\\%",
+                "&": "\\&",
+                "_": "\\_",
+                "{": "\\{",
+                "}": "\\}",
+                ">": "\\textgreater{}",
+                "<": "\\textless{}",
+                "^": "\\textasciicircum{}",
+                "\\": "\\textbackslash{}",
+                " ": "~"}
+    print("\n\n\\ExemploEntrada", file=f_out)
+    print("\\begin{Exemplo}", file=f_out)
+    for tc in range(0, len(in_list)):
+        tc_input = in_list[tc]
+        tc_output = out_list[tc]
+        max_lines = max(len(tc_input), len(tc_output))
+        for i in range(0, max_lines):
+            if (tc % 2):
+                print('\\rowcolor{gray!20}', end='', file=f_out)
+            if (i < len(tc_input)):
+                print('\\texttt{'+multiple_replace(patterns, tc_input[i])+'}',
+                      end='', file=f_out)
+            print(' & ', end='', file=f_out)
+            if (i < len(tc_output)):
+                print('\\texttt{'+multiple_replace(patterns, tc_output[i])+'}',
+                      end='', file=f_out)
+            print('\\\\', file=f_out)
+    print("\\end{Exemplo}\n", file=f_out)
+
+    if (note_lines):
+        print("\\Notas\n", file=f_out)
+        for line in note_lines:
+            print_line(line, f_out)
+
+    if (options['display_author']):
+        print("\\end{ProblemaAutor}", file=f_out)
+    else:
+        print("\\end{Problema}", file=f_out)
+    return tutorial_lines
+
+
+def print_tutorial_to_latex(problem_folder: str, problem_config: ProblemConfig,
                             tutorial_lines: list) -> None:
     """Generates the LaTeX file for the tutorial of a problem.
 
     Args:
         problem_folder: The path to the problem directory.
-        problem_metadata: The dictionary containing the problem metadata.
+        problem_config: The problem configuration.
         tutorial_lines: A list of strings containing the tutorial lines.
     """
     tex_filepath = os.path.join(problem_folder, os.path.basename(
         os.path.abspath(problem_folder)) + '-tutorial.tex')
     info_log(f"Creating {os.path.basename(tex_filepath)}")
     with open(tex_filepath, 'w') as f_out:
-        print("\\documentclass[10pt]{article}", file=f_out)
-        print("\\usepackage[utf8]{inputenc}", file=f_out)
-        print("\\usepackage{amsmath,amsthm,amssymb}", file=f_out)
-        print("\\usepackage{fullpage}", file=f_out)
-        print("\\usepackage{url}", file=f_out)
-        print("\\pagenumbering{gobble}", file=f_out)
+        print_tutorial_preamble(f_out)
         print("\\title{ Tutorial: " +
-              problem_metadata["problem"]["title"]+"}", file=f_out)
-        print("\\author{"+problem_metadata["author"]["name"]+"}", file=f_out)
+              problem_config.title+"}", file=f_out)
+        print("\\author{"+problem_config.author["name"]+"}", file=f_out)
         print("\\date{}", file=f_out)
         print("\\begin{document}", file=f_out)
         print("\\maketitle", file=f_out)
@@ -226,6 +242,86 @@ def print_tutorial_to_latex(problem_folder: str, problem_metadata: dict,
         print("\\end{document}", file=f_out)
 
 
+def print_tutorial_preamble(f_out: io.TextIOWrapper) -> None:
+    """Writes the document class and packages of the tutorials.
+
+    Args:
+        f_out: The file to which the preamble will be written.
+    """
+    print("\\documentclass[10pt]{article}", file=f_out)
+    print("\\usepackage[utf8]{inputenc}", file=f_out)
+    print("\\usepackage{amsmath,amsthm,amssymb}", file=f_out)
+    print("\\usepackage{fullpage}", file=f_out)
+    print("\\usepackage{url}", file=f_out)
+    print("\\pagenumbering{gobble}", file=f_out)
+    print(END_OF_DUMP, file=f_out)
+
+
+def print_problem_search_paths(problem_folder: str, f_out: io.TextIOWrapper) -> None:
+    """Makes LaTeX search the images and the files included with \\input or
+    \\include in the folder of a problem, where its statement is compiled
+    when it is built alone.
+
+    Args:
+        problem_folder: The path of the problem folder.
+        f_out: The file to which the paths will be written.
+    """
+    path = "{" + os.path.abspath(problem_folder) + "/}"
+    print("\\graphicspath{" + path + "}", file=f_out)
+    print("\\makeatletter\\def\\input@path{" + path + "}\\makeatother", file=f_out)
+
+
+def print_contest_to_latex(problem_folders: list, output_folder: str, display_author: bool = False) -> list:
+    """Generates a single '.tex' file with the statements of all problems of
+    a contest, and another one with their tutorials, labeled A, B, C, ...
+
+    Images and included files are searched in the folder of the problem
+    being printed, as LaTeX runs from the output folder.
+
+    Args:
+        problem_folders: The paths of the problem folders, in contest order.
+        output_folder: The folder where the '.tex' files are written.
+        display_author: Whether to include the authors' names in the statements.
+
+    Returns:
+        The paths of the '.tex' files written.
+    """
+    tex_filepath = os.path.join(output_folder, 'maratona.tex')
+    tutorial_filepath = os.path.join(output_folder, 'tutoriais.tex')
+    tutorials = []
+    info_log(f"Creating {os.path.basename(tex_filepath)}")
+    with open(tex_filepath, 'w') as f_out:
+        print("\\documentclass{maratona}", file=f_out)
+        print("\\begin{document}", file=f_out)
+        for i, problem_folder in enumerate(problem_folders):
+            options = {'display_author': display_author,
+                       'problem_label': convert_idx_to_string(i),
+                       'event': True}
+            print_problem_search_paths(problem_folder, f_out)
+            tutorial_lines = print_problem_body(problem_folder, options, f_out)
+            if tutorial_lines:
+                tutorials.append((options['problem_label'], problem_folder, tutorial_lines))
+        print("\\end{document}", file=f_out)
+    if not tutorials:
+        return [tex_filepath]
+
+    info_log(f"Creating {os.path.basename(tutorial_filepath)}")
+    with open(tutorial_filepath, 'w') as f_out:
+        print_tutorial_preamble(f_out)
+        print("\\begin{document}", file=f_out)
+        for label, problem_folder, tutorial_lines in tutorials:
+            problem_config = load_problem_config(problem_folder)
+            print_problem_search_paths(problem_folder, f_out)
+            print("\\section*{Tutorial " + label + ": " +
+                  problem_config.title + "}", file=f_out)
+            print("\\noindent\\textit{" + problem_config.author["name"] + "}\n", file=f_out)
+            for line in tutorial_lines:
+                print_line(line, f_out)
+            print("\n\\newpage", file=f_out)
+        print("\\end{document}", file=f_out)
+    return [tex_filepath, tutorial_filepath]
+
+
 def clean_auxiliary_files(folder: str, extensions: list = None) -> None:
     """Remove files with specified extensions from a given directory.
 
@@ -4,6 +4,9 @@ from enum import Enum
 from sys import exit
 from typing import Union
 
+from .config import (PYTHON3_INTERPRETER, PYTHON_GRADER_RUN_FLAGS,
+                     PYTHON_RUN_FLAGS)
+
 
 class Status(Enum):
     """
@@ -53,6 +56,7 @@ class Problem:
         problem_name: The name of the problem.
         time_limit: The maximum time allowed for each algorithm's execution in seconds.
         memory_limit: The maximum memory limit allowed for each algorithm in bytes.
+        interactive: Whether the solutions talk to an interactor.
         solutions: A list of solutions for the problem.
 
     Methods:
@@ -61,13 +65,14 @@ class Problem:
         input_folder() -> str
         time_limit() -> float
         memory_limit() -> float
+        interactive() -> bool
         add_solution(solution: 'Solution') -> None
         get_list_solution() -> list
         get_number_of_solutions() -> int
         is_solution_list_empty() -> bool
     """
 
-    def __init__(self, problem_name: str, problem_dir: str, input_folder: str, time_limit: float, memory_limit: float) -> None:
+    def __init__(self, problem_name: str, problem_dir: str, input_folder: str, time_limit: float, memory_limit: float, interactive: bool = False) -> None:
         """
         Initializes a new instance of the Problem class.
 
@@ -75,6 +80,7 @@ class Problem:
             problem_name: The name of the problem.
             time_limit: The maximum time allowed for each algorithm's execution in seconds.
             memory_limit: The maximum memory limit allowed for each algorithm in bytes.
+            interactive: Whether the solutions talk to an interactor.
 
         """
         self.__problem_name = problem_name
@@ -82,6 +88,7 @@ class Problem:
         self.__input_folder = input_folder
         self.__time_limit = time_limit
         self.__memory_limit = memory_limit * 1000000
+        self.__interactive = interactive
         self.__solutions: list[Solution] = []
 
     @property
@@ -136,6 +143,16 @@ class Problem:
         """
         return self.__memory_limit
 
+    @property
+    def interactive(self) -> bool:
+        """
+        Get whether the solutions talk to an interactor.
+
+        Returns:
+            bool: True if the problem is interactive.
+        """
+        return self.__interactive
+
     def add_solution(self, solution: 'Solution') -> None:
         """
         Adds a new solution to the list of solutions for this problem.
@@ -204,28 +221,37 @@ class Solution:
         statistics: The statistics of a given solution.
         exec_args: The command line arguments to be executed.
         tests: The dictionary of tests that were run on the solution.
+        workers_used: The average number of tests that ran in parallel.
+        python_interpreter: The interpreter of a Python solution.
 
     """
 
-    def __init__(self, solution_name: str, expected_result: str, problem_folder: str) -> None:
+    def __init__(self, solution_name: str, expected_result: str, problem_folder: str, java_cds: bool = False, python_interpreter: str = PYTHON3_INTERPRETER, grader: bool = False) -> None:
         """
         Initializes a new instance of the Solution class.
 
         Args:
             solution_name: The name of the solution file.
             expected_result: The expected result of running the solution.
+            java_cds: Whether Java runs use class data sharing archives.
+            python_interpreter: The interpreter of a Python solution.
+            grader: Whether the solution runs through the grader of the problem.
 
         """
         self.__solution_name: str = solution_name
+        self.__python_interpreter: str = python_interpreter
+        self.__grader: bool = grader
         self.__expected_result: str = expected_result
         self.__solution_exec_file_path: str = self.set_solution_file_path(
             problem_folder)
-        self.__vm_memory_usage: float = self.__measure_vm_usage()
+        self.__java_cds: bool = java_cds
+        self.__vm_memory_usage: float = None
         self.__output_path: str = self.__generate_output_folder()
         self.__solution_status: ProblemAnswer = None
         self.__statistics: Statistic = None
         self.__exec_args: list = None
         self.__tests: dict = {}
+        self.__workers_used: float = 0
 
     @property
     def solution_name(self) -> str:
@@ -259,14 +285,38 @@ class Solution:
         """
         return self.__solution_exec_file_path
 
+    @property
+    def python_interpreter(self) -> str:
+        """
+        Gets the interpreter of a Python solution.
+
+        Returns:
+            str: The interpreter command.
+        """
+        return self.__python_interpreter
+
+    @property
+    def python_run_flags(self) -> list:
+        """
+        Gets the interpreter flags used to run a Python solution, which
+        depend on whether it runs through the grader.
+
+        Returns:
+            list: The flags of the interpreter.
+        """
+        return PYTHON_GRADER_RUN_FLAGS if self.__grader else PYTHON_RUN_FLAGS
+
     @property
     def vm_memory_usage(self) -> float:
         """
-        Gets the memory usage of the solution in bytes.
+        Gets the memory usage of the solution in bytes. It is measured on
+        the first access, so only judged solutions pay for it.
 
         Returns:
             float: The memory usage of the solution in bytes.
         """
+        if self.__vm_memory_usage is None:
+            self.__vm_memory_usage = self.__measure_vm_usage()
         return self.__vm_memory_usage
 
     @property
@@ -353,6 +403,28 @@ class Solution:
         """
         return self.__tests
 
+    @property
+    def workers_used(self) -> float:
+        """
+        Gets the number of tests of the solution that ran in parallel,
+        averaged over the judging time.
+
+        Returns:
+            float: The average number of tests that ran in parallel.
+        """
+        return self.__workers_used
+
+    @workers_used.setter
+    def workers_used(self, workers_used: float) -> None:
+        """
+        Sets the number of tests of the solution that ran in parallel,
+        averaged over the judging time.
+
+        Args:
+            workers_used: The average number of tests that ran in parallel.
+        """
+        self.__workers_used = workers_used
+
     def set_solution_file_path(self, problem_folder: str) -> str:
         ext: str = self.get_file_extension()
         binary_file: str = self.get_binary_name()
@@ -472,11 +544,15 @@ class Solution:
         """
         Returns the memory usage of the solution in Megabytes.
 
+        The baseline of each interpreter and flags is cached on disk, so it
+        is measured only once.
+
         Returns:
             int: The memory usage of the solution in Megabytes.
         """
         from math import inf
         from .checker import memory_monitor
+        from .utils import get_cached_vm_memory, get_vm_memory_cache_key, store_vm_memory
         from multiprocessing import Process, Event, Manager, Queue, Value
 
         ext: str = self.get_file_extension()
@@ -486,14 +562,26 @@ class Solution:
             return memory_used.value
 
         elif ext == 'py':
-            from .config import PYTHON3_INTERPRETER, PYTHON_VM_MEMORY_TEST_FILE_PATH
-            exec_args = [PYTHON3_INTERPRETER,
+            from .config import PYTHON_VM_MEMORY_TEST_FILE_PATH
+            cache_key = get_vm_memory_cache_key(
+                self.__python_interpreter, self.python_run_flags)
+            exec_args = [self.__python_interpreter, *self.python_run_flags,
                          PYTHON_VM_MEMORY_TEST_FILE_PATH]
 
         elif ext == 'java':
-            from .config import JAVA_INTERPRETER, JAVA_FLAG, JAVA_VM_MEMORY_TEST_FOLDER, JAVA_VM_TEST_FILE
-            exec_args = [JAVA_INTERPRETER, JAVA_FLAG,
-                         JAVA_VM_MEMORY_TEST_FOLDER, JAVA_VM_TEST_FILE]
+            from .config import JAVA_CDS_FLAG, JAVA_INTERPRETER
+            cache_key = get_vm_memory_cache_key(
+                JAVA_INTERPRETER, [JAVA_CDS_FLAG] if self.__java_cds else [])
+
+        cached_memory = get_cached_vm_memory(cache_key)
+        if cached_memory is not None:
+            return cached_memory
+
+        if ext == 'java':
+            from .config import JAVA_VM_TEST_FILE
+            from .utils import get_java_vm_test_folder, java_command
+            exec_args = java_command(get_java_vm_test_folder(
+                self.__java_cds), JAVA_VM_TEST_FILE, self.__java_cds)
 
         with Manager() as manager:
             pid: Queue = manager.Queue(maxsize=1)
@@ -508,6 +596,8 @@ class Solution:
             stop_monitor.set()
             monitor_process.join()
 
+        if memory_used.value:
+            store_vm_memory(cache_key, memory_used.value)
         return memory_used.value
 
 
@@ -606,6 +696,57 @@ class Statistic:
     max_memory_usage: float = 0.0
 
 
+class ProblemConfig:
+    """
+    Represents the contents of the problem.json file of a problem.
+
+    Attributes:
+        title: The title of the problem.
+        event: The event of the problem.
+        time_limit: The time limit in seconds.
+        memory_limit_mb: The memory limit in megabytes.
+        input_file: The input file of the problem.
+        output_file: The output file of the problem.
+        interactive: Whether the problem is interactive.
+        grader: Whether the problem uses a grader.
+        subject: The subjects of the problem, by language.
+        author: The author information.
+        io_samples: The number of tests shown in the statement.
+        boca_config: The BOCA package settings.
+        python_config: The Python interpreter settings.
+        solutions: The solution files, by expected result.
+        metadata: The problem.json file as a dictionary.
+    """
+    __slots__ = ('title', 'event', 'time_limit', 'memory_limit_mb', 'input_file',
+                 'output_file', 'interactive', 'grader', 'subject', 'author',
+                 'io_samples', 'boca_config', 'python_config', 'solutions',
+                 'metadata')
+
+    def __init__(self, metadata: dict) -> None:
+        """
+        Initializes a new instance of the ProblemConfig class.
+
+        Args:
+            metadata: The problem.json file as a dictionary, already validated.
+        """
+        problem: dict = metadata['problem']
+        self.title: str = problem['title']
+        self.event: str = problem['event']
+        self.time_limit: int = problem['time_limit']
+        self.memory_limit_mb: int = problem['memory_limit_mb']
+        self.input_file: str = problem['input_file']
+        self.output_file: str = problem['output_file']
+        self.interactive: bool = problem['interactive']
+        self.grader: bool = problem['grader']
+        self.subject: dict = problem['subject']
+        self.author: dict = metadata['author']
+        self.io_samples: int = metadata['io_samples']
+        self.boca_config: dict = metadata['boca_config']
+        self.python_config: dict = metadata.get('python_config') or {}
+        self.solutions: dict = metadata['solutions']
+        self.metadata: dict = metadata
+
+
 def singleton(cls):
     """Decorator to create a Singleton class.
 
@@ -662,6 +803,14 @@ class Paths:
         """Get the temporary output root directory"""
         return self.__tmp_output_dir
 
+    def set_problem_dir(self, problem_dir: Union[str, list]) -> None:
+        """Set the problem directory"""
+        self.__problem_dir = problem_dir
+
     def set_output_dir(self, output_dir: str) -> None:
         """Set the output directory"""
         self.__output_dir = output_dir
+
+    def set_tmp_output_dir(self, tmp_output_dir: str) -> None:
+        """Set the temporary output root directory"""
+        self.__tmp_output_dir = tmp_output_dir
@@ -1,12 +1,12 @@
 import os
 from math import floor
 
-from ..pdfutils import build_pdf
-from ..toolchain import build_executables, run_programs
+from ..config import MEMORY_BUDGET_SHARE
+from ..utils import use_tmpfs_output
 from .common import *
 
 
-def process_build(problem_dir: str, all_solutions: bool, specific_solution: str, cpu_count: int, io: bool, pdf: bool, no_validator: bool, no_generator: bool, no_checker: bool, no_output: bool, ngvoc: bool) -> None:
+def process_build(problem_dir: str, all_solutions: bool, specific_solution: str, cpu_count: int, io: bool, pdf: bool, no_validator: bool, no_generator: bool, no_checker: bool, no_output: bool, ngvoc: bool, memory_share: float, tmpfs: bool, keep_outputs: bool, debug: bool, java_cds: bool) -> None:
     """Build a problem.
 
     Args:
@@ -21,8 +21,18 @@ def process_build(problem_dir: str, all_solutions: bool, specific_solution: str,
         no_checker: Whether to build problem without running the checker or not.
         no_output: Whether to build problem without generating output or not.
         ngvoc: Whether to build only problem executables and PDFs or not.
+        memory_share: Share of the available RAM that running solutions may commit.
+        tmpfs: Whether to store solution outputs in a tmpfs or not.
+        keep_outputs: Whether to keep the outputs of every test or not.
+        debug: Whether to build debug executables too or not.
+        java_cds: Whether to run Java solutions with class data sharing archives or not.
     """
+    from ..pdfutils import build_pdf
+    from ..toolchain import build_executables, run_programs
+
     setup_and_validate_paths(problem_dir)
+    if tmpfs:
+        use_tmpfs_output()
     problem_name = get_basename(problem_dir)
 
     if pdf:
@@ -31,18 +41,24 @@ def process_build(problem_dir: str, all_solutions: bool, specific_solution: str,
         info_log('Problem PDF generated successfully')
     elif io:
         info_log("Generating input/output")
-        build_executables(no_checker)
+        build_executables(no_checker, all_solutions, specific_solution,
+                          no_validator, no_generator, debug, java_cds)
         if not ngvoc:
             run_programs(all_solutions=all_solutions, specific_solution=specific_solution,
-                     cpu_number=cpu_count, no_validator=no_validator, no_generator=no_generator, no_output=no_output)
+                     cpu_number=cpu_count, no_validator=no_validator, no_generator=no_generator, no_output=no_output,
+                     memory_share=memory_share, keep_outputs=keep_outputs, java_cds=java_cds)
         info_log("Input/output generated successfully")
     else:
         info_log(f'Building problem {problem_name}')
-        build_executables(no_checker)
+        build_executables(no_checker, all_solutions, specific_solution,
+                          no_validator, no_generator, debug, java_cds)
         if not ngvoc:
+            # The PDFs are built while the solutions are judged
             run_programs(all_solutions=all_solutions, specific_solution=specific_solution,
-                        cpu_number=cpu_count, no_validator=no_validator, no_generator=no_generator, no_checker=no_checker, no_output=no_output)
-        build_pdf()
+                        cpu_number=cpu_count, no_validator=no_validator, no_generator=no_generator, no_checker=no_checker, no_output=no_output,
+                        memory_share=memory_share, keep_outputs=keep_outputs, java_cds=java_cds, pdf=True)
+        else:
+            build_pdf()
         info_log(f'Problem {problem_name} built successfully')
 
 
@@ -71,6 +87,10 @@ def add_parser(subparsers) -> None:
     parser_build.add_argument('-c', '--cpu-count', help="number of threads to be used "
                               f"when checking solutions. Default is {default_threads} threads.",
                               type=int, default=default_threads)
+    parser_build.add_argument('-ms', '--memory-share', help="share of the available RAM that "
+                              "solutions running in parallel may commit. "
+                              f"Default is {MEMORY_BUDGET_SHARE}.",
+                              type=memory_share_type, default=MEMORY_BUDGET_SHARE)
     parser_build.add_argument(
         '-nv', '--no-validator', help='build problem without the validator', action='store_true')
     parser_build.add_argument(
@@ -79,8 +99,19 @@ def add_parser(subparsers) -> None:
         '-no', '--no-output', help='build problem without generating output', action='store_true')
     parser_build.add_argument(
         '-nc', '--no-checker', help='build problem without running the checker', action='store_true')
+    parser_build.add_argument(
+        '-d', '--debug', help='build debug executables too', action='store_true')
+    parser_build.add_argument(
+        '--tmpfs', help='store solution outputs in a tmpfs', action='store_true')
+    parser_build.add_argument(
+        '-ko', '--keep-outputs', help='keep the outputs of every test, not only of '
+        'failing or unexpected tests', action='store_true')
+    parser_build.add_argument(
+        '-cds', '--java-cds', help='create class data sharing archives of Java '
+        'solutions and use them when running', action='store_true')
     parser_build.add_argument(
         '-ngvoc', help='build only problem executables and PDFs', action='store_true')
     parser_build.add_argument('problem_dir', help='path to the problem directory')
     parser_build.set_defaults(function=lambda options: process_build(
-        options.problem_dir, options.all, options.specific, options.cpu_count, options.io, options.pdf, options.no_validator, options.no_generator, options.no_checker, options.no_output, options.ngvoc))
+        options.problem_dir, options.all, options.specific, options.cpu_count, options.io, options.pdf, options.no_validator, options.no_generator, options.no_checker, options.no_output, options.ngvoc, options.memory_share,
+        options.tmpfs, options.keep_outputs, options.debug, options.java_cds))
@@ -1,3 +1,4 @@
+import argparse
 import os.path
 import sys
 from shutil import which
@@ -65,8 +66,26 @@ def verify_binaries(additional_verification: list = []) -> None:
     Args:
         additional_verification: Additional binaries to be verified. Defaults to [].
     """
-    binaries = ['pdflatex', 'make', 'g++', 'zip'] + additional_verification
+    binaries = ['pdflatex', 'make', 'g++'] + additional_verification
     for binary in binaries:
         if not which(binary):
             print(f'{binary} is not installed.')
             sys.exit(1)
+
+
+def memory_share_type(value: str) -> float:
+    """Parse a share of the available RAM, which must be in (0, 1].
+
+    Args:
+        value: The value given in the command line.
+
+    Returns:
+        The share as a float.
+    """
+    try:
+        share = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid float value: '{value}'")
+    if not 0 < share <= 1:
+        raise argparse.ArgumentTypeError(f"share must be greater than 0 and at most 1, got {value}")
+    return share
@@ -1,9 +1,12 @@
-from ..contest import *
+import os
+from math import floor
+
+from ..config import BOCA_COMPRESSION_LEVEL, MEMORY_BUDGET_SHARE
 from ..metadata import Paths
 from .common import *
 
 
-def process_contest(problems_dir: list, output_dir: str, pdf: bool, io: bool, author: bool, no_verify: bool) -> None:
+def process_contest(problems_dir: list, output_dir: str, pdf: bool, io: bool, author: bool, no_verify: bool, cpu_count: int, jobs: int, memory_share: float, single_document: bool, compression_level: int) -> None:
     """
     Process the contest files.
 
@@ -14,22 +17,30 @@ def process_contest(problems_dir: list, output_dir: str, pdf: bool, io: bool, au
         io: Whether is to generate only contest input/output files.
         author: Whether is to add author name to PDFs.
         no_verify: Whether is to verify and rebuild problems.
+        cpu_count: Number of threads shared by the problems built at the same time.
+        jobs: Number of problems processed at the same time.
+        memory_share: Share of the available RAM shared by the problems built at the same time.
+        single_document: Whether to compile the contest PDFs as single documents.
+        compression_level: Deflate level of the BOCA packages.
     """
-    setup_and_validate_paths(problems_dir, output_dir, additional_verification=['pdfjam'])
+    from ..contest import (build_boca_packages, build_contest_pdf,
+                           build_input_output, build_problems)
+
+    setup_and_validate_paths(problems_dir, output_dir)
     os.makedirs(output_dir, exist_ok=True)
     
     if not no_verify:
-        for problem in Paths().get_problem_dir():
-            verify_problem(problem)
+        build_problems(Paths().get_problem_dir(), cpu_count, jobs, memory_share)
 
     info_log('Generating contest files')
     if io:
         build_input_output()
     elif pdf:
-        build_contest_pdf(author=author)
+        build_contest_pdf(author=author, single_document=single_document)
     else:
-        build_boca_packages(author=author)
-        build_contest_pdf(author=author)
+        build_boca_packages(author=author, jobs=jobs or cpu_count,
+                            compression_level=compression_level)
+        build_contest_pdf(author=author, single_document=single_document)
     info_log('Contest files generated successfully')
 
 
@@ -48,10 +59,28 @@ def add_parser(subparsers) -> None:
     mut_ex_group.add_argument('-i', '--io', action='store_true',
                                 default=False, help='generate contest input/output files')
     contest_parser.add_argument('--author', action='store_true', help='add author name to PDFs')
+    contest_parser.add_argument('-sd', '--single-document', action='store_true',
+                                help='compile the contest PDFs as single documents instead of merging the PDF of each problem')
     contest_parser.add_argument('-nv', '--no-verify', action='store_true', help='do not verify and rebuild problems', default=False)
+    default_threads = max(floor(os.cpu_count() * 0.7), 1)
+    contest_parser.add_argument('-c', '--cpu-count', help="number of threads shared by the "
+                                f"problems built at the same time. Default is {default_threads} threads.",
+                                type=int, default=default_threads)
+    contest_parser.add_argument('-j', '--jobs', help="number of problems processed at the same "
+                                "time. Default is as many as the threads allow.", type=int, default=0)
+    contest_parser.add_argument('-ms', '--memory-share', help="share of the available RAM that "
+                                "the problems built at the same time may commit. "
+                                f"Default is {MEMORY_BUDGET_SHARE}.",
+                                type=memory_share_type, default=MEMORY_BUDGET_SHARE)
+    contest_parser.add_argument('-z', '--compression-level', type=int, choices=range(10),
+                                default=BOCA_COMPRESSION_LEVEL, metavar='{0-9}',
+                                help='deflate level of the BOCA packages, where 0 stores the files '
+                                f'uncompressed. Default is {BOCA_COMPRESSION_LEVEL}.')
     contest_parser.add_argument(
         'problem_dir', help='path to problem(s)', nargs='+')
     contest_parser.add_argument(
         'contest_dir', help='directory which the contest will be saved')
     contest_parser.set_defaults(function=lambda options: process_contest(
-        options.problem_dir, options.contest_dir, options.pdf, options.io, options.author, options.no_verify))
+        options.problem_dir, options.contest_dir, options.pdf, options.io, options.author, options.no_verify,
+        options.cpu_count, options.jobs, options.memory_share, options.single_document,
+        options.compression_level))
@@ -1,11 +1,8 @@
 from typing import Union
 
-from ..boca import boca_pack
-from ..jsonutils import parse_json
+from ..config import BOCA_COMPRESSION_LEVEL
 from ..metadata import Paths
-from ..polygon_converter import get_polygon_problem
-from ..polygon_submitter import send_to_polygon
-from ..sqtpm import convert_to_sqtpm
+from ..utils import load_problem_config
 from .common import *
 
 
@@ -28,21 +25,21 @@ def verify_problem_type(problem_format: str) -> None:
     Args:
         problem_format: Format to convert the problem.
     """
-    problem_json = os.path.join(Paths().get_problem_dir(), 'problem.json')
-    problem_json = parse_json(problem_json)
-    
-    interactive = problem_json['problem']['interactive']
+    problem_config = load_problem_config(Paths().get_problem_dir())
+
+    interactive = problem_config.interactive
     no_interactive_formats = ['boca', 'sqtpm']
     if problem_format in no_interactive_formats and interactive:
         error_log(f'Interactive problems are not supported by {problem_format.upper()}.')
     
-    grader = problem_json['problem']['grader']
+    grader = problem_config.grader
     no_grader_formats = ['boca', 'sqtpm']
     if problem_format in no_grader_formats and grader:
         error_log(f'Grader problems are not supported by {problem_format.upper()}.')
 
 
-def process_convert_to(problem_format: str, problem_dir: str, output_dir: Union[str, None], manual_testcases: bool) -> None:
+def process_convert_to(problem_format: str, problem_dir: str, output_dir: Union[str, None], manual_testcases: bool,
+                       compression_level: int = BOCA_COMPRESSION_LEVEL) -> None:
     """Convert problem from DS to Polygon, SQTPM or BOCA.
 
     Args:
@@ -50,19 +47,24 @@ def process_convert_to(problem_format: str, problem_dir: str, output_dir: Union[
         problem_dir: Path to the problem directory.
         output_dir: Path the converted problem directory or ID of the Polygon 
         problem, if one is not defined yet.
+        manual_testcases: Send testcases without the script.
+        compression_level: Deflate level of the BOCA package.
     """
     if problem_format == 'polygon':
+        from ..polygon_submitter import send_to_polygon
         setup_and_validate_paths(problem_dir)
         verify_problem_type(problem_format)
         verify_polygon_keys()
         send_to_polygon(output_dir, manual_testcases)
     elif problem_format == 'boca':
+        from ..boca import boca_pack
         if not output_dir:
             output_dir = problem_dir
         setup_and_validate_paths(problem_dir, output_dir)
         verify_problem_type(problem_format)
-        boca_pack(Paths().get_problem_dir(), Paths().get_output_dir())
+        boca_pack(Paths().get_problem_dir(), Paths().get_output_dir(), compression_level)
     elif problem_format == 'sqtpm':
+        from ..sqtpm import convert_to_sqtpm
         if not output_dir:
             output_dir = os.path.join(problem_dir, 'sqtpm')
         setup_and_validate_paths(problem_dir, output_dir)
@@ -82,6 +84,7 @@ def process_convert_from(problem_format: str, problem_dir: str, package_dir: str
         local: Convert local polygon package. Use the package path instead of ID in package_dir.
     """
     if problem_format == 'polygon':
+        from ..polygon_converter import get_polygon_problem
         if local:
             setup_and_validate_paths(problem_dir, package_dir, verify_path=False)
         else:
@@ -115,8 +118,13 @@ def add_parser(subparsers) -> None:
                            'except for polygon problems, which are saved online')
     to_parser.add_argument('-m', '--manual_tests', action='store_true',
                            help='send testcases without the script')
+    to_parser.add_argument('-z', '--compression-level', type=int, choices=range(10),
+                           default=BOCA_COMPRESSION_LEVEL, metavar='{0-9}',
+                           help='deflate level of the BOCA package, where 0 stores the files '
+                           f'uncompressed. Default is {BOCA_COMPRESSION_LEVEL}.')
     to_parser.set_defaults(function=lambda options: process_convert_to(
-        options.format, options.problem_dir, options.output_dir, options.manual_tests))
+        options.format, options.problem_dir, options.output_dir, options.manual_tests,
+        options.compression_level))
 
     from_parser = subparsers.add_parser(
         'convert_from', help='convert problem to ds format')
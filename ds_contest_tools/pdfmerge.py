@@ -0,0 +1,585 @@
+import re
+import zlib
+from collections import namedtuple
+
+WHITESPACE = b'\x00\t\n\x0c\r '
+TOKEN_PATTERN = re.compile(rb'[^\x00\t\n\x0c\r ()<>\[\]{}/%]+')
+NUMBER_PATTERN = re.compile(rb'[+-]?(\d+\.?\d*|\.\d+)')
+REF_PATTERN = re.compile(rb'\s*(\d+)\s+(\d+)\s+R(?![^\x00\t\n\x0c\r ()<>\[\]{}/%])')
+OBJECT_HEADER_PATTERN = re.compile(rb'\s*(\d+)\s+(\d+)\s+obj')
+OBJECT_SCAN_PATTERN = re.compile(rb'(?<![0-9])(\d+)\s+(\d+)\s+obj\b')
+STARTXREF_PATTERN = re.compile(rb'startxref\s+(\d+)')
+# Page attributes inherited from the page tree
+INHERITED_ATTRIBUTES = [b'Resources', b'MediaBox', b'CropBox', b'Rotate']
+
+Ref = namedtuple('Ref', ['num', 'gen'])
+
+
+class PdfError(Exception):
+    """Raised when a PDF cannot be read by the merger."""
+
+
+class Name(bytes):
+    """A PDF name, stored without the leading slash."""
+
+
+class String(bytes):
+    """A PDF string, stored with its delimiters, as written in the file."""
+
+
+class Real(bytes):
+    """A PDF real number, stored as written in the file."""
+
+
+class Stream:
+    """A PDF stream, with its dictionary and its data still encoded."""
+
+    def __init__(self, attributes: dict, data: bytes) -> None:
+        self.attributes = attributes
+        self.data = data
+
+
+def skip_whitespace(data: bytes, pos: int) -> int:
+    """Skip whitespace and comments.
+
+    Args:
+        data: The contents of the PDF.
+        pos: The current position.
+
+    Returns:
+        The position of the next token.
+    """
+    while pos < len(data):
+        if data[pos] in WHITESPACE:
+            pos += 1
+        elif data[pos] == ord('%'):
+            while pos < len(data) and data[pos] not in b'\r\n':
+                pos += 1
+        else:
+            break
+    return pos
+
+
+def parse_literal_string(data: bytes, pos: int) -> tuple:
+    """Parse a literal string, keeping its escapes and delimiters.
+
+    Args:
+        data: The contents of the PDF.
+        pos: The position of the opening parenthesis.
+
+    Returns:
+        A tuple containing the string and the position after it.
+    """
+    depth = 0
+    i = pos
+    while i < len(data):
+        c = data[i]
+        if c == ord('\\'):
+            i += 2
+            continue
+        if c == ord('('):
+            depth += 1
+        elif c == ord(')'):
+            depth -= 1
+            if depth == 0:
+                return String(data[pos:i + 1]), i + 1
+        i += 1
+    raise PdfError('Unterminated string')
+
+
+def parse_object(data: bytes, pos: int, document=None) -> tuple:
+    """Parse a PDF object.
+
+    Args:
+        data: The contents of the PDF.
+        pos: The position of the object.
+        document: The document used to resolve indirect stream lengths.
+
+    Returns:
+        A tuple containing the object and the position after it.
+    """
+    pos = skip_whitespace(data, pos)
+    if pos >= len(data):
+        raise PdfError('Unexpected end of file')
+    c = data[pos]
+    if data.startswith(b'<<', pos):
+        attributes = {}
+        pos = skip_whitespace(data, pos + 2)
+        while not data.startswith(b'>>', pos):
+            key, pos = parse_object(data, pos)
+            if not isinstance(key, Name):
+                raise PdfError(f'Invalid dictionary key at {pos}')
+            value, pos = parse_object(data, pos)
+            attributes[key] = value
+            pos = skip_whitespace(data, pos)
+        pos += 2
+        stream_pos = skip_whitespace(data, pos)
+        if data.startswith(b'stream', stream_pos):
+            return parse_stream(data, stream_pos + 6, attributes, document)
+        return attributes, pos
+    if c == ord('['):
+        items = []
+        pos = skip_whitespace(data, pos + 1)
+        while data[pos] != ord(']'):
+            item, pos = parse_object(data, pos)
+            items.append(item)
+            pos = skip_whitespace(data, pos)
+        return items, pos + 1
+    if c == ord('('):
+        return parse_literal_string(data, pos)
+    if c == ord('<'):
+        end = data.index(b'>', pos)
+        return String(data[pos:end + 1]), end + 1
+    if c == ord('/'):
+        match = TOKEN_PATTERN.match(data, pos + 1)
+        end = match.end() if match else pos + 1
+        return Name(data[pos + 1:end]), end
+
+    match = TOKEN_PATTERN.match(data, pos)
+    if not match:
+        raise PdfError(f'Unexpected character at {pos}')
+    token = match.group()
+    if token == b'true':
+        return True, match.end()
+    if token == b'false':
+        return False, match.end()
+    if token == b'null':
+        return None, match.end()
+    if not NUMBER_PATTERN.fullmatch(token):
+        raise PdfError(f'Unexpected token {token!r} at {pos}')
+    if b'.' in token:
+        return Real(token), match.end()
+    ref = REF_PATTERN.match(data, pos)
+    if ref:
+        return Ref(int(ref.group(1)), int(ref.group(2))), ref.end()
+    return int(token), match.end()
+
+
+def parse_stream(data: bytes, pos: int, attributes: dict, document) -> tuple:
+    """Read the data of a stream.
+
+    Args:
+        data: The contents of the PDF.
+        pos: The position after the 'stream' keyword.
+        attributes: The dictionary of the stream.
+        document: The document used to resolve an indirect length.
+
+    Returns:
+        A tuple containing the stream and the position after it.
+    """
+    if data.startswith(b'\r\n', pos):
+        pos += 2
+    elif data[pos] in b'\r\n':
+        pos += 1
+    length = attributes.get(b'Length')
+    if isinstance(length, Ref) and document is not None:
+        length = document.get_object(length.num)
+    end = pos + length if isinstance(length, int) else -1
+    if end < pos or not data.startswith(b'endstream', skip_whitespace(data, end)):
+        # Wrong or unknown length, so look for the end of the stream
+        end = data.index(b'endstream', pos)
+        while end > pos and data[end - 1] in b'\r\n':
+            end -= 1
+    stream_end = data.index(b'endstream', end) + len(b'endstream')
+    return Stream(attributes, data[pos:end]), stream_end
+
+
+def decode_stream(stream: Stream) -> bytes:
+    """Decode the data of a stream compressed with FlateDecode.
+
+    Args:
+        stream: The stream to decode.
+
+    Returns:
+        The decoded data.
+    """
+    filters = stream.attributes.get(b'Filter', [])
+    filters = filters if isinstance(filters, list) else [filters]
+    if any(f != b'FlateDecode' for f in filters):
+        raise PdfError(f'Unsupported stream filter {filters}')
+    data = zlib.decompress(stream.data) if filters else stream.data
+    parameters = stream.attributes.get(b'DecodeParms') or {}
+    if isinstance(parameters, list):
+        parameters = parameters[0] or {}
+    predictor = parameters.get(b'Predictor', 1)
+    if predictor >= 10:
+        data = remove_png_predictor(data, parameters.get(b'Columns', 1))
+    elif predictor != 1:
+        raise PdfError(f'Unsupported predictor {predictor}')
+    return data
+
+
+def remove_png_predictor(data: bytes, columns: int) -> bytes:
+    """Undo the PNG predictors of a cross-reference stream.
+
+    Args:
+        data: The data with one predictor byte per row.
+        columns: The number of bytes in each row.
+
+    Returns:
+        The data without predictors.
+    """
+    rows = []
+    previous = bytearray(columns)
+    for i in range(0, len(data), columns + 1):
+        kind = data[i]
+        row = bytearray(data[i + 1:i + 1 + columns])
+        for j in range(len(row)):
+            left = row[j - 1] if j else 0
+            up = previous[j]
+            up_left = previous[j - 1] if j else 0
+            if kind == 1:
+                row[j] = (row[j] + left) & 0xff
+            elif kind == 2:
+                row[j] = (row[j] + up) & 0xff
+            elif kind == 3:
+                row[j] = (row[j] + (left + up) // 2) & 0xff
+            elif kind == 4:
+                p = left + up - up_left
+                pa, pb, pc = abs(p - left), abs(p - up), abs(p - up_left)
+                predicted = left if pa <= pb and pa <= pc else up if pb <= pc else up_left
+                row[j] = (row[j] + predicted) & 0xff
+        rows.append(bytes(row))
+        previous = row
+    return b''.join(rows)
+
+
+class Document:
+    """A PDF file whose objects are loaded on demand.
+
+    Attributes:
+        trailer: The trailer dictionary of the file.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Read a PDF file and its cross-reference sections.
+
+        Args:
+            path: The path to the PDF file.
+        """
+        with open(path, 'rb') as f:
+            self.__data: bytes = f.read()
+        self.__offsets: dict = {}
+        self.__compressed: dict = {}
+        self.__object_streams: dict = {}
+        self.__cache: dict = {}
+        self.__scanned: bool = False
+        self.trailer: dict = {}
+        try:
+            self.__read_xref()
+        except (PdfError, ValueError, IndexError, KeyError, TypeError, zlib.error):
+            self.__scan_objects()
+        if b'Encrypt' in self.trailer:
+            raise PdfError(f'{path} is encrypted')
+
+    def __read_xref(self) -> None:
+        """Read every cross-reference section, from the newest one."""
+        matches = list(STARTXREF_PATTERN.finditer(self.__data))
+        if not matches:
+            raise PdfError('startxref not found')
+        pos = int(matches[-1].group(1))
+        visited = set()
+        while pos is not None and pos not in visited:
+            visited.add(pos)
+            if self.__data.startswith(b'xref', skip_whitespace(self.__data, pos)):
+                trailer = self.__read_xref_table(skip_whitespace(self.__data, pos) + 4)
+            else:
+                trailer = self.__read_xref_stream(pos)
+            for key, value in trailer.items():
+                self.trailer.setdefault(key, value)
+            if isinstance(trailer.get(b'XRefStm'), int):
+                self.__read_xref_stream(trailer[b'XRefStm'])
+            pos = trailer.get(b'Prev')
+
+    def __read_xref_table(self, pos: int) -> dict:
+        """Read a cross-reference table.
+
+        Args:
+            pos: The position after the 'xref' keyword.
+
+        Returns:
+            The trailer dictionary that follows the table.
+        """
+        data = self.__data
+        while True:
+            pos = skip_whitespace(data, pos)
+            if data.startswith(b'trailer', pos):
+                trailer, _ = parse_object(data, pos + 7)
+                return trailer
+            first, pos = parse_object(data, pos)
+            count, pos = parse_object(data, pos)
+            for num in range(first, first + count):
+                pos = skip_whitespace(data, pos)
+                offset, _, kind = data[pos:pos + 18].split()
+                pos += 18
+                if kind == b'n' and num not in self.__offsets and num not in self.__compressed:
+                    self.__offsets[num] = int(offset)
+
+    def __read_xref_stream(self, pos: int) -> dict:
+        """Read a cross-reference stream.
+
+        Args:
+            pos: The position of the stream object.
+
+        Returns:
+            The dictionary of the stream.
+        """
+        header = OBJECT_HEADER_PATTERN.match(self.__data, pos)
+        if not header:
+            raise PdfError(f'Invalid cross-reference at {pos}')
+        stream, _ = parse_object(self.__data, header.end(), self)
+        attributes = stream.attributes
+        widths = attributes[b'W']
+        index = attributes.get(b'Index', [0, attributes[b'Size']])
+        data = decode_stream(stream)
+        row_size = sum(widths)
+        row = 0
+        for first, count in zip(index[::2], index[1::2]):
+            for num in range(first, first + count):
+                fields = []
+                start = row * row_size
+                for width in widths:
+                    fields.append(int.from_bytes(data[start:start + width], 'big'))
+                    start += width
+                row += 1
+                kind = fields[0] if widths[0] else 1
+                if num in self.__offsets or num in self.__compressed:
+                    continue
+                if kind == 1:
+                    self.__offsets[num] = fields[1]
+                elif kind == 2:
+                    self.__compressed[num] = (fields[1], fields[2])
+        return attributes
+
+    def __scan_objects(self) -> None:
+        """Rebuild the cross-reference from the object headers of the file."""
+        self.__scanned = True
+        self.__offsets.clear()
+        self.__compressed.clear()
+        for match in OBJECT_SCAN_PATTERN.finditer(self.__data):
+            self.__offsets[int(match.group(1))] = match.start()
+        for pos in [m.start() for m in re.finditer(rb'trailer', self.__data)]:
+            try:
+                trailer, _ = parse_object(self.__data, pos + 7)
+                self.trailer.update(trailer)
+            except (PdfError, ValueError, IndexError):
+                pass
+        for num in list(self.__offsets):
+            try:
+                obj = self.get_object(num)
+            except (PdfError, ValueError, IndexError):
+                continue
+            if isinstance(obj, Stream) and obj.attributes.get(b'Type') == b'XRef':
+                self.trailer.update(obj.attributes)
+            if isinstance(obj, Stream) and obj.attributes.get(b'Type') == b'ObjStm':
+                for member in self.__read_object_stream(num):
+                    self.__compressed.setdefault(member, (num, None))
+        if b'Root' not in self.trailer:
+            raise PdfError('Document catalog not found')
+
+    def __read_object_stream(self, num: int) -> dict:
+        """Decode an object stream.
+
+        Args:
+            num: The number of the object stream.
+
+        Returns:
+            A dictionary mapping each object number to its position in the
+            decoded data.
+        """
+        if num not in self.__object_streams:
+            stream = self.get_object(num)
+            data = decode_stream(stream)
+            first = stream.attributes[b'First']
+            header = data[:first].split()
+            members = {int(header[i]): first + int(header[i + 1])
+                       for i in range(0, 2 * stream.attributes[b'N'], 2)}
+            self.__object_streams[num] = (data, members)
+        return self.__object_streams[num][1]
+
+    def get_object(self, num: int):
+        """Load an indirect object.
+
+        Args:
+            num: The object number.
+
+        Returns:
+            The object, or None if it does not exist.
+        """
+        if num in self.__cache:
+            return self.__cache[num]
+        obj = None
+        if num in self.__offsets:
+            header = OBJECT_HEADER_PATTERN.match(self.__data, self.__offsets[num])
+            if not header or int(header.group(1)) != num:
+                if self.__scanned:
+                    raise PdfError(f'Object {num} not found at {self.__offsets[num]}')
+                # The cross-reference is broken, so the offsets are rebuilt
+                self.__scan_objects()
+                return self.get_object(num)
+            obj, _ = parse_object(self.__data, header.end(), self)
+        elif num in self.__compressed:
+            stream_num, _ = self.__compressed[num]
+            members = self.__read_object_stream(stream_num)
+            obj, _ = parse_object(self.__object_streams[stream_num][0], members[num])
+        self.__cache[num] = obj
+        return obj
+
+    def resolve(self, obj):
+        """Follow an indirect reference.
+
+        Args:
+            obj: An object or a reference to it.
+
+        Returns:
+            The referenced object.
+        """
+        return self.get_object(obj.num) if isinstance(obj, Ref) else obj
+
+    def get_pages(self) -> list:
+        """List the pages of the document in order.
+
+        Returns:
+            A list of tuples containing the reference of each page and the
+            attributes it inherits from the page tree.
+        """
+        catalog = self.resolve(self.trailer[b'Root'])
+        pages = []
+        stack = [(catalog[b'Pages'], {})]
+        visited = set()
+        while stack:
+            ref, inherited = stack.pop()
+            if isinstance(ref, Ref):
+                if ref.num in visited:
+                    continue
+                visited.add(ref.num)
+            node = self.resolve(ref)
+            if node.get(b'Type') == b'Pages' or b'Kids' in node:
+                inherited = dict(inherited)
+                for attribute in INHERITED_ATTRIBUTES:
+                    if attribute in node:
+                        inherited[attribute] = node[attribute]
+                stack.extend((kid, inherited) for kid in reversed(self.resolve(node[b'Kids'])))
+            else:
+                pages.append((ref, inherited))
+        return pages
+
+
+def serialize(obj, refs: dict) -> bytes:
+    """Write an object, renumbering its references.
+
+    Args:
+        obj: The object to be written.
+        refs: Dictionary mapping old object numbers to new ones.
+
+    Returns:
+        The object as written in a PDF file.
+    """
+    if isinstance(obj, Name):
+        return b'/' + obj
+    if isinstance(obj, (String, Real)):
+        return bytes(obj)
+    if isinstance(obj, bool):
+        return b'true' if obj else b'false'
+    if isinstance(obj, int):
+        return str(obj).encode()
+    if obj is None:
+        return b'null'
+    if isinstance(obj, Ref):
+        return f'{refs[obj.num]} 0 R'.encode()
+    if isinstance(obj, list):
+        return b'[' + b' '.join(serialize(item, refs) for item in obj) + b']'
+    if isinstance(obj, dict):
+        return b'<<' + b''.join(b'/' + key + b' ' + serialize(value, refs)
+                                for key, value in obj.items()) + b'>>'
+    if isinstance(obj, Stream):
+        attributes = dict(obj.attributes)
+        attributes[b'Length'] = len(obj.data)
+        return serialize(attributes, refs) + b'\nstream\n' + obj.data + b'\nendstream'
+    raise PdfError(f'Cannot write object {obj!r}')
+
+
+def find_refs(obj, refs: list) -> None:
+    """Collect the references inside an object.
+
+    Args:
+        obj: The object to be searched.
+        refs: The list the references are appended to.
+    """
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, Ref):
+            refs.append(obj)
+        elif isinstance(obj, list):
+            stack.extend(obj)
+        elif isinstance(obj, dict):
+            stack.extend(obj.values())
+        elif isinstance(obj, Stream):
+            # The length is written as a direct number
+            stack.extend(value for key, value in obj.attributes.items() if key != b'Length')
+
+
+def merge_pdf_files(pdf_list: list, output_file: str) -> None:
+    """Concatenate the pages of several PDF files into a new one.
+
+    The pages are copied with every object they use, and the content
+    streams are not decoded. Outlines and named destinations are dropped.
+
+    Args:
+        pdf_list: The paths to the PDF files, in order.
+        output_file: The path to the merged PDF file.
+    """
+    objects: dict = {}
+    kids: list = []
+    next_num = 3
+    for path in pdf_list:
+        document = Document(path)
+        refs: dict = {}
+        queue: list = []
+
+        def allocate(ref: Ref) -> None:
+            nonlocal next_num
+            if ref.num not in refs:
+                refs[ref.num] = next_num
+                next_num += 1
+                queue.append(ref)
+
+        pages = document.get_pages()
+        page_attributes: dict = {}
+        for ref, inherited in pages:
+            if not isinstance(ref, Ref):
+                raise PdfError(f'Direct page object in {path}')
+            allocate(ref)
+            kids.append(Ref(refs[ref.num], 0))
+            page_attributes[ref.num] = inherited
+        while queue:
+            ref = queue.pop()
+            obj = document.get_object(ref.num)
+            if ref.num in page_attributes:
+                obj = {key: value for key, value in obj.items() if key != b'Parent'}
+                for attribute, value in page_attributes[ref.num].items():
+                    obj.setdefault(attribute, value)
+            found: list = []
+            find_refs(obj, found)
+            for child in found:
+                allocate(child)
+            content = serialize(obj, refs)
+            if ref.num in page_attributes:
+                content = content[:-2] + b'/Parent 2 0 R>>'
+            objects[refs[ref.num]] = content
+
+    objects[1] = b'<</Type /Catalog /Pages 2 0 R>>'
+    objects[2] = (b'<</Type /Pages /Kids [' + b' '.join(f'{kid.num} 0 R'.encode() for kid in kids)
+                  + f'] /Count {len(kids)}>>'.encode())
+    with open(output_file, 'wb') as f:
+        f.write(b'%PDF-1.5\n%\xe2\xe3\xcf\xd3\n')
+        offsets = [0] * next_num
+        for num in range(1, next_num):
+            offsets[num] = f.tell()
+            f.write(f'{num} 0 obj\n'.encode() + objects.get(num, b'null') + b'\nendobj\n')
+        xref_offset = f.tell()
+        f.write(f'xref\n0 {next_num}\n0000000000 65535 f \n'.encode())
+        for num in range(1, next_num):
+            f.write(f'{offsets[num]:010d} 00000 n \n'.encode())
+        f.write(f'trailer\n<</Size {next_num} /Root 1 0 R>>\nstartxref\n{xref_offset}\n%%EOF\n'.encode())
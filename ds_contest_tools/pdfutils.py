@@ -1,15 +1,27 @@
+import hashlib
+import importlib.util
 import os
+import re
+import shutil
 import subprocess
 import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pipe, Process
 from typing import Optional
 
 from . import config
-from .latexutils import clean_auxiliary_files, print_to_latex
-from .logger import error_log, info_log
+from .latexutils import END_OF_DUMP, print_to_latex
+from .logger import debug_log, error_log, info_log, warning_log
 from .metadata import Paths
+from .pdfmerge import merge_pdf_files
 from .utils import check_subprocess_output, verify_path
 
 MERGE_TOOL = 'pdfjam'
+RESOURCE_PATTERN = re.compile(
+    rb'\\(?:includegraphics|input|include)\s*(?:\[[^\]]*\])?\s*\{([^}]+)\}')
+RESOURCE_EXTENSIONS = ['', '.tex', '.pdf', '.png', '.jpg', '.jpeg', '.eps']
 
 
 def build_merge_command(pdf_list: list, output_file: str) -> list:
@@ -30,8 +42,25 @@ def build_merge_command(pdf_list: list, output_file: str) -> list:
     return command
 
 
+def merge_pdf_files_with_pypdf(pdf_list: list, output_file: str) -> None:
+    """Merges multiple PDF files into a single PDF file with pypdf.
+
+    Args:
+        pdf_list: A list of strings representing the paths to the PDF files to be merged.
+        output_file: A string representing the path to the output file to be generated.
+    """
+    from pypdf import PdfWriter
+    writer = PdfWriter()
+    for pdf in pdf_list:
+        writer.append(pdf)
+    with open(output_file, 'wb') as f:
+        writer.write(f)
+
+
 def merge_pdfs(pdf_list: list, output_file: str) -> None:
-    """Merges multiple PDF files into a single PDF file.
+    """Merges multiple PDF files into a single PDF file. The pages are
+    copied by pypdf, if it is installed, or by the built-in merger, and
+    pdfjam is used only if they fail.
 
     Args:
         pdf_list: A list of strings representing the paths to the PDF files to be merged.
@@ -40,6 +69,22 @@ def merge_pdfs(pdf_list: list, output_file: str) -> None:
     pdfs: str = ' '.join(os.path.basename(pdf) for pdf in pdf_list)
     info_log(f"Merging {pdfs}")
 
+    mergers = [('built-in merger', merge_pdf_files)]
+    if importlib.util.find_spec('pypdf') is not None:
+        mergers.insert(0, ('pypdf', merge_pdf_files_with_pypdf))
+    error = None
+    for name, merger in mergers:
+        try:
+            merger(pdf_list, output_file)
+            info_log("PDFs Merged")
+            return
+        except Exception as e:
+            error = e
+            debug_log(f"Could not merge PDFs with the {name}: {e}")
+    if not shutil.which(MERGE_TOOL):
+        error_log(f"Error merging PDFs: {error}.")
+    warning_log(f"Could not merge PDFs ({error}). Merging with {MERGE_TOOL}.")
+
     command: list = build_merge_command(pdf_list, output_file)
     p = subprocess.run(command, stdout=subprocess.PIPE,
                        stderr=subprocess.PIPE)
@@ -67,34 +112,334 @@ def build_pdf(problem_folder: Optional[str] = '', output_directory: Optional[str
     folder = problem_folder if output_directory == '' else output_directory
 
     tex_filename = os.path.basename(problem_folder) + '.tex'
-    tex_filepath = os.path.join(problem_folder, tex_filename)
-    generate_pdf(problem_folder, folder, tex_filepath)
+    tex_paths = [os.path.join(problem_folder, tex_filename)]
 
     # Generate tutorial PDF from tex file
     tutorial_filename = os.path.basename(problem_folder)+'-tutorial.tex'
     tutorial_filepath = os.path.join(problem_folder, tutorial_filename)
     if os.path.isfile(tutorial_filepath):
-        generate_pdf(problem_folder, folder, tutorial_filepath)
+        tex_paths.append(tutorial_filepath)
+    generate_pdfs(problem_folder, folder, tex_paths)
+
+
+def run_pdf_build(conn, problem_folder: str, output_directory: str, options: dict) -> None:
+    """Build the PDFs and report whether they were built.
+
+    Args:
+        conn: The connection used to send the result.
+        problem_folder: The path to the problem folder.
+        output_directory: The path to the output directory.
+        options: A dictionary containing the options to pass to the LaTeX compiler.
+    """
+    built = False
+    try:
+        build_pdf(problem_folder, output_directory, options)
+        built = True
+    finally:
+        conn.send(built)
+        conn.close()
+
+
+def start_pdf_build(problem_folder: Optional[str] = '', output_directory: Optional[str] = '', options=config.DEFAULT_PDF_OPTIONS) -> tuple:
+    """Start building the problem and tutorial PDFs in another process, so
+    they are built while the solutions are judged.
+
+    Args:
+        problem_folder: The path to the problem folder. If empty, the default problem folder is used.
+        output_directory: The path to the output directory. If empty, the default problem folder is used.
+        options: A dictionary containing the options to pass to the LaTeX compiler.
+
+    Returns:
+        The build process and the connection that receives its result.
+    """
+    conn_recv, conn_sender = Pipe(duplex=False)
+    process = Process(target=run_pdf_build, args=(
+        conn_sender, problem_folder, output_directory, options))
+    process.start()
+    conn_sender.close()
+    return process, conn_recv
+
+
+def finish_pdf_build(pdf_build: tuple) -> None:
+    """Wait for the PDFs started by start_pdf_build.
+
+    Args:
+        pdf_build: The build process and the connection that receives its result.
+    """
+    process, conn_recv = pdf_build
+    try:
+        built = conn_recv.recv()
+    except EOFError:
+        built = False
+    process.join()
+    conn_recv.close()
+    if not built:
+        error_log("Generation of problem PDF failed.")
 
 
-def generate_pdf(problem_folder: str, output_folder: str, tex_path: str) -> None:
-    """Generates a PDF from a tex file.
+def generate_pdfs(problem_folder: str, output_folder: str, tex_paths: list, resource_folders: list = None) -> None:
+    """Generates the PDFs of several tex files at the same time.
 
     Args:
+        problem_folder: The folder LaTeX is run from.
         output_folder: The path to the output folder.
+        tex_paths: The paths to the tex files.
+        resource_folders: Other folders where included files are searched.
+    """
+    with ThreadPoolExecutor(max_workers=max(len(tex_paths), 1)) as executor:
+        futures = [executor.submit(generate_pdf, problem_folder, output_folder, tex_path,
+                                   resource_folders)
+                   for tex_path in tex_paths]
+        for future in futures:
+            future.result()
+
+
+def resource_digest(path: str, folders: list, digest, visited: set) -> None:
+    """Hash a LaTeX file together with the files it includes.
+
+    Args:
+        path: Path to the file.
+        folders: The folders where included files are searched.
+        digest: The hash object to be updated.
+        visited: Files already hashed, to stop on include cycles.
+    """
+    visited.add(os.path.abspath(path))
+    with open(path, 'rb') as f:
+        content = f.read()
+    digest.update(content)
+    digest.update(b'\0')
+    if not path.endswith(('.tex', '.cls')):
+        return
+    for resource in RESOURCE_PATTERN.findall(content):
+        resource_paths = [os.path.join(folder, resource.decode().strip() + extension)
+                          for folder in folders for extension in RESOURCE_EXTENSIONS]
+        for resource_path in resource_paths:
+            if os.path.isfile(resource_path):
+                if os.path.abspath(resource_path) not in visited:
+                    resource_digest(resource_path, folders, digest, visited)
+                break
+
+
+def get_pdf_cache_path(problem_folder: str, tex_path: str, resource_folders: list = None) -> str:
+    """Return the cache entry of the PDF of a tex file.
+
+    The key is computed from the tex file, which already contains the
+    statement and the sample tests, the LaTeX class, the included files and
+    the LaTeX installation.
+
+    Args:
+        problem_folder: The folder LaTeX is run from.
+        tex_path: The path to the tex file.
+        resource_folders: Other folders where included files are searched.
+
+    Returns:
+        The path of the cache entry.
+    """
+    folders = [problem_folder] + (resource_folders or [])
+    digest = hashlib.sha1()
+    pdflatex = shutil.which('pdflatex') or ''
+    digest.update(pdflatex.encode())
+    if pdflatex:
+        digest.update(str(os.stat(pdflatex).st_mtime_ns).encode())
+    visited: set = set()
+    resource_digest(tex_path, folders, digest, visited)
+    resource_digest(os.path.join(problem_folder, 'maratona.cls'),
+                    folders, digest, visited)
+    key = digest.hexdigest()
+    return os.path.join(config.PDF_CACHE_DIR, key[:2], key + '.pdf')
+
+
+def copy_pdf(src: str, dest: str) -> None:
+    """Copy a PDF, replacing the destination atomically. PDFs are not
+    hardlinked, as LaTeX overwrites its output in place.
+
+    Args:
+        src: Path to the existing PDF.
+        dest: Path of the copy.
+    """
+    tmp_dest = f'{dest}.{os.getpid()}'
+    shutil.copyfile(src, tmp_dest)
+    os.replace(tmp_dest, dest)
+
+
+def get_latex_format(problem_folder: str, tex_path: str) -> str:
+    """Return the precompiled format of the preamble of a tex file, dumping
+    it with mylatexformat on first use.
+
+    Formats are indexed by the preamble, the LaTeX class and the LaTeX
+    installation, so the statements of every problem share the same format.
+    A format that failed is not tried again for LATEX_FORMAT_RETRY_TIME
+    seconds, or until the LaTeX installation changes.
+
+    Args:
+        problem_folder: The folder LaTeX is run from.
+        tex_path: The path to the tex file.
+
+    Returns:
+        The name of the format, or an empty string if it cannot be dumped.
+    """
+    with open(tex_path, 'r') as f:
+        content = f.read()
+    ends = [i for i in [content.find(END_OF_DUMP), content.find('\\begin{document}')] if i >= 0]
+    if not ends:
+        return ''
+
+    digest = hashlib.sha1()
+    pdflatex = shutil.which('pdflatex') or ''
+    digest.update(pdflatex.encode())
+    if pdflatex:
+        digest.update(str(os.stat(pdflatex).st_mtime_ns).encode())
+    digest.update(content[:min(ends)].encode())
+    cls_file = os.path.join(problem_folder, 'maratona.cls')
+    if os.path.isfile(cls_file):
+        with open(cls_file, 'rb') as f:
+            digest.update(f.read())
+    name = 'ds-' + digest.hexdigest()
+    format_path = os.path.join(config.LATEX_FORMAT_DIR, name + '.fmt')
+    if os.path.isfile(format_path):
+        return name
+    if is_latex_format_failed(name):
+        return ''
+    return name if dump_latex_format(problem_folder, tex_path, name) else ''
+
+
+def is_latex_format_failed(name: str) -> bool:
+    """Check if a format failed recently. Expired records are removed.
+
+    Args:
+        name: The name of the format.
+    """
+    failed_path = os.path.join(config.LATEX_FORMAT_DIR, name + '.failed')
+    try:
+        failed_time = os.path.getmtime(failed_path)
+    except OSError:
+        return False
+    if time.time() - failed_time < config.LATEX_FORMAT_RETRY_TIME:
+        return True
+    try:
+        os.remove(failed_path)
+    except OSError:
+        pass
+    return False
+
+
+def dump_latex_format(problem_folder: str, tex_path: str, name: str) -> bool:
+    """Dump the preamble of a tex file into a precompiled format. A failed
+    dump is recorded, so it is not tried again for a while.
+
+    Args:
+        problem_folder: The folder LaTeX is run from.
         tex_path: The path to the tex file.
+        name: The name of the format.
+
+    Returns:
+        True if the format was dumped, False otherwise.
+    """
+    format_path = os.path.join(config.LATEX_FORMAT_DIR, name + '.fmt')
+    os.makedirs(config.LATEX_FORMAT_DIR, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix=config.TMP_PDF_PREFIX) as build_folder:
+        command = ['pdflatex', '-ini', f'-jobname={name}', '--output-directory', build_folder,
+                   '-interaction=nonstopmode', '&pdflatex', 'mylatexformat.ltx',
+                   os.path.abspath(tex_path)]
+        try:
+            p = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               cwd=problem_folder, timeout=config.LATEX_FORMAT_DUMP_TIMEOUT)
+            dumped = p.returncode == 0
+        except subprocess.TimeoutExpired:
+            dumped = False
+        built_format_path = os.path.join(build_folder, name + '.fmt')
+        if not dumped or not os.path.isfile(built_format_path):
+            debug_log(f'Could not dump the LaTeX format of {os.path.basename(tex_path)}')
+            discard_latex_format(name)
+            return False
+        tmp_format_path = f'{format_path}.{os.getpid()}'
+        shutil.copyfile(built_format_path, tmp_format_path)
+        os.replace(tmp_format_path, format_path)
+    return True
+
+
+def discard_latex_format(name: str) -> None:
+    """Remove a format that cannot be used and record it, so documents with
+    the same preamble are compiled without a format until the record
+    expires.
+
+    Args:
+        name: The name of the format.
     """
-    old_cwd = os.getcwd()
-    command = ["pdflatex", '--output-directory',
-               output_folder, '-interaction=nonstopmode', tex_path]
+    open(os.path.join(config.LATEX_FORMAT_DIR, name + '.failed'), 'w').close()
+    try:
+        os.remove(os.path.join(config.LATEX_FORMAT_DIR, name + '.fmt'))
+    except OSError:
+        pass
+
+
+def run_pdflatex(problem_folder: str, build_folder: str, tex_path: str, latex_format: str = '') -> subprocess.CompletedProcess:
+    """Compile a tex file into a build folder.
+
+    Args:
+        problem_folder: The folder LaTeX is run from.
+        build_folder: The folder LaTeX writes its files to.
+        tex_path: The path to the tex file.
+        latex_format: The name of the precompiled format. If empty, the
+            preamble is loaded from scratch.
 
-    os.chdir(problem_folder)
+    Returns:
+        The completed pdflatex process.
+    """
+    command = ["pdflatex", '--output-directory', build_folder,
+               '-interaction=nonstopmode', os.path.abspath(tex_path)]
+    env = None
+    if latex_format:
+        command.insert(1, f'-fmt={latex_format}')
+        env = dict(os.environ, TEXFORMATS=config.LATEX_FORMAT_DIR + os.pathsep)
     try:
-        p = subprocess.run(command, stdout=subprocess.PIPE,
-                           stderr=subprocess.PIPE, timeout=10)
+        return subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              cwd=problem_folder, timeout=10, env=env)
     except subprocess.TimeoutExpired:
         error_log("Timeout error while generating pdf. Maybe a package is missing?")
-    os.chdir(old_cwd)
 
-    clean_auxiliary_files(output_folder)
-    check_subprocess_output(p, "Generation of problem file failed.")
+
+def generate_pdf(problem_folder: str, output_folder: str, tex_path: str, resource_folders: list = None) -> None:
+    """Generates a PDF from a tex file, reusing the cached PDF if none of
+    its sources changed.
+
+    LaTeX writes its files in a temporary folder of its own, so several PDFs
+    can be compiled at the same time, and only the PDF is copied to the
+    output folder. The preamble is loaded from a precompiled format when
+    one can be dumped.
+
+    Args:
+        problem_folder: The folder LaTeX is run from.
+        output_folder: The path to the output folder.
+        tex_path: The path to the tex file.
+        resource_folders: Other folders where included files are searched.
+    """
+    pdf_filename = os.path.splitext(os.path.basename(tex_path))[0] + '.pdf'
+    pdf_path = os.path.join(output_folder, pdf_filename)
+    cache_path = get_pdf_cache_path(problem_folder, tex_path, resource_folders)
+    if os.path.isfile(cache_path):
+        copy_pdf(cache_path, pdf_path)
+        debug_log(f'Reused {os.path.basename(pdf_path)} from the PDF cache')
+        return
+
+    with tempfile.TemporaryDirectory(prefix=config.TMP_PDF_PREFIX) as build_folder:
+        latex_format = get_latex_format(problem_folder, tex_path)
+        p = run_pdflatex(problem_folder, build_folder, tex_path, latex_format)
+        if p.returncode and latex_format:
+            debug_log(f'Compiling {os.path.basename(tex_path)} without the LaTeX format {latex_format}')
+            p = run_pdflatex(problem_folder, build_folder, tex_path)
+            # Only a document that compiles without the format proves the
+            # format is broken, otherwise the error is in the document
+            if not p.returncode:
+                discard_latex_format(latex_format)
+        check_subprocess_output(p, "Generation of problem file failed.")
+
+        built_pdf_path = os.path.join(build_folder, pdf_filename)
+        if not os.path.isfile(built_pdf_path):
+            return
+        copy_pdf(built_pdf_path, pdf_path)
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            copy_pdf(built_pdf_path, cache_path)
+        except OSError as e:
+            debug_log(f'Could not store {pdf_path} in the PDF cache: {e}')
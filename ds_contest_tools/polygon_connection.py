@@ -18,7 +18,7 @@ from .config import custom_key
 from .jsonutils import parse_json, write_to_json
 from .logger import debug_log, error_log, info_log
 from .metadata import Paths
-from .utils import convert_to_bytes, verify_path
+from .utils import convert_to_bytes, load_problem_metadata
 
 URL = 'https://polygon.codeforces.com/api/'
 RETRIES = 3
@@ -240,8 +240,7 @@ def check_polygon_id(problem_id: Union[str, None]) -> str:
         The ID of the problem, if it is defined.
     """
     metadata_path = os.path.join(Paths().get_problem_dir(), 'problem.json')
-    verify_path(metadata_path)
-    problem_metadata = parse_json(metadata_path)
+    problem_metadata = load_problem_metadata(Paths().get_problem_dir())
 
     if problem_id:
         problem_metadata['polygon_config']['id'] = problem_id
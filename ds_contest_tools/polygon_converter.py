@@ -5,13 +5,13 @@ import xml.etree.ElementTree as ET
 from typing import Optional
 
 from .config import IGNORED_DIRS
-from .fileutils import get_statement_files, unzip_package
+from .fileutils import export_file, get_statement_files, unzip_package
 from .jsonutils import parse_json, write_to_json
 from .logger import info_log, warning_log
 from .metadata import Paths
 from .polygon_connection import download_package_polygon, make_api_request
 from .toolchain import init_problem
-from .utils import verify_path,verify_file
+from .utils import load_problem_metadata, verify_path,verify_file
 
 DEFAULT_LANGUAGE = 'english'
 
@@ -94,7 +94,7 @@ def copy_input_files() -> None:
     destination = os.path.join(problem_folder, 'input')
     for filepath in file_list:
         new_filename = os.path.basename(filepath).lstrip('0')
-        shutil.copy(filepath, os.path.join(destination, new_filename))
+        export_file(filepath, os.path.join(destination, new_filename))
 
 
 def copy_output_files() -> None:
@@ -107,7 +107,7 @@ def copy_output_files() -> None:
         new_filename = os.path.splitext(
             os.path.basename(filepath))[0].lstrip('0')
         new_filepath = os.path.join(destination, new_filename)
-        shutil.copy(filepath, new_filepath)
+        export_file(filepath, new_filepath)
 
 
 def copy_interactive_files() -> None:
@@ -122,7 +122,7 @@ def copy_interactive_files() -> None:
             '.a') else destination_input
         new_filename = os.path.basename(filepath).lstrip(
             'example.').lstrip('0').rstrip('.a') + '.interactive'
-        shutil.copy(filepath, os.path.join(destination, new_filename))
+        export_file(filepath, os.path.join(destination, new_filename))
 
 
 def copy_generator(script: str) -> None:
@@ -491,7 +491,7 @@ def update_problem_metadata(title: str, solutions: dict, interactive: bool, prob
 
     # Get problem metadata
     tags = get_tags()
-    problem_metadata = parse_json(json_path)
+    problem_metadata = load_problem_metadata(problem_folder)
     package_json = parse_json(package_json_path)
 
     # Update problem metadata
@@ -2,13 +2,12 @@ import os
 from typing import Dict, List, Tuple, Union
 
 from .fileutils import get_statement_files
-from .jsonutils import parse_json
 from .logger import error_log, warning_log
-from .metadata import Paths
+from .metadata import Paths, ProblemConfig
 from .polygon_connection import (check_polygon_id, submit_concurrent_testcases,
                                  submit_requests_list)
 from .toolchain import generate_inputs
-from .utils import check_problem_metadata, verify_path
+from .utils import load_problem_config, verify_path
 
 LANGUAGE = 'english'
 ENCODING = 'utf-8'
@@ -17,18 +16,18 @@ VERIFY_IO_STATEMENT = True
 IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'svg', 'bmp', 'ico'}
 
 
-def update_info(problem_metadata: dict) -> tuple:
+def update_info(problem_config: ProblemConfig) -> tuple:
     """Get general information parameters of the problem.
 
     Args:
-        problem_metadata: A dictionary containing metadata about the problem.
+        problem_config: The problem configuration.
 
     Returns:
         A tuple containing the method and the parameters for the request.
     """
-    interactive: bool = problem_metadata['interactive']
-    time_limit: int = problem_metadata['time_limit'] * 1000
-    memory_limit: int = problem_metadata['memory_limit_mb']
+    interactive: bool = problem_config.interactive
+    time_limit: int = problem_config.time_limit * 1000
+    memory_limit: int = problem_config.memory_limit_mb
 
     if not 250 <= time_limit <= 15000:
         error_log("Time limit is only between 0.25s and 15s.")
@@ -37,8 +36,8 @@ def update_info(problem_metadata: dict) -> tuple:
         error_log("Memory limit is only between 4MB and 1024MB.")
 
     params: dict = {
-        'inputFile': problem_metadata['input_file'],
-        'outputFile': problem_metadata['output_file'],
+        'inputFile': problem_config.input_file,
+        'outputFile': problem_config.output_file,
         'interactive': str(interactive).lower(),
         'timeLimit': time_limit,
         'memoryLimit': memory_limit
@@ -454,9 +453,7 @@ def get_requests_list(problem_id: str, manual_testcases: bool) -> List[Tuple[str
         A list of tuples, where each tuple contains the method and the 
         parameters for the request.
     """
-    path_json = os.path.join(Paths().get_problem_dir(), 'problem.json')
-    problem_metadata = parse_json(path_json)
-    check_problem_metadata(problem_metadata)
+    problem_config = load_problem_config(Paths().get_problem_dir())
 
     tmp_folder = os.path.join(Paths().get_tmp_output_dir(), 'scripts')
     if not manual_testcases:
@@ -464,30 +461,30 @@ def get_requests_list(problem_id: str, manual_testcases: bool) -> List[Tuple[str
     requests_list = []
 
     # Get general information parameters of the problem
-    requests_list.append(update_info(problem_metadata['problem']))
+    requests_list.append(update_info(problem_config))
 
     # Get statement parameters of the problem
-    interactive = problem_metadata['problem']['interactive']
+    interactive = problem_config.interactive
     requests_list.append(save_statement(
-        problem_metadata['problem']['title'], interactive))
+        problem_config.title, interactive))
 
     # Get tags parameters of the problem
-    tags = problem_metadata['problem']['subject']['en_us']
+    tags = problem_config.subject['en_us']
     requests_list.append(save_tags(tags))
 
     # Get statement resources parameters of the problem
     requests_list += save_statement_resources()
 
     # Get source and solution files of the problem
-    grader = problem_metadata['problem']['grader']
-    requests_list += save_files(problem_metadata['solutions'], interactive, grader)
+    grader = problem_config.grader
+    requests_list += save_files(problem_config.solutions, interactive, grader)
 
     # Get test parameters of the problem
     if manual_testcases:
-        save_manual_testcases(problem_id, problem_metadata['io_samples'])
+        save_manual_testcases(problem_id, problem_config.io_samples)
     else:
         requests_list += save_testcases(
-            problem_metadata['io_samples'], interactive, tmp_folder)
+            problem_config.io_samples, interactive, tmp_folder)
 
     return requests_list
 
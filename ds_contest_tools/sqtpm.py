@@ -1,10 +1,9 @@
 import os
 import shutil
 
-from .jsonutils import parse_json
 from .logger import error_log, info_log
 from .metadata import Paths
-from .utils import check_problem_metadata, verify_path
+from .utils import load_problem_config, verify_path
 
 
 def create_config(showcases: str, memory_limit: int, cputime: int) -> None:
@@ -186,19 +185,18 @@ def convert_to_sqtpm() -> None:
     info_log("Starting SQTPM conversion.")
     problem_folder = Paths().get_problem_dir()
     output_folder = Paths().get_output_dir()
-    problem_metadata = parse_json(os.path.join(problem_folder, 'problem.json'))
-    check_problem_metadata(problem_metadata)
+    problem_config = load_problem_config(problem_folder)
     pdf_name = os.path.basename(os.path.normpath(problem_folder))
     os.makedirs(os.path.join(output_folder, 'src'), exist_ok=True)
 
     copy_pdf(pdf_name)
     copy_generator_script()
-    copy_source_files(problem_metadata['solutions']['main-ac'])
+    copy_source_files(problem_config.solutions['main-ac'])
 
     create_makefile()
     create_html_statement(os.path.basename(
         os.path.normpath(output_folder)), pdf_name)
     create_config(' '.join([str(x).zfill(3) for x in list(
-        range(1, problem_metadata['io_samples'] + 1))]),
-        problem_metadata['problem']['memory_limit_mb'],
-        problem_metadata['problem']['time_limit'])
+        range(1, problem_config.io_samples + 1))]),
+        problem_config.memory_limit_mb,
+        problem_config.time_limit)
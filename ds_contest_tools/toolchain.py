@@ -4,17 +4,17 @@ import shutil
 import subprocess
 from typing import Dict
 
-from .checker import run_solutions
-from .config import (IGNORED_DIRS, JAVA_INTERPRETER,
-                     JAVA_FLAG, PYTHON3_INTERPRETER,
-                     custom_key)
-from .htmlutils import print_to_html
-from .jsonutils import parse_json, write_to_json
+from .compilecache import (get_compile_targets, restore_from_cache,
+                           store_in_cache)
+from .config import (CACHE_DIR, CPP_COMPILER, IGNORED_DIRS,
+                     JAVA_BATCH_COMPILER_PATH, MEMORY_BUDGET_SHARE, custom_key)
+from .jsonutils import write_to_json
 from .logger import debug_log, error_log, info_log, warning_log
-from .metadata import Paths, Problem, Solution
-from .utils import (check_problem_metadata, check_subprocess_output,
-                    copy_files, verify_path)
-from .checker import memory_monitor
+from .metadata import Paths, Problem, ProblemConfig, Solution
+from .utils import (check_subprocess_output, compile_python_files, copy_files,
+                    create_java_cds_archive, get_python_interpreter,
+                    java_command, load_problem_config, load_problem_metadata,
+                    sync_files, verify_path)
 
 
 def init_problem(interactive: bool, grader: bool, verify_folder: bool = True, ignore_patterns: list = IGNORED_DIRS) -> None:
@@ -40,7 +40,7 @@ def init_problem(interactive: bool, grader: bool, verify_folder: bool = True, ig
         os.remove(os.path.join(problem_folder, file))
 
     # Verify grader problem
-    problem_json = parse_json(json_path)
+    problem_json = load_problem_metadata(problem_folder)
     if grader:
         problem_json['problem']['grader'] = True
         write_to_json(json_path, problem_json)
@@ -68,41 +68,151 @@ def init_problem(interactive: bool, grader: bool, verify_folder: bool = True, ig
         os.remove(interactor)
 
 
-def prepare_grader_problem(grader_folder: str, handler_folder: str, problem_json: dict) -> None:
-    """Create temporary folders to compile grader problem.
+def prepare_grader_problem(grader_folder: str, handler_folder: str, problem_config: ProblemConfig) -> None:
+    """Update the folders used to compile grader problem.
+
+    The folders are kept between builds, so make only rebuilds the targets
+    whose files changed.
 
     Args:
         grader_folder: Path to the grader folder.
         handler_folder: Path to the handler folder.
-        problem_json: Dictionary containing the values of problem.json.
+        problem_config: The problem configuration.
     """
     src_dir = 'src'
     grader_files = set()
     grader_files.add('grader.cpp')
 
-    # Copy grader libs to grader folder
+    # Grader libs go to the grader folder
     all_files = set([f for f in os.listdir(src_dir)
                     if not os.path.isdir(os.path.join(src_dir, f))])
     grader_libs = [f for f in all_files if f.endswith(
         '.h') and f != 'testlib.h']
-    copy_files(src_dir, grader_folder, grader_libs)
     grader_files.update(grader_libs)
 
-    # Copy solutions to grader folder
-    for solution in problem_json['solutions'].values():
+    # Solutions go to the grader folder
+    solutions = set()
+    for solution in problem_config.solutions.values():
         if isinstance(solution, str):
             solution = [solution]
-        solution = [f for f in solution if f.endswith('.cpp')]
-        copy_files(src_dir, grader_folder, solution)
-        grader_files.update(solution)
+        solutions.update(f for f in solution if f.endswith('.cpp'))
+    grader_files.update(solutions)
+    sync_files(src_dir, grader_folder, grader_libs + list(solutions))
 
-    # Copy other files to handler folder
+    # Other files go to the handler folder
     other_files = all_files - grader_files
-    copy_files(src_dir, handler_folder, other_files)
+    sync_files(src_dir, handler_folder, other_files)
+
+
+def get_compiler_version() -> bytes:
+    """Return the version information of the C++ compiler.
+
+    Returns:
+        The output of the compiler version command.
+    """
+    p = subprocess.run([CPP_COMPILER, '--version'],
+                       stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    check_subprocess_output(p, "Could not get the compiler version.")
+    return p.stdout
+
+
+def prepare_testlib_header(compiler_version: bytes) -> str:
+    """Place the problem testlib.h in a directory shared by problems with
+    the same testlib.h and compiler version, where the Makefile keeps its
+    precompiled headers.
+
+    Args:
+        compiler_version: The version information of the C++ compiler.
+
+    Returns:
+        The path to the precompiled header directory.
+    """
+    testlib_path = os.path.join('src', 'testlib.h')
+    with open(testlib_path, 'rb') as f:
+        testlib = f.read()
+    key = hashlib.sha1(compiler_version + testlib).hexdigest()
+    pch_dir = os.path.join(CACHE_DIR, 'pch', key)
+    header = os.path.join(pch_dir, 'testlib.h')
+    if not os.path.isfile(header):
+        os.makedirs(pch_dir, exist_ok=True)
+        tmp_header = f'{header}.{os.getpid()}'
+        shutil.copy2(testlib_path, tmp_header)
+        os.replace(tmp_header, header)
+    return pch_dir
+
+
+def get_required_targets(problem_config: ProblemConfig, all_solutions: bool = False, specific_solution: str = '',
+                         no_validator: bool = False, no_generator: bool = False, no_checker: bool = False,
+                         debug: bool = False) -> list:
+    """Get the Makefile targets needed to build the problem with the given options.
+
+    Must be called from the problem directory.
+
+    Args:
+        problem_config: The problem configuration.
+        all_solutions: Boolean indicating whether all solutions will be run.
+        specific_solution: String containing name of the solution to run.
+        no_validator: Boolean indicating whether the validator will not be run.
+        no_generator: Boolean indicating whether the generators will not be run.
+        no_checker: Boolean indicating whether the checker will not be run.
+        debug: Boolean indicating whether to build debug executables too.
+
+    Returns:
+        A list of targets relative to the problem directory.
+    """
+    src_folder = 'src'
+    programs = set()
+    script_path = os.path.join(src_folder, 'script.sh')
+    if not no_generator and os.path.isfile(script_path):
+        with open(script_path, 'r') as f:
+            programs.update(line.split()[0] for line in f if line.split())
+    if not no_validator:
+        programs.add('validator')
+    if not no_checker:
+        programs.add('checker')
+    if problem_config.interactive:
+        programs.add('interactor')
 
+    # Main solution is always needed to produce the outputs
+    solution_files = {problem_config.solutions['main-ac']}
+    for files in problem_config.solutions.values():
+        if isinstance(files, str):
+            files = [files]
+        for f in files:
+            if all_solutions or f == specific_solution:
+                solution_files.add(f)
+
+    targets = []
+    for f in solution_files:
+        name, ext = os.path.splitext(f)
+        if ext == '.java':
+            targets.append(os.path.join('java', '.compiled'))
+        elif ext in ['.c', '.cpp']:
+            targets.append(name)
+    targets += [program for program in programs
+                if os.path.isfile(os.path.join(src_folder, program + '.cpp'))]
+    if not no_checker and os.path.isfile(os.path.join(src_folder, 'checker.cpp')):
+        targets.append('checker-boca')
+
+    folders = ['bin', os.path.join('bin', 'debug')] if debug else ['bin']
+    return sorted(set(os.path.join(folder, target) for folder in folders for target in targets))
+
+
+def build_executables(no_checker: bool = False, all_solutions: bool = False, specific_solution: str = '',
+                      no_validator: bool = False, no_generator: bool = False, debug: bool = False,
+                      java_cds: bool = False) -> None:
+    """Run Makefile to create the executables needed by the given options.
 
-def build_executables(no_checker: bool = False) -> None:
-    """Run Makefile to create release and debug executables."""
+    Args:
+        no_checker: Boolean indicating whether the checker will not be run.
+        all_solutions: Boolean indicating whether all solutions will be run.
+        specific_solution: String containing name of the solution to run.
+        no_validator: Boolean indicating whether the validator will not be run.
+        no_generator: Boolean indicating whether the generators will not be run.
+        debug: Boolean indicating whether to build debug executables too.
+        java_cds: Boolean indicating whether to create class data sharing archives
+            of the Java solutions.
+    """
     old_cwd = os.getcwd()
     os.chdir(Paths().get_problem_dir())
 
@@ -114,28 +224,53 @@ def build_executables(no_checker: bool = False) -> None:
         verify_path(os.path.join('src', 'checker.cpp'))
 
     # Verify grader problem
-    problem_json = parse_json('problem.json')
-    check_problem_metadata(problem_json)
-    grader_problem = problem_json['problem']['grader']
+    problem_config = load_problem_config(os.getcwd())
     grader_folder = os.path.join('src', 'grader')
     handler_folder = os.path.join('src', 'handler')
-    if grader_problem:
-        prepare_grader_problem(grader_folder, handler_folder, problem_json)
+    if problem_config.grader:
+        prepare_grader_problem(grader_folder, handler_folder, problem_config)
 
     info_log("Compiling executables")
-    command = ['make', '-j']
+    compiler_version = get_compiler_version()
+    command = ['make', '-j',
+               f'PCH_DIR={prepare_testlib_header(compiler_version)}',
+               f'JAVA_BATCH_COMPILER={JAVA_BATCH_COMPILER_PATH}']
+    command += get_required_targets(problem_config, all_solutions, specific_solution,
+                                    no_validator, no_generator, no_checker, debug)
+    targets = get_compile_targets(command, compiler_version)
+    restore_from_cache(targets)
     p = subprocess.run(command,
                        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
     check_subprocess_output(p, "Makefile failed.")
+    store_in_cache(targets)
+    if java_cds:
+        create_java_cds_archives(problem_config)
+    os.chdir(old_cwd)
 
-    if grader_problem:
-        shutil.rmtree(grader_folder)
-        shutil.rmtree(handler_folder)
 
-    os.chdir(old_cwd)
+def create_java_cds_archives(problem_config: ProblemConfig) -> None:
+    """Create the class data sharing archives of the compiled Java solutions.
+
+    Must be called from the problem directory.
 
+    Args:
+        problem_config: The problem configuration.
+    """
+    for files in problem_config.solutions.values():
+        if isinstance(files, str):
+            files = [files]
+        for f in files:
+            name, ext = os.path.splitext(f)
+            # The archive records the class path, which must match the one
+            # used on the runs
+            class_folder = os.path.abspath(os.path.join('bin', 'java', name))
+            if ext != '.java' or not os.path.isdir(class_folder):
+                continue
+            if not create_java_cds_archive(class_folder, name):
+                warning_log(f'Could not create the class data sharing archive of {f}.')
 
-def run_programs(all_solutions: bool = False, specific_solution: str = '', cpu_number: int = 1, no_validator: bool = False, no_generator: bool = False, no_checker: bool = False, no_output: bool = False) -> None:
+
+def run_programs(all_solutions: bool = False, specific_solution: str = '', cpu_number: int = 1, no_validator: bool = False, no_generator: bool = False, no_checker: bool = False, no_output: bool = False, memory_share: float = MEMORY_BUDGET_SHARE, keep_outputs: bool = False, java_cds: bool = False, pdf: bool = False) -> None:
     """
     Run the executables to create the problem.
 
@@ -147,6 +282,10 @@ def run_programs(all_solutions: bool = False, specific_solution: str = '', cpu_n
         no_generator: Boolean indicating whether to run the generator or not.
         no_checker: Boolean indicating whether to run the checker or not.
         no_output: Boolean indicating whether to generate output files or not.
+        memory_share: Share of the available RAM that running solutions may commit.
+        keep_outputs: Boolean indicating whether to keep the outputs of every test.
+        java_cds: Boolean indicating whether to run Java solutions with class data sharing archives.
+        pdf: Boolean indicating whether to build the PDFs while the solutions are judged.
     """
     problem_folder = Paths().get_problem_dir()
     input_folder = os.path.join(problem_folder, 'input')
@@ -154,28 +293,42 @@ def run_programs(all_solutions: bool = False, specific_solution: str = '', cpu_n
 
     os.makedirs(input_folder, exist_ok=True)
     os.makedirs(output_folder, exist_ok=True)
-    problem_metadata = parse_json(os.path.join(problem_folder, 'problem.json'))
-    check_problem_metadata(problem_metadata)
-    problem_obj = Problem(problem_metadata["problem"]["title"],
+    problem_config = load_problem_config(problem_folder)
+    problem_obj = Problem(problem_config.title,
                           problem_folder, input_folder,
-                          problem_metadata["problem"]["time_limit"],
-                          problem_metadata["problem"]["memory_limit_mb"])
+                          problem_config.time_limit,
+                          problem_config.memory_limit_mb,
+                          problem_config.interactive)
 
-    grader: bool = problem_metadata['problem']['grader']
+    grader: bool = problem_config.grader
     parse_solutions(
-        problem_obj, problem_metadata['solutions'], all_solutions, specific_solution, grader)
+        problem_obj, problem_config.solutions, all_solutions, specific_solution, grader, java_cds,
+        problem_config)
     if not no_generator:
         generate_inputs()
     if not no_validator:
         validate_inputs()
     if not no_output:
-        produce_outputs(problem_obj, problem_metadata)
+        produce_outputs(problem_obj, problem_config, java_cds)
+    # The PDFs only need the statement and the sample tests
+    pdf_build = None
+    if pdf:
+        from .pdfutils import start_pdf_build
+        pdf_build = start_pdf_build()
     if not no_checker:
+        # Judging modules are only loaded by the commands that run solutions
+        from .checker import run_solutions
+        from .fileutils import prewarm_problem_files
+        from .htmlutils import print_to_html
+        prewarm_problem_files(problem_folder)
         info_log("Running solutions")
-        run_solutions(problem_obj, cpu_number)
+        run_solutions(problem_obj, cpu_number, memory_share, keep_outputs)
         print_to_html(problem_obj)
     if grader:
         delete_grader_tmp_folder(problem_obj)
+    if pdf_build is not None:
+        from .pdfutils import finish_pdf_build
+        finish_pdf_build(pdf_build)
 
 
 def get_encoded_tests(folder: str) -> Dict[str, bytes]:
@@ -350,11 +503,12 @@ def generate_inputs(move: bool = True, output_folder: str = '') -> None:
     move_inputs(output_folder) if move else None
 
 
-def produce_outputs(problem_obj: Problem, problem_metadata: dict) -> None:
+def produce_outputs(problem_obj: Problem, problem_config: ProblemConfig, java_cds: bool = False) -> None:
     """Run main solution on inputs to produce the outputs.
 
     Args:
-        problem_metadata: Dictionary containing the values of problem.json.
+        problem_config: The problem configuration.
+        java_cds: Boolean indicating whether Java runs use class data sharing archives.
     """
     info_log("Producing outputs")
     problem_dir = Paths().get_problem_dir()
@@ -362,40 +516,38 @@ def produce_outputs(problem_obj: Problem, problem_metadata: dict) -> None:
     output_folder = os.path.join(problem_dir, 'output')
     input_files: list = [f for f in os.listdir(input_folder)
                          if not f.endswith('.interactive')]
+    main_solution_file = problem_config.solutions["main-ac"]
     main_solution = Solution(
-        problem_metadata["solutions"]["main-ac"], 'main-ac', problem_obj.problem_dir)
-    command = identify_language(main_solution).split()
-    interactive = problem_metadata["problem"]["interactive"]
-
-    # Create FIFO to run the interactive problem
-    if interactive:
-        tmp_fifo = os.path.join(output_folder, 'tmpfifo')
-        if os.path.exists(tmp_fifo):
-            info_log("Removing existing FIFO")
-            subprocess.run(['rm', tmp_fifo])
-        subprocess.run(['mkfifo', tmp_fifo])
+        main_solution_file, 'main-ac', problem_obj.problem_dir, java_cds,
+        get_python_interpreter(problem_config, main_solution_file))
+    command = identify_language(main_solution, java_cds=java_cds).split()
+    interactor: str = os.path.join(problem_dir, 'bin', 'interactor')
+    if problem_config.interactive:
+        from .checker import start_interactive
+        verify_path(interactor)
 
     for fname in input_files:
         inf_path: str = os.path.join(input_folder, fname)
         ouf_path: str = os.path.join(output_folder, fname)
-        with open(inf_path, 'r') as inf, open(ouf_path, 'w') as ouf:
-            if interactive:
-                interactor: str = os.path.join(
-                    problem_dir, 'bin', 'interactor')
-                verify_path(interactor)
-                command: list = [interactor, inf_path, ouf_path,
-                                 '<', tmp_fifo, '|', *command, '>', tmp_fifo]
-                p = subprocess.Popen(
-                    ' '.join(command), stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True)
-                p.wait()
-            else:
+        # Outputs may be hardlinked to exported tests, which must keep their contents
+        if os.path.exists(ouf_path):
+            os.remove(ouf_path)
+        if problem_config.interactive:
+            p, interactor_p = start_interactive(
+                command, interactor, inf_path, ouf_path)
+            _, stderr = p.communicate()
+            check_subprocess_output(subprocess.CompletedProcess(
+                p.args, p.returncode, '', stderr), f"Generation of output failed for input {fname}")
+            _, stderr = interactor_p.communicate()
+            check_subprocess_output(subprocess.CompletedProcess(
+                interactor_p.args, interactor_p.returncode, '', stderr), f"Interactor failed for input {fname}")
+        else:
+            with open(inf_path, 'r') as inf, open(ouf_path, 'w') as ouf:
                 p = subprocess.run(command, stdin=inf,
                                    stdout=ouf, stderr=subprocess.PIPE)
             check_subprocess_output(
                 p, f"Generation of output failed for input {fname}")
 
-    if interactive:
-        subprocess.run(['rm', tmp_fifo])
     info_log("Outputs produced in problem folder.")
 
 
@@ -412,7 +564,7 @@ def clean_files() -> None:
     os.chdir(old_cwd)
 
 
-def parse_solutions(problem_obj: Problem, solutions: dict, all_solutions, specific_solution: str, grader: bool) -> None:
+def parse_solutions(problem_obj: Problem, solutions: dict, all_solutions, specific_solution: str, grader: bool, java_cds: bool = False, problem_config: ProblemConfig = None) -> None:
     """Parse the solutions from the problem.json file.
 
     Args:
@@ -420,6 +572,9 @@ def parse_solutions(problem_obj: Problem, solutions: dict, all_solutions, specif
         solutions: Dictionary containing the solutions from the problem.json file.
         all_solutions: Boolean indicating whether to run all solution files.
         specific_solution: String containing name of the solution to run.
+        java_cds: Boolean indicating whether Java runs use class data sharing archives.
+        problem_config: The problem configuration, used to select the interpreter
+            of Python solutions.
     """
     if not specific_solution and not all_solutions:
         specific_solution = solutions['main-ac']
@@ -435,12 +590,13 @@ def parse_solutions(problem_obj: Problem, solutions: dict, all_solutions, specif
             if specific_solution and submission_file != specific_solution:
                 continue
             solution = Solution(
-                submission_file, expected_result, problem_obj.problem_dir)
-            solution.exec_args = identify_language(solution, grader)
+                submission_file, expected_result, problem_obj.problem_dir, java_cds,
+                get_python_interpreter(problem_config, submission_file), grader)
+            solution.exec_args = identify_language(solution, grader, java_cds)
             problem_obj.add_solution(solution)
 
 
-def identify_language(solution: Solution, grader: bool = False) -> str:
+def identify_language(solution: Solution, grader: bool = False, java_cds: bool = False) -> str:
     """
     Identifies the programming language of the solution and returns the appropriate command-line arguments.
 
@@ -448,6 +604,8 @@ def identify_language(solution: Solution, grader: bool = False) -> str:
         problem_obj: The problem being solved.
         solution: The solution to the problem.
         grader: Boolean indicating whether the problem is a grader.
+        java_cds: Boolean indicating whether to run Java solutions with their
+            class data sharing archives.
 
     Returns:
         The command-line arguments needed to execute the solution.
@@ -459,19 +617,33 @@ def identify_language(solution: Solution, grader: bool = False) -> str:
     if (ext == 'cpp' or ext == 'c'):
         exec_args = solution.solution_exec_file_path
     elif (ext == 'java'):
-        bin_folder: str = os.path.dirname(solution.solution_exec_file_path)
-        exec_args = f'{JAVA_INTERPRETER} {JAVA_FLAG} {bin_folder} {binary_file}'
+        # Each Java solution is compiled to its own folder
+        bin_folder: str = os.path.join(os.path.dirname(
+            solution.solution_exec_file_path), 'java', binary_file)
+        exec_args = ' '.join(java_command(bin_folder, binary_file, java_cds))
 
     elif (ext == 'py'):
+        # Solutions run from bytecode compiled by their interpreter, so the
+        # source is not compiled again on every test
         src_folder: str = os.path.dirname(solution.solution_exec_file_path)
         if grader:
             prepare_grader_solution(src_folder, solution)
+            grader_folder: str = os.path.join(src_folder, binary_file)
             submission_file = os.path.join(
-                src_folder, binary_file, solution.solution_name)
+                grader_folder, solution.solution_name)
+            compiled_file = os.path.join(grader_folder, f'{binary_file}.pyc')
+            compile_python_files(solution.python_interpreter, [
+                (submission_file, compiled_file),
+                (os.path.join(grader_folder, 'solution.py'), '')])
         else:
             submission_file = os.path.join(
                 src_folder, solution.solution_name)
-        exec_args = f'{PYTHON3_INTERPRETER} {submission_file}'
+            compiled_file = os.path.join(os.path.dirname(
+                src_folder), 'bin', 'python', f'{binary_file}.pyc')
+            compile_python_files(solution.python_interpreter, [
+                (submission_file, compiled_file)])
+        exec_args = ' '.join(
+            [solution.python_interpreter, *solution.python_run_flags, compiled_file])
     else:
         error_log(f'{solution.solution_name} has an invalid extension.')
 
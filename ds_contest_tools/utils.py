@@ -1,12 +1,30 @@
+import hashlib
+import json
+import logging
 import os
 import shutil
+import subprocess
+import time
+import zipfile
 from datetime import datetime
 from operator import mod
 from subprocess import CompletedProcess
 from typing import Optional, Union
 
-from .logger import convert_to_string, debug_log, error_log, setup_logger
-from .metadata import Paths
+from .config import (CACHE_DIR, JAVA_CDS_DUMP_FLAG, JAVA_CDS_DUMP_TIMEOUT,
+                     JAVA_CDS_FLAG, JAVA_FLAG, JAVA_INTERPRETER,
+                     JAVA_VM_MEMORY_TEST_FOLDER, JAVA_VM_TEST_FILE,
+                     PYTHON3_INTERPRETER, PYTHON_TIME_FACTORS, TMP_OUTPUT_PREFIX,
+                     VM_MEMORY_CACHE_PATH, TMP_OUTPUT_RETENTION_DAYS,
+                     TMP_OUTPUT_ROOTS, TMPFS_OUTPUT_ROOT)
+from .jsonutils import parse_json
+from .logger import (convert_to_string, debug_log, error_log, setup_logger,
+                     warning_log)
+from .metadata import Paths, ProblemConfig
+
+# Loaded problem.json files, by path, with the stat used to invalidate them
+# and their configuration once validated
+problem_configs: dict = {}
 
 
 def convert_idx_to_string(idx: int) -> str:
@@ -73,10 +91,80 @@ def instance_paths(problem_dir: Union[str, list], output_dir: Optional[str] = ''
         problem_dir = os.path.abspath(problem_dir)
     output_dir = os.path.abspath(output_dir) if output_dir else ''
     tmp_output_root_dir = os.path.join(
-        '/', 'tmp', f'ds-contest-tools-{generate_timestamp()}')
+        '/', 'tmp', f'{TMP_OUTPUT_PREFIX}{os.getpid()}-{generate_timestamp()}')
     Paths(problem_dir, output_dir, tmp_output_root_dir)
     setup_logger('tool', 'tool.log')
     setup_logger('debug', 'debug.log')
+    clean_old_tmp_outputs()
+
+
+def use_problem_paths(problem_dir: str, tmp_output_dir: str) -> None:
+    """Point the paths and logs of the current process to a single problem
+    of a contest, so it can be built without starting a new tool process.
+
+    Args:
+        problem_dir: The path to the problem directory.
+        tmp_output_dir: The temporary output directory of the problem build.
+    """
+    Paths().set_problem_dir(os.path.abspath(problem_dir))
+    Paths().set_tmp_output_dir(tmp_output_dir)
+    for name in ['tool', 'debug']:
+        logger = logging.getLogger(name)
+        for handler in logger.handlers[:]:
+            logger.removeHandler(handler)
+            handler.close()
+    setup_logger('tool', 'tool.log')
+    setup_logger('debug', 'debug.log')
+
+
+def use_tmpfs_output() -> None:
+    """Move the temporary output directory of this run to a tmpfs."""
+    if not os.path.isdir(TMPFS_OUTPUT_ROOT):
+        warning_log(f'{TMPFS_OUTPUT_ROOT} is not available. Using the default temporary folder.')
+        return
+    tmp_output_dir = os.path.basename(Paths().get_tmp_output_dir())
+    Paths().set_tmp_output_dir(os.path.join(TMPFS_OUTPUT_ROOT, tmp_output_dir))
+
+
+def is_process_alive(pid: int) -> bool:
+    """Check if a process with the given PID exists.
+
+    Args:
+        pid: The process ID.
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def clean_old_tmp_outputs(max_age_days: float = TMP_OUTPUT_RETENTION_DAYS) -> None:
+    """Remove temporary run directories older than the retention period.
+    Directories of runs that are still alive are kept, however old they are.
+
+    Args:
+        max_age_days: Age in days above which a run directory is removed.
+    """
+    limit = time.time() - max_age_days * 24 * 60 * 60
+    for root in TMP_OUTPUT_ROOTS:
+        if not os.path.isdir(root):
+            continue
+        for folder in os.listdir(root):
+            path = os.path.join(root, folder)
+            if not folder.startswith(TMP_OUTPUT_PREFIX) or not os.path.isdir(path):
+                continue
+            pid = folder[len(TMP_OUTPUT_PREFIX):].split('-')[0]
+            if not pid.isdigit() or is_process_alive(int(pid)):
+                continue
+            try:
+                if os.path.getmtime(path) < limit:
+                    shutil.rmtree(path)
+                    debug_log(f'Removed old temporary folder {path}')
+            except OSError:
+                pass
 
 
 def verify_solutions(solutions_dict: dict) -> None:
@@ -126,27 +214,32 @@ def verify_supported_languages(solution_file: str):
 
 
 def check_problem_metadata(problem_metadata: dict) -> None:
-    """Check variables inside problem.json for type errors.
+    """Check variables inside problem.json for missing keys and type errors.
 
     Args:
         problem_metadata: The problem.json file as a dictionary.
     """
-    verify_solutions(problem_metadata['solutions'])
-
     expected_types = {
-        'problem': {'time_limit': int, 'memory_limit_mb': int, 'interactive': bool, 'grader': bool},
-        'io_samples': int
+        'problem': {'title': str, 'event': str, 'time_limit': int, 'memory_limit_mb': int,
+                    'input_file': str, 'output_file': str, 'interactive': bool, 'grader': bool,
+                    'subject': dict},
+        'author': {'name': str},
+        'io_samples': int,
+        'boca_config': dict,
+        'solutions': dict
     }
     for key in expected_types:
         if key not in problem_metadata:
-            error_log(f"Variable {key} is not defined in problem.json.")
+            error_log(f"Variable '{key}' is not defined in problem.json.")
 
-        if key == 'io_samples':
+        if not isinstance(expected_types[key], dict):
             if not isinstance(problem_metadata[key], expected_types[key]):
                 error_log(
-                    f"Variable '{key}' is not a(n) {expected_types[key].__name__}.")
+                    f"Variable '{key}' is not a(n) {expected_types[key].__name__} in problem.json.")
             continue
 
+        if not isinstance(problem_metadata[key], dict):
+            error_log(f"Variable '{key}' is not a(n) dict in problem.json.")
         for subkey, expected_type in expected_types[key].items():
             value = problem_metadata[key].get(subkey)
             if subkey not in problem_metadata[key]:
@@ -156,6 +249,53 @@ def check_problem_metadata(problem_metadata: dict) -> None:
                 error_log(
                     f"Variable '{subkey}' in '{key}' is not a(n) {expected_type.__name__} in problem.json.")
 
+    verify_solutions(problem_metadata['solutions'])
+
+
+def load_problem_metadata(problem_folder: str) -> dict:
+    """Load the problem.json file of a problem without validating it.
+
+    The file is parsed once per process and reloaded only when its
+    modification time or size change. Callers that change the dictionary
+    must write it back to the file.
+
+    Args:
+        problem_folder: Path to the problem folder.
+
+    Returns:
+        The problem.json file as a dictionary.
+    """
+    path = os.path.abspath(os.path.join(problem_folder, 'problem.json'))
+    if not os.path.isfile(path):
+        error_log(f'{path} does not exist.')
+    stat = os.stat(path)
+    file_id = (stat.st_mtime_ns, stat.st_size)
+    if path not in problem_configs or problem_configs[path][0] != file_id:
+        problem_configs[path] = (file_id, parse_json(path), None)
+    return problem_configs[path][1]
+
+
+def load_problem_config(problem_folder: str) -> ProblemConfig:
+    """Load and validate the problem.json file of a problem.
+
+    The file is parsed once per process and reloaded only when its
+    modification time or size change.
+
+    Args:
+        problem_folder: Path to the problem folder.
+
+    Returns:
+        The problem configuration.
+    """
+    problem_metadata = load_problem_metadata(problem_folder)
+    path = os.path.abspath(os.path.join(problem_folder, 'problem.json'))
+    file_id, _, problem_config = problem_configs[path]
+    if problem_config is None:
+        check_problem_metadata(problem_metadata)
+        problem_config = ProblemConfig(problem_metadata)
+        problem_configs[path] = (file_id, problem_metadata, problem_config)
+    return problem_config
+
 
 def verify_path(path: str) -> bool:
     """Verify if path exists.
@@ -206,3 +346,236 @@ def copy_files(src_dir: str, dest_dir: str, files: list):
     os.makedirs(dest_dir, exist_ok=True)
     for file in files:
         shutil.copy2(os.path.join(src_dir, file), os.path.join(dest_dir, file))
+
+
+def sync_files(src_dir: str, dest_dir: str, files: list) -> None:
+    """Make the destination folder contain exactly the given files.
+
+    Unchanged files are not copied again and keep their modification time,
+    so make does not rebuild the targets which depend on them.
+
+    Args:
+        src_dir: Path to the source folder.
+        dest_dir: Path to the destination folder.
+        files: Names of the files to be synchronized.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    files = set(files)
+    for file in os.listdir(dest_dir):
+        if file not in files:
+            os.remove(os.path.join(dest_dir, file))
+    for file in files:
+        src_stat = os.stat(os.path.join(src_dir, file))
+        dest = os.path.join(dest_dir, file)
+        if os.path.isfile(dest):
+            dest_stat = os.stat(dest)
+            if (src_stat.st_size, src_stat.st_mtime_ns) == (dest_stat.st_size, dest_stat.st_mtime_ns):
+                continue
+        shutil.copy2(os.path.join(src_dir, file), dest)
+
+
+def java_command(class_folder: str, class_name: str, java_cds: bool = False) -> list:
+    """Return the command that runs a Java class.
+
+    Args:
+        class_folder: Path to the folder containing the class files.
+        class_name: Name of the main class.
+        java_cds: Whether to use the class data sharing archive of the class,
+            if it was created.
+
+    Returns:
+        The command-line arguments needed to run the class.
+    """
+    archive_path = os.path.join(class_folder, f'{class_name}.jsa')
+    jar_path = os.path.join(class_folder, f'{class_name}.jar')
+    if java_cds and os.path.isfile(archive_path):
+        return [JAVA_INTERPRETER, f'{JAVA_CDS_FLAG}={archive_path}',
+                JAVA_FLAG, jar_path, class_name]
+    return [JAVA_INTERPRETER, JAVA_FLAG, class_folder, class_name]
+
+
+def create_java_cds_archive(class_folder: str, class_name: str) -> bool:
+    """Package the classes of a folder in a jar and dump a class data sharing
+    archive from a run of the main class.
+
+    The archive only covers classes loaded from jar files, hence the jar. It
+    is kept while it is newer than every class file of the folder.
+
+    Args:
+        class_folder: Path to the folder containing the class files.
+        class_name: Name of the main class.
+
+    Returns:
+        True if the archive is available.
+    """
+    archive_path = os.path.join(class_folder, f'{class_name}.jsa')
+    jar_path = os.path.join(class_folder, f'{class_name}.jar')
+    class_files = [f for f in os.listdir(class_folder) if f.endswith('.class')]
+    if os.path.isfile(archive_path) and all(
+            os.path.getmtime(os.path.join(class_folder, f)) <= os.path.getmtime(archive_path)
+            for f in class_files):
+        return True
+
+    with zipfile.ZipFile(jar_path, 'w') as jar:
+        for f in class_files:
+            jar.write(os.path.join(class_folder, f), f)
+    if os.path.isfile(archive_path):
+        os.remove(archive_path)
+    # Solutions read the input until EOF, so an empty input is enough to
+    # load the classes they need at startup
+    try:
+        p = subprocess.run([JAVA_INTERPRETER, f'{JAVA_CDS_DUMP_FLAG}={archive_path}',
+                            JAVA_FLAG, jar_path, class_name],
+                           stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.PIPE, timeout=JAVA_CDS_DUMP_TIMEOUT)
+        if p.stderr:
+            debug_log(convert_to_string(p.stderr))
+    except (OSError, subprocess.TimeoutExpired) as e:
+        debug_log(f'Could not dump the archive of {class_name}: {e}')
+    return os.path.isfile(archive_path)
+
+
+def get_java_vm_test_folder(java_cds: bool = False) -> str:
+    """Return the folder of the class used to measure the JVM memory usage.
+
+    With class data sharing, the class is copied to a cache folder of the
+    installed JVM, where its archive is created, so the baseline is measured
+    with the same settings as the solutions.
+
+    Args:
+        java_cds: Whether the solutions run with class data sharing archives.
+
+    Returns:
+        The path to the folder containing the class.
+    """
+    if not java_cds:
+        return JAVA_VM_MEMORY_TEST_FOLDER
+    try:
+        p = subprocess.run([JAVA_INTERPRETER, '-version'],
+                           stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    except OSError:
+        return JAVA_VM_MEMORY_TEST_FOLDER
+    key = hashlib.sha1(p.stdout).hexdigest()
+    class_folder = os.path.join(CACHE_DIR, 'cds', key)
+    class_file = f'{JAVA_VM_TEST_FILE}.class'
+    if not os.path.isfile(os.path.join(class_folder, class_file)):
+        os.makedirs(class_folder, exist_ok=True)
+        shutil.copy2(os.path.join(JAVA_VM_MEMORY_TEST_FOLDER, class_file),
+                     os.path.join(class_folder, class_file))
+    if not create_java_cds_archive(class_folder, JAVA_VM_TEST_FILE):
+        warning_log('Could not create the class data sharing archive of the JVM memory test.')
+    return class_folder
+
+
+def get_python_interpreter(problem_config: Optional[ProblemConfig], solution_file: str = '') -> str:
+    """Return the interpreter of a Python solution.
+
+    The interpreter is read from the optional 'python_config' of problem.json,
+    where 'solutions' maps solution files to interpreters and 'interpreter'
+    is the default of the problem.
+
+    Args:
+        problem_config: The problem configuration.
+        solution_file: Name of the solution file.
+
+    Returns:
+        The interpreter command.
+    """
+    python_config = problem_config.python_config if problem_config else {}
+    interpreter = (python_config.get('solutions') or {}).get(solution_file)
+    return interpreter or python_config.get('interpreter') or PYTHON3_INTERPRETER
+
+
+def get_python_time_factor(interpreter: str) -> float:
+    """Return the multiplier of the time limit of Python solutions.
+
+    Args:
+        interpreter: The interpreter command.
+    """
+    return PYTHON_TIME_FACTORS.get(os.path.basename(interpreter),
+                                   PYTHON_TIME_FACTORS[PYTHON3_INTERPRETER])
+
+
+def compile_python_files(interpreter: str, files: list) -> None:
+    """Compile Python files to bytecode with the interpreter that runs them.
+
+    Args:
+        interpreter: The interpreter command.
+        files: List of tuples (source, compiled file). An empty compiled file
+            path stands for the default __pycache__ location.
+    """
+    script = ('import py_compile, sys\n'
+              'for i in range(1, len(sys.argv), 2):\n'
+              '    py_compile.compile(sys.argv[i], cfile=sys.argv[i + 1] or None, doraise=True)')
+    args = [path for pair in files for path in pair]
+    try:
+        p = subprocess.run([interpreter, '-c', script, *args],
+                           stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError:
+        error_log(f"Python interpreter {interpreter} was not found.")
+    check_subprocess_output(p, f"Could not compile Python files with {interpreter}.")
+
+
+def get_vm_memory_cache_key(interpreter: str, flags: list) -> str:
+    """Return the key of the memory baseline of an interpreter.
+
+    The interpreter is identified by its resolved path, size and modification
+    time, which change when it is upgraded, so a stale baseline is not used.
+
+    Args:
+        interpreter: The interpreter command.
+        flags: The flags used to run the solutions.
+
+    Returns:
+        The key, or an empty string if the interpreter was not found.
+    """
+    path = shutil.which(interpreter)
+    if path is None:
+        return ''
+    path = os.path.realpath(path)
+    stat = os.stat(path)
+    return json.dumps([path, stat.st_size, stat.st_mtime_ns, flags])
+
+
+def get_cached_vm_memory(key: str) -> Optional[int]:
+    """Return a cached interpreter memory baseline.
+
+    Args:
+        key: The key of the baseline.
+
+    Returns:
+        The memory usage, or None if it was not measured yet.
+    """
+    if not key or not os.path.isfile(VM_MEMORY_CACHE_PATH):
+        return None
+    try:
+        with open(VM_MEMORY_CACHE_PATH, 'r') as f:
+            return json.load(f).get(key)
+    except (OSError, ValueError):
+        return None
+
+
+def store_vm_memory(key: str, memory: int) -> None:
+    """Add an interpreter memory baseline to the cache.
+
+    Args:
+        key: The key of the baseline.
+        memory: The measured memory usage.
+    """
+    if not key:
+        return
+    baselines = {}
+    try:
+        with open(VM_MEMORY_CACHE_PATH, 'r') as f:
+            baselines = json.load(f)
+    except (OSError, ValueError):
+        pass
+    baselines[key] = memory
+    tmp_path = f'{VM_MEMORY_CACHE_PATH}.{os.getpid()}'
+    try:
+        os.makedirs(os.path.dirname(VM_MEMORY_CACHE_PATH), exist_ok=True)
+        with open(tmp_path, 'w') as f:
+            json.dump(baselines, f, indent=4)
+        os.replace(tmp_path, VM_MEMORY_CACHE_PATH)
+    except OSError as e:
+        debug_log(f'Could not store the memory baseline of {key}: {e}')
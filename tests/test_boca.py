@@ -0,0 +1,114 @@
+"""Zipping of BOCA packages."""
+import os
+import zipfile
+
+import pytest
+
+from ds_contest_tools import boca
+
+
+@pytest.fixture
+def problem_files(tmp_path):
+    """Write the files of a problem and return the entries of its package."""
+    files = {
+        'input': b'1 2\n' * 1000,
+        'output': b'3\n' * 1000,
+        'checker': os.urandom(4096),
+    }
+    paths = {}
+    for name, data in files.items():
+        paths[name] = str(tmp_path / name)
+        with open(paths[name], 'wb') as f:
+            f.write(data)
+    return [
+        ('input/1', paths['input'], 0o644),
+        ('output/1', paths['output'], 0o644),
+        ('compare/c', paths['checker'], 0o755),
+        ('compare/cpp', paths['checker'], 0o755),
+        ('limits/c', b'echo 1\nexit 0\n', 0o755),
+    ]
+
+
+def read_entries(entries: list) -> dict:
+    contents = {}
+    for name, source, _ in entries:
+        if isinstance(source, str):
+            with open(source, 'rb') as f:
+                source = f.read()
+        contents[name] = source
+    return contents
+
+
+def read_zip(zip_path: str) -> dict:
+    with zipfile.ZipFile(zip_path) as archive:
+        assert archive.testzip() is None
+        return {info.filename: (archive.read(info), info.external_attr >> 16, info.date_time,
+                                info.compress_type)
+                for info in archive.infolist()}
+
+
+def read_bytes(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('level, method', [(0, zipfile.ZIP_STORED), (6, zipfile.ZIP_DEFLATED)])
+def test_round_trip(tmp_path, problem_files, level, method):
+    zip_path = str(tmp_path / 'boca.zip')
+    boca.boca_zip(problem_files, zip_path, level)
+    contents = read_entries(problem_files)
+    assert read_zip(zip_path) == {
+        name: (contents[name], 0o100000 | mode, boca.ZIP_DATE_TIME, method)
+        for name, _, mode in problem_files}
+    assert not os.path.exists(f'{zip_path}.{os.getpid()}')
+
+
+def test_zip_is_reproducible(tmp_path, problem_files, monkeypatch):
+    monkeypatch.setenv('SOURCE_DATE_EPOCH', '1700000000')
+    first, second = str(tmp_path / 'first.zip'), str(tmp_path / 'second.zip')
+    boca.boca_zip(problem_files, first)
+    os.utime(problem_files[0][1], (0, 0))
+    boca.boca_zip(problem_files, second)
+    assert read_bytes(first) == read_bytes(second)
+    assert {entry[2] for entry in read_zip(first).values()} == {(2023, 11, 14, 22, 13, 20)}
+
+
+@pytest.mark.skipif(not boca.ZIP_RAW_COPY, reason="entries are not copied on this Python version")
+def test_unchanged_entries_are_reused(tmp_path, problem_files, monkeypatch):
+    zip_path, fresh_path = str(tmp_path / 'boca.zip'), str(tmp_path / 'fresh.zip')
+    boca.boca_zip(problem_files, zip_path)
+    with open(problem_files[1][1], 'ab') as f:
+        f.write(b'4\n')
+    messages = []
+    monkeypatch.setattr(boca, 'debug_log', messages.append)
+    boca.boca_zip(problem_files, zip_path)
+    # The duplicated checker is copied from its first entry, not reused
+    assert messages == [f'Reused 3 of 5 entries of {zip_path}']
+
+    boca.boca_zip(problem_files, fresh_path)
+    assert read_bytes(zip_path) == read_bytes(fresh_path)
+    assert {name: entry[0] for name, entry in read_zip(zip_path).items()} \
+        == read_entries(problem_files)
+
+
+def test_other_compression_level_is_not_reused(tmp_path, problem_files, monkeypatch):
+    zip_path = str(tmp_path / 'boca.zip')
+    boca.boca_zip(problem_files, zip_path, 6)
+    messages = []
+    monkeypatch.setattr(boca, 'debug_log', messages.append)
+    boca.boca_zip(problem_files, zip_path, 0)
+    assert messages == [f'Reused 0 of 5 entries of {zip_path}']
+    assert {entry[3] for entry in read_zip(zip_path).values()} == {zipfile.ZIP_STORED}
+
+
+def test_rewrite_without_raw_copy(tmp_path, problem_files, monkeypatch):
+    copied, rewritten = str(tmp_path / 'copied.zip'), str(tmp_path / 'rewritten.zip')
+    boca.boca_zip(problem_files, copied)
+    boca.boca_zip(problem_files, copied)
+    monkeypatch.setattr(boca, 'ZIP_RAW_COPY', False)
+    messages = []
+    monkeypatch.setattr(boca, 'debug_log', messages.append)
+    boca.boca_zip(problem_files, rewritten)
+    boca.boca_zip(problem_files, rewritten)
+    assert messages[-1] == f'Reused 0 of 5 entries of {rewritten}'
+    assert read_bytes(copied) == read_bytes(rewritten)
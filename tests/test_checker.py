@@ -0,0 +1,81 @@
+"""Parallel judging of the solutions."""
+import multiprocessing
+import os
+import time
+
+import pytest
+
+psutil = pytest.importorskip('psutil')
+from ds_contest_tools import checker  # noqa: E402
+
+
+def busy_loop(seconds: float) -> None:
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+
+
+def test_average_running_counts_admitted_jobs():
+    budget = checker.MemoryBudget(100)
+    assert budget.average_running == 0
+    budget.acquire(60)
+    time.sleep(0.2)
+    budget.release(60)
+    # The idle time between jobs is counted
+    time.sleep(0.2)
+    budget.acquire(60)
+    time.sleep(0.2)
+    budget.release(60)
+    assert budget.average_running == pytest.approx(2 / 3, abs=0.05)
+
+    budget = checker.MemoryBudget(100)
+    budget.acquire(50)
+    budget.acquire(50)
+    time.sleep(0.2)
+    budget.release(50)
+    time.sleep(0.2)
+    budget.release(50)
+    assert budget.average_running == pytest.approx(1.5, abs=0.1)
+
+
+def test_external_process_load_is_contention():
+    context = multiprocessing.get_context('fork')
+    external = context.Process(target=busy_loop, args=(1,))
+    external.start()
+    try:
+        baseline = checker.cpu_usage_sample(os.getpid(), [external.pid])
+        judge_baseline = checker.cpu_usage_sample(os.getpid())
+        time.sleep(0.5)
+        current = checker.cpu_usage_sample(os.getpid(), [external.pid])
+        judge_current = checker.cpu_usage_sample(os.getpid())
+    finally:
+        external.join()
+    assert checker.external_cpu_load(baseline, current) > 0.5
+    assert checker.external_cpu_load(judge_baseline, judge_current) < 0.5
+
+
+def write_script(path, content: str) -> str:
+    path.write_text('#!/bin/sh\n' + content)
+    path.chmod(0o755)
+    return str(path)
+
+
+def test_chatty_interactor_does_not_block(tmp_path):
+    interactor = write_script(tmp_path / 'interactor', 'head -c 1000000 /dev/zero >&2\n'
+                              'echo 5\nread answer\necho $answer > "$2"\n')
+    solution = write_script(tmp_path / 'solution', 'read x\necho $x\n')
+    p, interactor_process = checker.start_interactive(
+        [solution], interactor, os.devnull, str(tmp_path / 'output'))
+    p.communicate(timeout=10)
+    status = checker.finish_interactor(interactor_process, checker.Status.AC, 'test')
+    assert status == checker.Status.AC
+    assert (tmp_path / 'output').read_text() == '5\n'
+
+
+def test_interactor_is_killed_if_solution_fails_to_start(tmp_path):
+    interactor = write_script(tmp_path / 'interactor', 'sleep 30\n')
+    children = set(psutil.Process().children())
+    with pytest.raises(OSError):
+        checker.start_interactive([str(tmp_path / 'missing')], interactor,
+                                  os.devnull, str(tmp_path / 'output'))
+    assert set(psutil.Process().children()) == children
@@ -0,0 +1,182 @@
+"""Built-in PDF merger.
+
+The documents are written by hand so that each layout the merger must read
+is covered: classic cross-reference tables, cross-reference streams with
+object streams, broken cross-references and encrypted files.
+"""
+import os
+import zlib
+
+import pytest
+
+from ds_contest_tools import pdfmerge
+
+SAMPLE_PDFS = [
+    '/usr/share/doc/libtasn1-doc/libtasn1.pdf',
+    '/usr/share/doc/shared-mime-info/shared-mime-info-spec.pdf',
+]
+
+
+def page_objects(texts: list) -> dict:
+    """Build the objects of a document with one page per text.
+
+    Object 1 is the catalog, 2 the page tree and 3 the font. Each page uses
+    two objects: the page dictionary and its content stream.
+    """
+    objects = {
+        1: b'<</Type /Catalog /Pages 2 0 R>>',
+        3: b'<</Type /Font /Subtype /Type1 /BaseFont /Helvetica>>',
+    }
+    kids = []
+    for i, text in enumerate(texts):
+        page, content = 4 + 2 * i, 5 + 2 * i
+        kids.append(f'{page} 0 R')
+        # Resources and MediaBox are inherited from the page tree
+        objects[page] = f'<</Type /Page /Parent 2 0 R /Contents {content} 0 R>>'.encode()
+        data = f'BT /F1 24 Tf 72 720 Td ({text}) Tj ET'.encode()
+        objects[content] = b'<</Length %d>>\nstream\n%s\nendstream' % (len(data), data)
+    objects[2] = (f'<</Type /Pages /Kids [{" ".join(kids)}] /Count {len(texts)} '
+                  '/Resources <</Font <</F1 3 0 R>>>> /MediaBox [0 0 612 792]>>').encode()
+    return objects
+
+
+def write_table_pdf(path: str, objects: dict, trailer: bytes = b'',
+                    offset_shift: int = 0, startxref: int = None) -> None:
+    """Write a document with a classic cross-reference table."""
+    data = bytearray(b'%PDF-1.4\n')
+    offsets = {}
+    for num in sorted(objects):
+        offsets[num] = len(data)
+        data += b'%d 0 obj\n%s\nendobj\n' % (num, objects[num])
+    size = max(objects) + 1
+    xref = len(data)
+    data += b'xref\n0 %d\n0000000000 65535 f \n' % size
+    for num in range(1, size):
+        data += b'%010d 00000 n \n' % (offsets[num] + offset_shift)
+    data += b'trailer\n<</Size %d /Root 1 0 R%s>>\n' % (size, trailer)
+    data += b'startxref\n%d\n%%%%EOF\n' % (xref if startxref is None else startxref)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def png_up(rows: list) -> bytes:
+    """Encode rows with the PNG Up predictor."""
+    encoded = bytearray()
+    previous = bytes(len(rows[0]))
+    for row in rows:
+        encoded.append(2)
+        encoded += bytes((a - b) & 0xff for a, b in zip(row, previous))
+        previous = row
+    return bytes(encoded)
+
+
+def write_xref_stream_pdf(path: str, objects: dict) -> None:
+    """Write a document with a cross-reference stream.
+
+    Every object that is not a stream is stored in a single object stream.
+    """
+    size = max(objects) + 3
+    object_stream, xref_stream = size - 2, size - 1
+    compressed = [num for num in sorted(objects) if b'stream' not in objects[num]]
+    header, body = [], bytearray()
+    for num in compressed:
+        header.append(b'%d %d' % (num, len(body)))
+        body += objects[num] + b'\n'
+    header = b' '.join(header) + b'\n'
+    packed = zlib.compress(header + bytes(body))
+
+    data = bytearray(b'%PDF-1.5\n')
+    entries = {0: (0, 0, 65535)}
+    for num in sorted(objects):
+        if num not in compressed:
+            entries[num] = (1, len(data), 0)
+            data += b'%d 0 obj\n%s\nendobj\n' % (num, objects[num])
+    for index, num in enumerate(compressed):
+        entries[num] = (2, object_stream, index)
+    entries[object_stream] = (1, len(data), 0)
+    data += (b'%d 0 obj\n<</Type /ObjStm /N %d /First %d /Filter /FlateDecode /Length %d>>\n'
+             b'stream\n%s\nendstream\nendobj\n'
+             % (object_stream, len(compressed), len(header), len(packed), packed))
+    entries[xref_stream] = (1, len(data), 0)
+    rows = [bytes([kind]) + offset.to_bytes(3, 'big') + generation.to_bytes(2, 'big')
+            for kind, offset, generation in (entries[num] for num in range(size))]
+    packed = zlib.compress(png_up(rows))
+    data += (b'%d 0 obj\n<</Type /XRef /Size %d /W [1 3 2] /Root 1 0 R /Filter /FlateDecode '
+             b'/DecodeParms <</Predictor 12 /Columns 6>> /Length %d>>\n'
+             b'stream\n%s\nendstream\nendobj\n'
+             % (xref_stream, size, len(packed), packed))
+    data += b'startxref\n%d\n%%%%EOF\n' % entries[xref_stream][1]
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def page_texts(path: str) -> list:
+    """Read the decoded content stream of each page of a document."""
+    document = pdfmerge.Document(path)
+    texts = []
+    for ref, inherited in document.get_pages():
+        page = {**inherited, **document.resolve(ref)}
+        assert b'Resources' in page and b'MediaBox' in page
+        texts.append(pdfmerge.decode_stream(document.resolve(page[b'Contents'])))
+    return texts
+
+
+def expected_texts(texts: list) -> list:
+    return [f'BT /F1 24 Tf 72 720 Td ({text}) Tj ET'.encode() for text in texts]
+
+
+def test_merge_table_and_xref_stream(tmp_path):
+    table = str(tmp_path / 'table.pdf')
+    stream = str(tmp_path / 'stream.pdf')
+    merged = str(tmp_path / 'merged.pdf')
+    write_table_pdf(table, page_objects(['A1', 'A2']))
+    write_xref_stream_pdf(stream, page_objects(['B1', 'B2', 'B3']))
+    assert page_texts(stream) == expected_texts(['B1', 'B2', 'B3'])
+
+    pdfmerge.merge_pdf_files([table, stream, table], merged)
+    assert page_texts(merged) == expected_texts(['A1', 'A2', 'B1', 'B2', 'B3', 'A1', 'A2'])
+
+
+@pytest.mark.parametrize('broken', [
+    {'offset_shift': 7},
+    {'startxref': 3},
+    {'startxref': 10 ** 6},
+])
+def test_broken_xref_is_rebuilt(tmp_path, broken):
+    path = str(tmp_path / 'broken.pdf')
+    merged = str(tmp_path / 'merged.pdf')
+    write_table_pdf(path, page_objects(['C1', 'C2']), **broken)
+    pdfmerge.merge_pdf_files([path], merged)
+    assert page_texts(merged) == expected_texts(['C1', 'C2'])
+
+
+def test_encrypted_pdf_is_rejected(tmp_path):
+    objects = page_objects(['D1'])
+    encrypt = max(objects) + 1
+    objects[encrypt] = b'<</Filter /Standard /V 1 /R 2 /O (x) /U (y) /P -4>>'
+    path = str(tmp_path / 'encrypted.pdf')
+    write_table_pdf(path, objects, trailer=b' /Encrypt %d 0 R' % encrypt)
+    with pytest.raises(pdfmerge.PdfError):
+        pdfmerge.merge_pdf_files([path], str(tmp_path / 'merged.pdf'))
+
+
+def test_merged_pdf_is_valid(tmp_path):
+    pypdf = pytest.importorskip('pypdf')
+    table = str(tmp_path / 'table.pdf')
+    stream = str(tmp_path / 'stream.pdf')
+    merged = str(tmp_path / 'merged.pdf')
+    write_table_pdf(table, page_objects(['E1']))
+    write_xref_stream_pdf(stream, page_objects(['F1', 'F2']))
+    pdfmerge.merge_pdf_files([table, stream], merged)
+    reader = pypdf.PdfReader(merged, strict=True)
+    assert [page.extract_text() for page in reader.pages] == ['E1', 'F1', 'F2']
+
+
+@pytest.mark.parametrize('sample', SAMPLE_PDFS)
+def test_merge_real_pdf(tmp_path, sample):
+    if not os.path.exists(sample):
+        pytest.skip(f'{sample} not found')
+    merged = str(tmp_path / 'merged.pdf')
+    pdfmerge.merge_pdf_files([sample, sample], merged)
+    pages = len(pdfmerge.Document(sample).get_pages())
+    assert len(pdfmerge.Document(merged).get_pages()) == 2 * pages
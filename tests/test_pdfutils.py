@@ -0,0 +1,75 @@
+"""Precompiled LaTeX formats of the statements."""
+import os
+import subprocess
+import time
+
+import pytest
+
+from ds_contest_tools import config, pdfutils
+
+FORMAT = 'ds-format'
+
+
+@pytest.fixture
+def latex(tmp_path, monkeypatch):
+    """Replace pdflatex by a fake one that fails with the format when asked
+    to, and fails without it when the document is broken.
+
+    Returns:
+        The state of the fake pdflatex and the paths of the document.
+    """
+    state = {'format_works': True, 'document_works': True, 'runs': []}
+    format_dir = tmp_path / 'formats'
+    format_dir.mkdir()
+    monkeypatch.setattr(config, 'LATEX_FORMAT_DIR', str(format_dir))
+    monkeypatch.setattr(config, 'PDF_CACHE_DIR', str(tmp_path / 'pdf'))
+    (format_dir / f'{FORMAT}.fmt').write_bytes(b'format')
+    monkeypatch.setattr(pdfutils, 'get_latex_format', lambda *args: FORMAT)
+
+    def run_pdflatex(problem_folder, build_folder, tex_path, latex_format=''):
+        state['runs'].append(latex_format)
+        works = state['document_works'] and (state['format_works'] or not latex_format)
+        if works:
+            with open(os.path.join(build_folder, 'statement.pdf'), 'wb') as f:
+                f.write(b'%PDF-1.4\n')
+        return subprocess.CompletedProcess([], 0 if works else 1, b'', b'')
+
+    monkeypatch.setattr(pdfutils, 'run_pdflatex', run_pdflatex)
+    (tmp_path / 'maratona.cls').write_text('\\LoadClass{article}')
+    tex_path = tmp_path / 'statement.tex'
+    tex_path.write_text('\\documentclass{article}\\begin{document}x\\end{document}')
+    output = tmp_path / 'output'
+    output.mkdir()
+    return state, str(tmp_path), str(tex_path), str(output)
+
+
+def test_broken_format_is_discarded(latex):
+    state, problem, tex, output = latex
+    state['format_works'] = False
+    pdfutils.generate_pdf(problem, output, tex)
+    assert state['runs'] == [FORMAT, '']
+    assert os.path.isfile(os.path.join(output, 'statement.pdf'))
+    assert not os.path.exists(os.path.join(config.LATEX_FORMAT_DIR, f'{FORMAT}.fmt'))
+    assert pdfutils.is_latex_format_failed(FORMAT)
+
+
+def test_broken_document_keeps_format(latex):
+    state, problem, tex, output = latex
+    state['document_works'] = False
+    with pytest.raises(SystemExit):
+        pdfutils.generate_pdf(problem, output, tex)
+    assert state['runs'] == [FORMAT, '']
+    assert os.path.isfile(os.path.join(config.LATEX_FORMAT_DIR, f'{FORMAT}.fmt'))
+    assert not pdfutils.is_latex_format_failed(FORMAT)
+
+
+def test_failed_format_expires(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'LATEX_FORMAT_DIR', str(tmp_path))
+    failed_path = tmp_path / f'{FORMAT}.failed'
+    failed_path.touch()
+    assert pdfutils.is_latex_format_failed(FORMAT)
+
+    expired = time.time() - config.LATEX_FORMAT_RETRY_TIME - 1
+    os.utime(failed_path, (expired, expired))
+    assert not pdfutils.is_latex_format_failed(FORMAT)
+    assert not failed_path.exists()
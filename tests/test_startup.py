@@ -0,0 +1,76 @@
+"""Startup time of the command line interface.
+
+Only the modules of the chosen command should be imported, so showing the
+help or running light commands must not load the judging, PDF or network
+dependencies.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = [
+    'psutil',
+    'requests',
+    'multiprocessing',
+    'concurrent.futures',
+    'ds_contest_tools.checker',
+    'ds_contest_tools.contest',
+    'ds_contest_tools.pdfmerge',
+    'ds_contest_tools.pdfutils',
+    'ds_contest_tools.boca',
+]
+# Total import time of a command, generous enough for slow machines
+STARTUP_BUDGET_US = 500_000
+
+
+def import_times(args: list) -> dict:
+    """Run the tool with -X importtime.
+
+    Args:
+        args: The command line arguments of the tool.
+
+    Returns:
+        A dictionary mapping each imported module to its cumulative import
+        time in microseconds. The total import time is stored under ''.
+    """
+    env = dict(os.environ, PYTHONPATH=REPOSITORY_DIR)
+    p = subprocess.run([sys.executable, '-X', 'importtime', '-m', 'ds_contest_tools', *args],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+                       cwd=REPOSITORY_DIR, env=env)
+    times = {'': 0}
+    for line in p.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if not cumulative.strip().isdigit():
+            continue
+        times[name.strip()] = int(cumulative)
+        # Nested imports are indented and already counted by their parents
+        if not name[1:].startswith(' '):
+            times[''] += int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize('args', [
+    ['--help'],
+    ['build', '--help'],
+    ['contest', '--help'],
+    ['convert_to', '--help'],
+    ['clean', '--help'],
+    ['init', '--help'],
+])
+def test_startup_imports(args):
+    times = import_times(args)
+    assert 'ds_contest_tools' in times
+    loaded = [module for module in HEAVY_MODULES if module in times]
+    assert not loaded, f'{" ".join(args)} imports {", ".join(loaded)}'
+    assert times[''] < STARTUP_BUDGET_US
+
+
+if __name__ == '__main__':
+    for args in [['--help'], ['build', '--help'], ['clean', '--help']]:
+        times = import_times(args)
+        print(f'{" ".join(args)}: {times[""] / 1000:.1f} ms')
@@ -0,0 +1,66 @@
+"""Loading of the problem.json file."""
+import json
+import os
+import shutil
+
+import pytest
+
+from ds_contest_tools import utils
+from ds_contest_tools.metadata import Paths
+
+TEMPLATE = os.path.join(os.path.dirname(utils.__file__), 'files', 'problem.json')
+
+
+@pytest.fixture
+def problem(tmp_path):
+    """Create a problem with a valid problem.json and return its folder."""
+    (tmp_path / 'src').mkdir()
+    (tmp_path / 'src' / 'main-ac.cpp').write_text('int main() {}\n')
+    with open(TEMPLATE) as f:
+        metadata = json.load(f)
+    metadata['solutions']['main-ac'] = 'main-ac.cpp'
+    (tmp_path / 'problem.json').write_text(json.dumps(metadata))
+    Paths(str(tmp_path), str(tmp_path), str(tmp_path)).set_problem_dir(str(tmp_path))
+    return str(tmp_path)
+
+
+def edit_metadata(problem: str, edit) -> None:
+    path = os.path.join(problem, 'problem.json')
+    with open(path) as f:
+        metadata = json.load(f)
+    edit(metadata)
+    with open(path, 'w') as f:
+        json.dump(metadata, f, indent=4)
+
+
+def test_config_is_cached_until_the_file_changes(problem):
+    config = utils.load_problem_config(problem)
+    assert utils.load_problem_config(problem) is config
+    assert utils.load_problem_metadata(problem) is config.metadata
+
+    edit_metadata(problem, lambda metadata: metadata['problem'].update(title='Soma'))
+    assert utils.load_problem_config(problem).title == 'Soma'
+
+
+@pytest.mark.parametrize('edit', [
+    lambda metadata: metadata['problem'].pop('title'),
+    lambda metadata: metadata['problem'].pop('input_file'),
+    lambda metadata: metadata['problem'].update(subject=['dp']),
+    lambda metadata: metadata['author'].pop('name'),
+    lambda metadata: metadata.pop('boca_config'),
+    lambda metadata: metadata.update(author='Alguém'),
+])
+def test_malformed_problem_json_is_rejected(problem, edit):
+    edit_metadata(problem, edit)
+    with pytest.raises(SystemExit):
+        utils.load_problem_config(problem)
+
+
+def test_python_config_is_optional(problem):
+    edit_metadata(problem, lambda metadata: metadata.pop('python_config'))
+    assert utils.load_problem_config(problem).python_config == {}
+
+
+def test_unvalidated_metadata_allows_a_new_problem(tmp_path):
+    shutil.copy(TEMPLATE, tmp_path / 'problem.json')
+    assert utils.load_problem_metadata(str(tmp_path))['solutions']['main-ac'] == ''